@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+Benchmark suite of QWatson that runs on synthetic Watson histories.
+
+Usage example from the root of the repository :
+
+    python -m benchmarks.bench_core --sizes 1000,100000
+    python -m benchmarks.bench_core --sizes 1000 --save-baseline
+"""
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+Benchmarks of the timestamp codec of QWatson compared with the equivalent
+arrow calls, on the start times of a synthetic Watson history.
+
+Usage example from the root of the repository :
+
+    python -m benchmarks.bench_codec --sizes 10000,100000
+"""
+
+# ---- Standard imports
+
+import sys
+
+# ---- Third parties imports
+
+import arrow
+import click
+
+# ---- Local imports
+
+from benchmarks.harness import BenchmarkResults, measure
+from benchmarks.synthetic import generate_frames
+from qwatson.utils.dates import local_arrow_from_str
+from qwatson.utils.timecodec import codec
+from qwatson.watson_ext.watsonextends import Frames
+
+DEFAULT_SIZES = '10000,100000'
+
+
+def bench_codec(size, results, repeat):
+    """
+    Benchmark the conversions, formatting and parsing of the start times
+    of size frames, with arrow and with the codec.
+    """
+    dumped = generate_frames(size)
+    timestamps = [frame[0] for frame in dumped]
+    arrows = [codec.to_local(timestamp) for timestamp in timestamps]
+    strings = [value.format('YYYY-MM-DD HH:mm:ss') for value in arrows]
+    fmt = 'YYYY-MM-DD HH:mm:ss'
+
+    cases = [
+        ('decode', lambda: [arrow.get(ts).to('local') for ts in timestamps],
+         lambda: [codec.to_local(ts) for ts in timestamps]),
+        ('encode', lambda: [a.to('utc').timestamp for a in arrows],
+         lambda: [codec.to_timestamp(a) for a in arrows]),
+        ('format', lambda: [a.format('YYYY-MM-DD HH:mm') for a in arrows],
+         lambda: [codec.format_minutes(a) for a in arrows]),
+        ('parse', lambda: [arrow.get(s, fmt).replace(tzinfo='local')
+                           for s in strings],
+         lambda: [local_arrow_from_str(s, fmt) for s in strings]),
+    ]
+    for name, arrow_func, codec_func in cases:
+        results.add('arrow_%s' % name, size, measure(arrow_func, repeat))
+        results.add('codec_%s' % name, size, measure(codec_func, repeat))
+
+    # The loading and dumping of the frames go through the codec.
+    results.add('frames_load', size, measure(
+        lambda: Frames(dumped), repeat))
+    frames = Frames(dumped)
+    results.add('frames_dump', size, measure(frames.dump, repeat))
+
+
+@click.command()
+@click.option('--sizes', default=DEFAULT_SIZES, show_default=True,
+              help="Comma separated numbers of synthetic frames.")
+@click.option('--repeat', default=5, show_default=True)
+@click.option('--output', default=None, help="Where to write the results.")
+def cli(sizes, repeat, output):
+    """Run the benchmarks of the timestamp codec."""
+    results = BenchmarkResults()
+    for size in [int(size) for size in sizes.split(',')]:
+        bench_codec(size, results, repeat)
+    if output is not None:
+        results.write(output)
+
+
+if __name__ == '__main__':
+    sys.exit(cli())
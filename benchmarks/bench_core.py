@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+Benchmarks of the core paths of QWatson on synthetic Watson histories.
+
+The gui benchmarks are run with the offscreen Qt platform, unless another
+platform is set with the QT_QPA_PLATFORM environment variable.
+"""
+
+# ---- Standard imports
+
+import itertools
+import json
+import os
+import os.path as osp
+import sys
+import tempfile
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+# ---- Third parties imports
+
+import click
+from PyQt5.QtWidgets import QApplication
+
+# ---- Local imports
+
+from benchmarks.harness import (
+    BASELINE_FILE, BenchmarkResults, load_results, measure, print_comparison)
+from benchmarks.synthetic import generate_frames
+from qwatson.models.tablemodels import (
+    WatsonTableModel, WatsonSortFilterProxyModel)
+from qwatson.utils.fileio import delete_folder_recursively
+from qwatson.watson_ext.completions import Completions
+from qwatson.watson_ext.conflicts import ConflictIndex
+from qwatson.watson_ext.searchindex import SearchIndex
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.watson_ext.watsonhelpers import (
+    find_where_to_insert_new_frame, reset_watson)
+from qwatson.widgets.tableviews import ActivityOverviewWidget
+
+DEFAULT_SIZES = '1000,100000'
+
+
+class SyntheticHistory(object):
+    """
+    A synthetic Watson history written in a config dir that can be
+    restored to its original content between destructive benchmarks.
+    """
+
+    def __init__(self, workdir, size):
+        self.size = size
+        self.config_dir = osp.join(workdir, str(size))
+        os.makedirs(self.config_dir)
+        self.content = json.dumps(generate_frames(size))
+        self.client = Watson(config_dir=self.config_dir)
+        self.restore()
+
+    def restore(self):
+        """Write back the original frames and reload them in the client."""
+        with open(osp.join(self.config_dir, 'frames'), 'w') as f:
+            f.write(self.content)
+        projects_file = osp.join(self.config_dir, 'projects')
+        if osp.exists(projects_file):
+            os.remove(projects_file)
+        reset_watson(self.client)
+        self.client.frames
+        self.client.projects
+        self.client.rollups
+
+    def week_spans(self, count):
+        """
+        Return the spans of the count weeks that precede the last frame of
+        the history, in reverse chronological order.
+        """
+        last_week = self.client.frames[-1].start.floor('week')
+        return [last_week.shift(weeks=-i).span('week') for i in range(count)]
+
+
+def bench_watson(history, results, repeat):
+    """Benchmark the Watson client operations."""
+    size, client = history.size, history.client
+
+    results.add('watson_load', size, measure(
+        lambda: len(Watson(config_dir=history.config_dir).frames), repeat))
+
+    def mark_changed():
+        client.frames.changed = True
+    results.add('watson_save', size, measure(
+        client.save, repeat, setup=mark_changed))
+
+    middle = client.frames[size // 2]
+    results.add('find_where_to_insert_new_frame', size, measure(
+        lambda: find_where_to_insert_new_frame(client, middle.start),
+        repeat))
+
+    # A project with an average number of frames.
+    project = 'project05'
+    results.add('delete_project', size, measure(
+        lambda: client.delete_project(project), repeat,
+        setup=history.restore))
+    results.add('rename_project', size, measure(
+        lambda: client.rename_project(project, 'renamed'), repeat,
+        setup=history.restore))
+    history.restore()
+
+
+def bench_models(history, results, repeat):
+    """Benchmark the filtering of the proxy models for a week."""
+    size = history.size
+    model = WatsonTableModel(history.client)
+    proxy = WatsonSortFilterProxyModel(model)
+
+    spans = itertools.cycle(history.week_spans(4))
+
+    def filter_week():
+        proxy.set_date_span(next(spans))
+        # The proxy maps its rows lazily, so we ask for its row count to
+        # force the filtering of the rows like a view would.
+        return proxy.rowCount()
+    results.add('proxy_filter_week', size, measure(filter_week, repeat))
+
+    def reset_total():
+        proxy.total_seconds = None
+    results.add('calcul_total_seconds', size, measure(
+        proxy.calcul_total_seconds, repeat, setup=reset_total))
+
+    rollups = history.client.rollups
+    results.add('rollups_rebuild', size, measure(
+        lambda: rollups.rebuild(history.client.frames), repeat))
+    year_span = history.client.frames[-1].start.span('year')
+    results.add('rollups_year_total', size, measure(
+        lambda: rollups.total(year_span), repeat))
+
+    conflicts = ConflictIndex()
+    results.add('conflicts_rebuild', size, measure(
+        lambda: conflicts.rebuild(history.client.frames), repeat))
+    middle = history.client.frames[size // 2]
+    results.add('conflicts_update', size, measure(
+        lambda: conflicts.update([middle], [middle]), repeat))
+
+
+def bench_search(history, results, repeat):
+    """
+    Benchmark the build and the queries of the search index and of the
+    completions.
+    """
+    size, client = history.size, history.client
+    index = SearchIndex()
+    results.add('search_index_build', size, measure(
+        lambda: index.rebuild(client.frames), repeat))
+    results.add('search_index_prefix_query', size, measure(
+        lambda: index.search_days('ta'), repeat))
+    results.add('search_index_words_query', size, measure(
+        lambda: index.search_days('tag03 project0'), repeat))
+
+    completions = Completions()
+    results.add('completions_rebuild', size, measure(
+        lambda: completions.rebuild(client.frames), repeat))
+    results.add('complete_tag_prefix', size, measure(
+        lambda: completions.tags.complete('t'), repeat))
+
+
+def bench_overview(history, results, repeat):
+    """Benchmark the week navigation in the activity overview."""
+    size = history.size
+    app = QApplication.instance()
+    model = WatsonTableModel(history.client)
+    overview = ActivityOverviewWidget(model)
+    navigator = overview.date_range_nav
+    navigator.home = navigator.current = history.week_spans(1)[0]
+    overview.date_span_changed()
+    overview.show()
+    app.processEvents()
+
+    def go_previous():
+        navigator.go_previous_range()
+        app.processEvents()
+
+    def go_next():
+        navigator.go_next_range()
+        app.processEvents()
+
+    actions = itertools.cycle([go_previous, go_next])
+    results.add('overview_week_navigation', size, measure(
+        lambda: next(actions)(), repeat * 2))
+    overview.close()
+    overview.deleteLater()
+    app.processEvents()
+
+
+BENCHMARKS = {'watson': bench_watson,
+              'models': bench_models,
+              'search': bench_search,
+              'overview': bench_overview}
+
+
+def run(sizes, repeat=5, groups=None):
+    """
+    Run the benchmarks of the specified groups for each size of synthetic
+    history and return the BenchmarkResults.
+    """
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = BenchmarkResults()
+    workdir = tempfile.mkdtemp(prefix='qwatson_bench_')
+    try:
+        for size in sizes:
+            history = SyntheticHistory(workdir, size)
+            for name, func in BENCHMARKS.items():
+                if groups is None or name in groups:
+                    func(history, results, repeat)
+    finally:
+        # The widgets deleted later must release the files of the workdir.
+        app.processEvents()
+        delete_folder_recursively(workdir)
+    return results
+
+
+@click.command()
+@click.option('--sizes', default=DEFAULT_SIZES, show_default=True,
+              help="Comma separated numbers of synthetic frames.")
+@click.option('--repeat', default=5, show_default=True)
+@click.option('--groups', default=None,
+              help="Comma separated groups among: %s." %
+              ', '.join(BENCHMARKS))
+@click.option('--output', default=None, help="Where to write the results.")
+@click.option('--baseline', default=BASELINE_FILE, show_default=True)
+@click.option('--save-baseline', is_flag=True,
+              help="Write the results to the baseline file.")
+@click.option('--threshold', default=1.5, show_default=True,
+              help="The time ratio above which a result is a regression.")
+def cli(sizes, repeat, groups, output, baseline, save_baseline, threshold):
+    """Run the core benchmarks and compare them with the baseline."""
+    sizes = [int(size) for size in sizes.split(',')]
+    groups = None if groups is None else groups.split(',')
+    results = run(sizes, repeat, groups)
+
+    if output is not None:
+        results.write(output)
+    if save_baseline:
+        if osp.exists(baseline):
+            # Keep the baseline results of the benchmarks that were not run.
+            merged = load_results(baseline)
+            merged.update(results.results)
+            results.results = merged
+        results.write(baseline)
+    elif osp.exists(baseline):
+        regressions = print_comparison(
+            results.results, load_results(baseline), threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+Benchmarks of the latency of the user-facing actions of QWatson.
+
+The real widgets are driven with synthetic input events and each action is
+timed from the input event to the completion of the repaint it triggered.
+The benchmarks are run with the offscreen Qt platform, unless another
+platform is set with the QT_QPA_PLATFORM environment variable.
+"""
+
+# ---- Standard imports
+
+import itertools
+import json
+import os
+import os.path as osp
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+# ---- Third parties imports
+
+import arrow
+import click
+from PyQt5.QtCore import Qt, QEvent, QObject, QPoint, QPointF
+from PyQt5.QtGui import QWheelEvent
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QApplication, QWidget
+
+# ---- Local imports
+
+from benchmarks.harness import (
+    BASELINE_FILE, BenchmarkResults, load_results, print_comparison,
+    summarize)
+from benchmarks.synthetic import generate_frames
+from qwatson.mainwindow import QWatson
+from qwatson.utils.dates import qdatetime_from_str
+from qwatson.utils.fileio import delete_folder_recursively
+
+DEFAULT_SIZES = '1000,10000'
+
+# The latency budgets of the actions in milliseconds, that the 90th
+# percentile of the latency should not exceed on the history of
+# BUDGET_SIZE frames.
+BUDGET_SIZE = 1000
+BUDGETS = {'navigate_week': 100,
+           'toggle_project_filter': 100,
+           'commit_datetime_edit': 100,
+           'stop_watson': 100,
+           'open_overview': 250,
+           'scroll_overview': 16}
+
+
+class RepaintProbe(QObject):
+    """
+    An event filter that counts the paint events received by a widget
+    and its children.
+    """
+
+    def __init__(self, widget):
+        super(RepaintProbe, self).__init__()
+        self.widget = widget
+        self.paint_count = 0
+
+    def eventFilter(self, obj, event):
+        """Qt method override."""
+        if (event.type() == QEvent.Paint and isinstance(obj, QWidget) and
+                (obj is self.widget or self.widget.isAncestorOf(obj))):
+            self.paint_count += 1
+        return False
+
+
+def wait_for_repaint(app, probe, timeout=5):
+    """
+    Process the events until the widget of the probe was repainted and
+    there is no more event pending, and return whether a repaint
+    occurred before the timeout.
+    """
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        app.processEvents()
+        if probe.paint_count > 0 and not app.hasPendingEvents():
+            return True
+    return False
+
+
+def measure_latency(app, widget, action, repeat=20, setup=None):
+    """
+    Call action repeat times and return the statistics in milliseconds of
+    the time elapsed from the call to the completion of the repaint of the
+    widget. The action is expected to send an input event to a widget.
+    If provided, setup is called before each action and is not timed.
+    """
+    probe = RepaintProbe(widget)
+    app.installEventFilter(probe)
+    times = []
+    missed = 0
+    try:
+        for i in range(repeat):
+            if setup is not None:
+                setup()
+            wait_for_repaint(app, probe, timeout=0.5)
+            probe.paint_count = 0
+            t0 = time.perf_counter()
+            action()
+            if not wait_for_repaint(app, probe):
+                missed += 1
+            times.append(time.perf_counter() - t0)
+    finally:
+        app.removeEventFilter(probe)
+    stats = summarize(times)
+    stats['missed_repaints'] = missed
+    return stats
+
+
+def send_wheel_event(widget, delta):
+    """Send a vertical wheel event with the specified delta to widget."""
+    pos = QPointF(widget.width() / 2, widget.height() / 2)
+    event = QWheelEvent(pos, widget.mapToGlobal(pos.toPoint()),
+                        QPoint(0, 0), QPoint(0, delta), delta, Qt.Vertical,
+                        Qt.NoButton, Qt.NoModifier)
+    QApplication.sendEvent(widget, event)
+
+
+class GuiSession(object):
+    """A QWatson main window that runs on a synthetic history."""
+
+    def __init__(self, workdir, size):
+        self.size = size
+        self.config_dir = osp.join(workdir, str(size))
+        os.makedirs(self.config_dir)
+
+        with open(osp.join(self.config_dir, 'frames'), 'w') as f:
+            json.dump(generate_frames(size), f)
+
+        self.app = QApplication.instance()
+        self.qwatson = QWatson(config_dir=self.config_dir)
+        self.qwatson.show()
+        self.overview = self.qwatson.overview_widg
+        self.overview.resize(800, 500)
+
+        self.set_span('week')
+        self.overview.show()
+        self.app.processEvents()
+
+    def set_span(self, span):
+        """
+        Set the length of the date ranges of the overview and show the last
+        date range of the history, since the synthetic activities end
+        before the current date.
+        """
+        navigator = self.overview.date_range_nav
+        navigator.set_span(span)
+        navigator.home = navigator.current = (
+            self.qwatson.client.frames[-1].start.span(span))
+        navigator.setup_date_range_label()
+        self.overview.date_span_changed()
+
+    def close(self):
+        """Close the main window and its overview."""
+        if self.qwatson.client.is_started:
+            self.qwatson.cancel_watson()
+        self.qwatson.close()
+        self.qwatson.deleteLater()
+        self.app.processEvents()
+
+
+def bench_navigation(session, results, repeat):
+    """Benchmark the clicks on the previous and next week buttons."""
+    navigator = session.overview.date_range_nav
+    buttons = itertools.cycle([navigator.btn_prev, navigator.btn_next])
+    results.add('navigate_week', session.size, measure_latency(
+        session.app, session.overview,
+        lambda: QTest.mouseClick(next(buttons), Qt.LeftButton),
+        repeat))
+
+
+def bench_project_filter(session, results, repeat):
+    """Benchmark toggling a project in the projects filter menu."""
+    menu = session.overview.filter_btn.projects_menu
+    menu.popup(session.overview.filter_btn.mapToGlobal(QPoint(0, 0)))
+    session.app.processEvents()
+    view = menu.list_view
+    index = view.model().index(1, 0)
+    states = itertools.cycle([Qt.Unchecked, Qt.Checked])
+    results.add('toggle_project_filter', session.size, measure_latency(
+        session.app, session.overview.table_widg,
+        lambda: view.model().setData(index, next(states), Qt.CheckStateRole),
+        repeat))
+    menu.set_item_checked(index.data(), True)
+    menu.hide()
+
+
+def bench_datetime_edit(session, results, repeat):
+    """Benchmark committing an edit of a start time in the overview."""
+    table = next(table for table in session.overview.table_widg.tables
+                 if table.rowCount() > 0)
+    index = table.view.proxy_model.index(0, 0)
+    delegate = table.view.itemDelegate(index)
+    start = table.view.proxy_model.get_frame_from_index(index).start
+    dates = itertools.cycle([start.shift(minutes=-1), start])
+
+    def setup():
+        table.view.edit(index)
+        delegate.editor.setDateTime(qdatetime_from_str(
+            next(dates).format('YYYY-MM-DD HH:mm')))
+
+    results.add('commit_datetime_edit', session.size, measure_latency(
+        session.app, session.overview.table_widg,
+        lambda: QTest.keyClick(delegate.editor, Qt.Key_Enter),
+        repeat, setup=setup))
+
+
+def bench_stop_watson(session, results, repeat):
+    """Benchmark clicking on the stop button of the main window."""
+    qwatson = session.qwatson
+
+    def setup():
+        qwatson.start_watson(arrow.now())
+
+    results.add('stop_watson', session.size, measure_latency(
+        session.app, qwatson,
+        lambda: QTest.mouseClick(qwatson.stopwatch.buttons['stop'],
+                                 Qt.LeftButton),
+        repeat, setup=setup))
+
+
+def bench_open_overview(session, results, repeat):
+    """Benchmark opening the overview from the main window."""
+    results.add('open_overview', session.size, measure_latency(
+        session.app, session.overview,
+        lambda: QTest.mouseClick(session.qwatson.btn_report, Qt.LeftButton),
+        repeat, setup=session.overview.close))
+    session.overview.show()
+
+
+def bench_scrolling(session, results, repeat):
+    """Benchmark scrolling the tables of the overview with the wheel."""
+    scrollarea = session.overview.table_widg.scrollarea
+    deltas = itertools.cycle([-120, 120])
+    results.add('scroll_overview', session.size, measure_latency(
+        session.app, scrollarea,
+        lambda: send_wheel_event(scrollarea.viewport(), next(deltas)),
+        repeat))
+
+
+def bench_year_span(session, results, repeat):
+    """
+    Benchmark navigating the years of the overview and scrolling the
+    single table that shows the activities of a year.
+    """
+    navigator = session.overview.date_range_nav
+    session.set_span('year')
+    session.app.processEvents()
+    try:
+        buttons = itertools.cycle([navigator.btn_prev, navigator.btn_next])
+        results.add('navigate_year', session.size, measure_latency(
+            session.app, session.overview,
+            lambda: QTest.mouseClick(next(buttons), Qt.LeftButton),
+            repeat))
+
+        view = session.overview.span_table_widg.view
+        deltas = itertools.cycle([-120, 120])
+        results.add('scroll_year', session.size, measure_latency(
+            session.app, view,
+            lambda: send_wheel_event(view.viewport(), next(deltas)),
+            repeat))
+    finally:
+        session.set_span('week')
+
+
+BENCHMARKS = {'navigation': bench_navigation,
+              'filter': bench_project_filter,
+              'edit': bench_datetime_edit,
+              'stop': bench_stop_watson,
+              'overview': bench_open_overview,
+              'scroll': bench_scrolling,
+              'year': bench_year_span}
+
+
+def run(sizes, repeat=20, groups=None):
+    """
+    Run the gui benchmarks of the specified groups for each size of
+    synthetic history and return the BenchmarkResults.
+    """
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = BenchmarkResults()
+    workdir = tempfile.mkdtemp(prefix='qwatson_bench_gui_')
+    try:
+        for size in sizes:
+            session = GuiSession(workdir, size)
+            try:
+                for name, func in BENCHMARKS.items():
+                    if groups is None or name in groups:
+                        func(session, results, repeat)
+            finally:
+                session.close()
+    finally:
+        # The widgets deleted later must release the files of the workdir.
+        app.processEvents()
+        delete_folder_recursively(workdir)
+    return results
+
+
+def check_budgets(results, size, stat='p90'):
+    """
+    Return a list of (name, budget, latency) tuples for the actions whose
+    latency exceeded their budget for the specified history size.
+    """
+    over = []
+    for name, budget in sorted(BUDGETS.items()):
+        key = results.key(name, size)
+        if key in results.results and results.results[key][stat] > budget:
+            over.append((name, budget, results.results[key][stat]))
+    return over
+
+
+@click.command()
+@click.option('--sizes', default=DEFAULT_SIZES, show_default=True,
+              help="Comma separated numbers of synthetic frames.")
+@click.option('--repeat', default=20, show_default=True)
+@click.option('--groups', default=None,
+              help="Comma separated groups among: %s." %
+              ', '.join(BENCHMARKS))
+@click.option('--output', default=None, help="Where to write the results.")
+@click.option('--baseline', default=BASELINE_FILE, show_default=True)
+@click.option('--save-baseline', is_flag=True,
+              help="Write the results to the baseline file.")
+@click.option('--threshold', default=1.5, show_default=True,
+              help="The time ratio above which a result is a regression.")
+def cli(sizes, repeat, groups, output, baseline, save_baseline, threshold):
+    """Run the gui latency benchmarks and check their budgets."""
+    sizes = [int(size) for size in sizes.split(',')]
+    groups = None if groups is None else groups.split(',')
+    results = run(sizes, repeat, groups)
+
+    if output is not None:
+        results.write(output)
+
+    failed = False
+    for name, budget, latency in check_budgets(results, BUDGET_SIZE):
+        print('OVER BUDGET %s[%d]: p90 %.2f ms > %d ms' %
+              (name, BUDGET_SIZE, latency, budget))
+        failed = True
+
+    if save_baseline:
+        if osp.exists(baseline):
+            # Keep the baseline results of the benchmarks that were not run.
+            merged = load_results(baseline)
+            merged.update(results.results)
+            results.results = merged
+        results.write(baseline)
+    elif osp.exists(baseline):
+        failed |= bool(print_comparison(
+            results.results, load_results(baseline), threshold))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    cli()
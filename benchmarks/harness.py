@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+Utilities to time benchmarks, write their results as JSON and compare
+them against a stored baseline.
+"""
+
+# ---- Standard imports
+
+import datetime
+import gc
+import json
+import os.path as osp
+import platform
+import time
+
+
+BASELINE_FILE = osp.join(osp.dirname(__file__), 'baseline.json')
+
+
+def percentile(values, p):
+    """Return the p-th percentile of a sorted list of values."""
+    return values[min(len(values) - 1, int(round(p / 100 * len(values))))]
+
+
+def summarize(times):
+    """
+    Return a dict with the statistics in milliseconds of a list of
+    durations in seconds.
+    """
+    times = sorted(time * 1000 for time in times)
+    return {'count': len(times),
+            'min': times[0],
+            'mean': sum(times) / len(times),
+            'p50': percentile(times, 50),
+            'p90': percentile(times, 90),
+            'p99': percentile(times, 99),
+            'max': times[-1]}
+
+
+def measure(func, repeat=5, setup=None):
+    """
+    Call func repeat times and return the statistics of its execution
+    time in milliseconds. If provided, setup is called before each call
+    to func and is not included in the timing. The garbage collector is
+    disabled while func is running to reduce the noise in the results.
+    """
+    times = []
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        gc.disable()
+        try:
+            t0 = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - t0)
+        finally:
+            gc.enable()
+    return summarize(times)
+
+
+class BenchmarkResults(object):
+    """A collection of benchmark results keyed by name and size."""
+
+    def __init__(self):
+        self.results = {}
+
+    @staticmethod
+    def key(name, size):
+        return '%s[%d]' % (name, size)
+
+    def add(self, name, size, stats):
+        """Add the statistics of a benchmark and print a summary line."""
+        key = self.key(name, size)
+        self.results[key] = stats
+        print('%-45s p50 %10.2f ms   min %10.2f ms   (n=%d)' %
+              (key, stats['p50'], stats['min'], stats['count']))
+
+    def to_dict(self):
+        """Return the results with metadata about the environment."""
+        from PyQt5.QtCore import QT_VERSION_STR
+        import arrow
+        return {'meta': {'date': datetime.datetime.now().isoformat(),
+                         'python': platform.python_version(),
+                         'platform': platform.platform(),
+                         'qt': QT_VERSION_STR,
+                         'arrow': arrow.__version__},
+                'results': self.results}
+
+    def write(self, filename):
+        """Write the results as JSON to the specified file."""
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1, sort_keys=True)
+
+
+def load_results(filename):
+    """Load the results of a benchmark run from a JSON file."""
+    with open(filename) as f:
+        return json.load(f)['results']
+
+
+def compare(results, baseline, threshold=1.5, stat='p50'):
+    """
+    Compare the results of a benchmark run with a baseline and return a
+    list of (key, baseline, current, ratio) tuples for the benchmarks
+    whose time increased by more than the threshold ratio.
+
+    Benchmarks that are missing from either run are ignored, so that
+    baselines can be generated for a subset of the sizes only.
+    """
+    regressions = []
+    for key in sorted(set(results) & set(baseline)):
+        old = baseline[key][stat]
+        new = results[key][stat]
+        ratio = new / old if old > 0 else float('inf')
+        if ratio > threshold:
+            regressions.append((key, old, new, ratio))
+    return regressions
+
+
+def print_comparison(results, baseline, threshold=1.5, stat='p50'):
+    """
+    Print the comparison of the results with the baseline and return
+    the list of regressions.
+    """
+    print()
+    print('%-45s %12s %12s %8s' % ('benchmark', 'baseline', 'current',
+                                   'ratio'))
+    for key in sorted(set(results) & set(baseline)):
+        old = baseline[key][stat]
+        new = results[key][stat]
+        print('%-45s %9.2f ms %9.2f ms %7.2fx' %
+              (key, old, new, new / old if old > 0 else float('inf')))
+    regressions = compare(results, baseline, threshold, stat)
+    for key, old, new, ratio in regressions:
+        print('REGRESSION %s: %.2f ms -> %.2f ms (%.2fx)' %
+              (key, old, new, ratio))
+    return regressions
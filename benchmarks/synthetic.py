@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A deterministic generator of synthetic Watson histories.
+
+The frames are generated with a random generator seeded with a fixed value,
+so that the same history is produced on every machine. Projects and tags
+follow a Zipf-like distribution, as in real histories where a few projects
+and tags account for most of the activities.
+"""
+
+# ---- Standard imports
+
+import calendar
+import datetime
+import json
+import os
+import os.path as osp
+import random
+
+# ---- Third parties imports
+
+import click
+
+
+SIZES = (1000, 100000, 1000000)
+END_DATE = datetime.datetime(2018, 7, 30)
+PROJECT_COUNT = 40
+TAG_COUNT = 60
+WORDS = ('meeting', 'review', 'fix', 'report', 'design', 'call', 'test',
+         'refactor', 'planning', 'support', 'docs', 'field', 'analysis')
+
+
+def zipf_weights(count, exponent=1.1):
+    """Return count decreasing weights that follow a Zipf distribution."""
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def generate_frames(size, seed=0, end=END_DATE):
+    """
+    Generate size frames that end before the specified naive UTC datetime
+    and return them as a list of dumped frames sorted by start time,
+    in the format that is written by Watson in the frames file.
+    """
+    rng = random.Random(seed)
+    projects = ['project%02d' % i for i in range(PROJECT_COUNT)]
+    project_weights = zipf_weights(PROJECT_COUNT)
+    tags = ['tag%02d' % i for i in range(TAG_COUNT)]
+    tag_weights = zipf_weights(TAG_COUNT)
+
+    # We spread the activities over at most ten years of working days,
+    # with roughly 8 activities per day for the smaller histories.
+    days = min(max(size // 8, 1), 3650)
+    per_day = max(size // days, 1)
+    day_length = 10 * 3600
+    end_ts = calendar.timegm(end.timetuple())
+    first_day_ts = end_ts - (days + days // 2) * 86400
+
+    frames = []
+    day_ts = first_day_ts
+    while len(frames) < size:
+        weekday = datetime.datetime.utcfromtimestamp(day_ts).weekday()
+        if weekday < 5:
+            count = min(per_day + rng.randint(0, 1), size - len(frames))
+            slot = day_length // (count + 1)
+            start = day_ts + 8 * 3600
+            for i in range(count):
+                start += rng.randint(0, max(slot // 4, 1))
+                duration = rng.randint(max(slot // 4, 1), max(slot, 2))
+                stop = start + duration
+                frame_tags = rng.choices(
+                    tags, tag_weights, k=rng.choice((0, 1, 1, 2, 2, 3)))
+                message = (' '.join(rng.sample(WORDS, rng.randint(1, 4)))
+                           if rng.random() < 0.6 else None)
+                frames.append([
+                    start, stop,
+                    rng.choices(projects, project_weights)[0],
+                    '%032x' % rng.getrandbits(128),
+                    sorted(set(frame_tags)),
+                    stop + rng.randint(0, 3600),
+                    message])
+                start = stop
+        day_ts += 86400
+    return frames
+
+
+def write_frames_file(config_dir, size, seed=0, end=END_DATE):
+    """
+    Write a frames file with size synthetic frames in config_dir and
+    return the path of the file.
+    """
+    if not osp.exists(config_dir):
+        os.makedirs(config_dir)
+    filename = osp.join(config_dir, 'frames')
+    with open(filename, 'w') as f:
+        json.dump(generate_frames(size, seed, end), f)
+    return filename
+
+
+@click.command()
+@click.argument('config_dir')
+@click.option('--size', default=SIZES[0], show_default=True)
+@click.option('--seed', default=0, show_default=True)
+def cli(config_dir, size, seed):
+    """Write a synthetic Watson frames file in CONFIG_DIR."""
+    click.echo(write_frames_file(config_dir, size, seed))
+
+
+if __name__ == '__main__':
+    cli()
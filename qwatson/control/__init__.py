@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+"""
+A local socket protocol to drive a running QWatson instance from scripts,
+editor plugins and shell hooks.
+"""
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A small Qt free client to send commands to a running QWatson instance.
+
+Usage example from a shell hook :
+
+    python -m qwatson.control.client start --project qwatson --tags dev
+    python -m qwatson.control.client current-project --project qwatson
+    python -m qwatson.control.client stop
+    python -m qwatson.control.client bench --count 5000
+"""
+
+# ---- Standard imports
+
+import json
+import os
+import socket
+import time
+
+# ---- Third parties imports
+
+import click
+
+# ---- Local imports
+
+from qwatson.control.protocol import (
+    ControlError, decode_message, encode_message, get_socket_path)
+
+# The prefix of the named pipes on which the QLocalServer listens on
+# Windows, where local sockets are not available.
+PIPE_PREFIX = '\\\\.\\pipe\\'
+
+
+def get_pipe_path(path):
+    """
+    Return the path of the named pipe on which QLocalServer listens for the
+    specified server name on Windows.
+    """
+    return path if path.startswith(PIPE_PREFIX) else PIPE_PREFIX + path
+
+
+class PipeConnection(object):
+    """
+    A connection to a named pipe on Windows that provides the subset of
+    the socket methods used by the ControlClient.
+    """
+
+    def __init__(self, path):
+        self._pipe = open(get_pipe_path(path), 'r+b', buffering=0)
+
+    def sendall(self, data):
+        self._pipe.write(data)
+
+    def recv(self, size):
+        return self._pipe.read(size)
+
+    def close(self):
+        self._pipe.close()
+
+
+class ControlClient(object):
+    """
+    A client that keeps a connection open to the control socket of a
+    running QWatson instance.
+    """
+
+    def __init__(self, path=None, timeout=5):
+        self.path = path or get_socket_path()
+        self.timeout = timeout
+        self._socket = None
+        self._buffer = b''
+        self._next_id = 0
+
+    def connect(self):
+        """Connect to the control socket of QWatson."""
+        if self._socket is not None:
+            return
+        if os.name == 'nt':
+            # The timeout does not apply to the named pipes.
+            self._socket = PipeConnection(self.path)
+            return
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(self.timeout)
+        try:
+            self._socket.connect(self.path)
+        except OSError:
+            self._socket.close()
+            self._socket = None
+            raise
+
+    def close(self):
+        """Close the connection with QWatson."""
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+            self._buffer = b''
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def request(self, cmd, **params):
+        """
+        Send the command with the specified parameters to QWatson and
+        return the response. A ControlError is raised if the command failed.
+        """
+        self.connect()
+        self._next_id += 1
+        params.update({'cmd': cmd, 'id': self._next_id})
+        self._socket.sendall(encode_message(params))
+
+        while b'\n' not in self._buffer:
+            chunk = self._socket.recv(65536)
+            if not chunk:
+                self.close()
+                raise ControlError("Connection closed by QWatson.")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b'\n', 1)
+
+        response = decode_message(line)
+        if not response.pop('ok', False):
+            raise ControlError(response.get('error', 'Unknown error'))
+        response.pop('id', None)
+        return response
+
+
+def benchmark(client, cmd='status', count=1000, **params):
+    """
+    Send the same command count times to QWatson over a single connection
+    and return a dict with the round trip time statistics in milliseconds.
+    """
+    client.request(cmd, **params)
+
+    times = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        client.request(cmd, **params)
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+
+    def percentile(p):
+        return times[min(len(times) - 1, int(round(p / 100 * len(times))))]
+
+    return {'cmd': cmd, 'count': count,
+            'min': times[0], 'mean': sum(times) / count,
+            'p50': percentile(50), 'p90': percentile(90),
+            'p99': percentile(99), 'max': times[-1]}
+
+
+# ---- Command line interface
+
+@click.group()
+@click.option('--socket', 'path', default=None,
+              help="Path of the control socket of QWatson.")
+@click.pass_context
+def cli(ctx, path):
+    """Send commands to a running QWatson instance."""
+    ctx.obj = ControlClient(path)
+
+
+def _send(client, cmd, **params):
+    try:
+        response = client.request(cmd, **params)
+    except (ControlError, OSError) as e:
+        raise click.ClickException(str(e))
+    click.echo(json.dumps(response, indent=1, ensure_ascii=False))
+
+
+@cli.command()
+@click.option('--project', default=None)
+@click.option('--tags', default=None, help="Comma separated tags.")
+@click.option('--message', default=None)
+@click.pass_obj
+def start(client, project, tags, message):
+    """Start tracking a new activity."""
+    params = {'project': project, 'message': message}
+    if tags is not None:
+        params['tags'] = [tag.strip() for tag in tags.split(',')]
+    _send(client, 'start', **{k: v for k, v in params.items()
+                              if v is not None})
+
+
+@cli.command()
+@click.option('--message', default=None)
+@click.pass_obj
+def stop(client, message):
+    """Stop tracking the current activity and save it."""
+    _send(client, 'stop', **({} if message is None else
+                             {'message': message}))
+
+
+@cli.command()
+@click.pass_obj
+def cancel(client):
+    """Cancel the current activity."""
+    _send(client, 'cancel')
+
+
+@cli.command()
+@click.pass_obj
+def status(client):
+    """Show the status of the current activity."""
+    _send(client, 'status')
+
+
+@cli.command('current-project')
+@click.option('--project', default=None,
+              help="The project to select in QWatson.")
+@click.pass_obj
+def current_project(client, project):
+    """Show or set the project selected in QWatson."""
+    _send(client, 'current-project', **({} if project is None else
+                                        {'project': project}))
+
+
+@cli.command()
+@click.pass_obj
+def sync(client):
+    """Sync the activities with the sync server."""
+    _send(client, 'sync')
+
+
+@cli.command()
+@click.option('--limit', default=10, show_default=True)
+@click.pass_obj
+def frames(client, limit):
+    """Show the last logged activities."""
+    _send(client, 'frames', limit=limit)
+
+
+@cli.command()
+@click.option('--cmd', default='status', show_default=True)
+@click.option('--count', default=1000, show_default=True)
+@click.pass_obj
+def bench(client, cmd, count):
+    """Measure the round trip time of a command."""
+    try:
+        stats = benchmark(client, cmd, count)
+    except (ControlError, OSError) as e:
+        raise click.ClickException(str(e))
+    click.echo(json.dumps(stats, indent=1))
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+The wire format shared by the control server and its clients.
+
+Each request and each response is a single JSON object encoded in UTF-8 and
+terminated by a newline. A request holds the name of the command under
+the 'cmd' key and its parameters under any other keys. The response always
+holds an 'ok' key and, when the command failed, an 'error' message. An 'id'
+key sent with a request is echoed back unchanged in the response.
+"""
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import json
+
+# ---- Third parties imports
+
+import click
+
+SOCKET_NAME = 'control.sock'
+
+
+class ControlError(Exception):
+    """An error returned by the control server for a given request."""
+    pass
+
+
+def get_socket_path(config_dir=None):
+    """
+    Return the path of the control socket of the QWatson instance that
+    uses the specified config dir.
+    """
+    if os.environ.get('QWATSON_SOCKET'):
+        return os.environ['QWATSON_SOCKET']
+    config_dir = (config_dir or
+                  os.environ.get('QWATSON_DIR') or
+                  click.get_app_dir('QWatson'))
+    return osp.join(config_dir, SOCKET_NAME)
+
+
+def encode_message(message):
+    """Encode a message dict as a newline terminated JSON line."""
+    return (json.dumps(message, ensure_ascii=False,
+                       separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def decode_message(line):
+    """Decode a JSON line into a message dict."""
+    message = json.loads(line.decode('utf-8') if
+                         isinstance(line, bytes) else line)
+    if not isinstance(message, dict):
+        raise ValueError("A message must be a JSON object.")
+    return message
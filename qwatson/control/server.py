@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os.path as osp
+
+# ---- Third parties imports
+
+from PyQt5.QtCore import pyqtSignal as QSignal
+from PyQt5.QtCore import QObject
+from PyQt5.QtNetwork import QLocalServer
+
+# ---- Local imports
+
+from qwatson.control.protocol import (
+    ControlError, decode_message, encode_message)
+
+
+class ControlServer(QObject):
+    """
+    A local socket server that dispatches the JSON line requests it receives
+    to the handlers registered for each command and writes back the result.
+    The sig_listen_failed signal is sent with the error when the server
+    can't listen on its socket path.
+
+    The server lives in the Qt event loop of the main window, so that the
+    handlers can work directly with the in-memory Watson client and the gui
+    without any locking.
+    """
+    sig_request_handled = QSignal(str)
+    sig_listen_failed = QSignal(str)
+
+    def __init__(self, parent=None):
+        super(ControlServer, self).__init__(parent)
+        self._handlers = {}
+        self._buffers = {}
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self._handle_new_connection)
+
+    def register(self, cmd, handler):
+        """
+        Register the handler to call for the specified command. The handler
+        is called with the parameters of the request as keyword arguments
+        and must return a JSON serializable dict.
+        """
+        self._handlers[cmd] = handler
+
+    def listen(self, path):
+        """
+        Start listening for connections on the specified socket path and
+        return whether it succeeded, else send the sig_listen_failed signal.
+        """
+        # Remove any socket file left behind by a previous session that
+        # was not closed correctly.
+        QLocalServer.removeServer(path)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        if not self.server.listen(path):
+            self.sig_listen_failed.emit("Unable to listen on %s: %s" %
+                                        (path, self.server.errorString()))
+            return False
+        return True
+
+    def isListening(self):
+        """Return whether the server is listening for connections."""
+        return self.server.isListening()
+
+    def fullServerName(self):
+        """Return the full path of the socket the server is listening to."""
+        return self.server.fullServerName()
+
+    def close(self):
+        """Stop listening and disconnect all clients."""
+        for socket in list(self._buffers):
+            socket.disconnectFromServer()
+        self._buffers = {}
+        path = self.server.fullServerName()
+        self.server.close()
+        if path and osp.exists(path):
+            QLocalServer.removeServer(path)
+
+    # ---- Connection handlers
+
+    def _handle_new_connection(self):
+        """Setup the sockets of the pending connections."""
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self._buffers[socket] = b''
+            socket.readyRead.connect(
+                lambda socket=socket: self._handle_ready_read(socket))
+            socket.disconnected.connect(
+                lambda socket=socket: self._handle_disconnected(socket))
+
+    def _handle_disconnected(self, socket):
+        """Forget the socket of a client that disconnected."""
+        self._buffers.pop(socket, None)
+        socket.deleteLater()
+
+    def _handle_ready_read(self, socket):
+        """Process all the complete lines available on the socket."""
+        buffer = self._buffers.get(socket, b'') + bytes(socket.readAll())
+        *lines, buffer = buffer.split(b'\n')
+        self._buffers[socket] = buffer
+        for line in lines:
+            if line.strip():
+                socket.write(encode_message(self.handle_request(line)))
+        socket.flush()
+
+    def handle_request(self, line):
+        """
+        Decode the request, call the handler registered for its command and
+        return the response message.
+        """
+        try:
+            request = decode_message(line)
+        except ValueError as e:
+            return {'ok': False, 'error': "Invalid request: %s" % e}
+
+        cmd = request.pop('cmd', None)
+        req_id = request.pop('id', None)
+        try:
+            handler = self._handlers[cmd]
+        except KeyError:
+            response = {'ok': False, 'error': "Unknown command: %s" % cmd}
+        else:
+            try:
+                response = {'ok': True}
+                response.update(handler(**request) or {})
+            except (ControlError, TypeError, ValueError) as e:
+                response = {'ok': False, 'error': str(e)}
+        if req_id is not None:
+            response['id'] = req_id
+        self.sig_request_handled.emit(str(cmd))
+        return response
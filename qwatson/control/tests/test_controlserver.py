@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import json
+from threading import Thread
+
+# ---- Third party imports
+
+from click.testing import CliRunner
+from PyQt5.QtWidgets import QMessageBox
+import pytest
+
+# ---- Local imports
+
+from qwatson.mainwindow import QWatson
+from qwatson.control.client import (
+    ControlClient, benchmark, cli, get_pipe_path)
+from qwatson.control.protocol import ControlError
+from qwatson.utils.dates import local_arrow_from_tuple
+
+
+# ---- Fixtures and utilities
+
+
+@pytest.fixture(scope="module")
+def now():
+    return local_arrow_from_tuple((2018, 7, 30, 7, 23, 44))
+
+
+@pytest.fixture
+def appdir(tmpdir):
+    appdir = osp.join(str(tmpdir), 'appdir')
+    os.makedirs(appdir)
+    with open(osp.join(appdir, 'frames'), 'w') as f:
+        f.write(json.dumps([]))
+    return appdir
+
+
+@pytest.fixture
+def qwatson(qtbot, mocker, appdir, now):
+    mocker.patch('arrow.now', return_value=now)
+    qwatson = QWatson(config_dir=appdir)
+    qtbot.addWidget(qwatson)
+    yield qwatson
+    qwatson.control_server.close()
+
+
+@pytest.fixture
+def send(qwatson, qtbot):
+    """
+    Return a function to send a request to the control server from a
+    separate thread while the Qt event loop is processing events.
+    """
+    client = ControlClient(qwatson.control_server.fullServerName())
+
+    def _send(func, *args, **kwargs):
+        result = {}
+
+        def target():
+            try:
+                result['value'] = func(client, *args, **kwargs)
+            except Exception as e:
+                result['error'] = e
+
+        thread = Thread(target=target)
+        thread.start()
+        qtbot.waitUntil(lambda: not thread.is_alive())
+        if 'error' in result:
+            raise result['error']
+        return result['value']
+
+    yield _send
+    client.close()
+
+
+# ---- Tests
+
+
+def test_start_stop_through_socket(qwatson, send):
+    """Test starting and stopping an activity through the control socket."""
+    assert qwatson.control_server.isListening()
+
+    status = send(ControlClient.request, 'status')
+    assert status == {'started': False, 'project': '', 'tags': [],
+                      'message': ''}
+
+    status = send(ControlClient.request, 'start', project='p1',
+                  tags=['tag2', 'tag1'], message='from a hook')
+    assert status['started'] is True
+    assert status['project'] == 'p1'
+    assert status['tags'] == ['tag1', 'tag2']
+    assert qwatson.client.is_started
+    assert qwatson.stopwatch.isRunning()
+
+    with pytest.raises(ControlError):
+        send(ControlClient.request, 'start')
+
+    response = send(ControlClient.request, 'stop')
+    assert not qwatson.client.is_started
+    assert len(qwatson.client.frames) == 1
+    assert qwatson.model.rowCount() == 1
+    assert response['frame']['project'] == 'p1'
+    assert response['frame']['message'] == 'from a hook'
+    assert response['frame']['tags'] == ['tag1', 'tag2']
+
+    frames = send(ControlClient.request, 'frames', limit=10)['frames']
+    assert [frame['id'] for frame in frames] == [qwatson.client.frames[0].id]
+
+
+def test_cancel_and_current_project(qwatson, send):
+    """Test cancelling and changing the current project via the socket."""
+    with pytest.raises(ControlError):
+        send(ControlClient.request, 'cancel')
+
+    response = send(ControlClient.request, 'current-project', project='p2')
+    assert response == {'project': 'p2'}
+    assert qwatson.currentProject() == 'p2'
+    assert 'p2' in qwatson.client.projects
+
+    send(ControlClient.request, 'start')
+    assert qwatson.client.is_started
+    send(ControlClient.request, 'cancel')
+    assert not qwatson.client.is_started
+    assert len(qwatson.client.frames) == 0
+
+    # The current project can also be set with the command line client.
+    path = qwatson.control_server.fullServerName()
+    result = send(lambda client: CliRunner().invoke(
+        cli, ['--socket', path, 'current-project', '--project', 'p3']))
+    assert result.exit_code == 0
+    assert json.loads(result.output) == {'project': 'p3'}
+    assert qwatson.currentProject() == 'p3'
+
+
+def test_pipe_path():
+    """Test the path of the named pipes that are used on Windows."""
+    assert get_pipe_path('C:\\qwatson\\control.sock') == (
+        '\\\\.\\pipe\\C:\\qwatson\\control.sock')
+    assert get_pipe_path('\\\\.\\pipe\\qwatson') == '\\\\.\\pipe\\qwatson'
+
+
+def test_invalid_requests(qwatson, send):
+    """Test that invalid requests are answered with an error message."""
+    with pytest.raises(ControlError) as e:
+        send(ControlClient.request, 'unknown')
+    assert 'Unknown command' in str(e.value)
+
+    with pytest.raises(ControlError):
+        send(ControlClient.request, 'status', unexpected=True)
+
+    response = qwatson.control_server.handle_request(b'{not json')
+    assert response['ok'] is False
+
+
+def test_listen_failed(qwatson, qtbot, tmpdir):
+    """
+    Test that a failure to listen on the socket path is reported to the
+    main window.
+    """
+    qwatson.control_server.close()
+    path = osp.join(str(tmpdir), 'missing', 'control.sock')
+    with qtbot.waitSignal(qwatson.control_server.sig_listen_failed) as blocker:
+        assert not qwatson.control_server.listen(path)
+    assert path in blocker.args[0]
+    msgboxes = [msgbox for msgbox in qwatson.findChildren(QMessageBox) if
+                msgbox.isVisible()]
+    assert len(msgboxes) == 1
+    assert path in msgboxes[0].text()
+    msgboxes[0].close()
+
+
+def test_benchmark_client(qwatson, send):
+    """Test that the benchmark client returns sensible statistics."""
+    stats = send(benchmark, 'status', 50)
+    assert stats['count'] == 50
+    assert 0 < stats['min'] <= stats['p50'] <= stats['p99'] <= stats['max']
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
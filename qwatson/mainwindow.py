@@ -19,31 +19,42 @@ import json
 
 import click
 import arrow
-from PyQt5.QtCore import Qt, QModelIndex
+from PyQt5.QtCore import Qt, QModelIndex, QTimer
+from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import (QApplication, QGridLayout, QLabel, QLineEdit,
-                             QSizePolicy, QWidget, QStackedWidget, QVBoxLayout)
+                             QMessageBox, QProgressDialog, QShortcut,
+                             QSizePolicy, QWidget, QStackedWidget,
+                             QVBoxLayout)
 
 # ---- Local imports
 
-from qwatson.utils import icons
+from qwatson.utils import icons, instrumentation
 from qwatson.widgets.tags import TagLineEdit
 from qwatson.watson_ext.watsonextends import Watson
 from qwatson.watson_ext.watsonhelpers import (
-    round_frame_at, reset_watson, get_frame_nbr_for_project)
+    round_frame_at, reset_watson, get_frame_nbr_for_project, frame_to_dict)
 from qwatson.widgets.projects import ProjectManager
 from qwatson.widgets.clock import StopWatchWidget
+from qwatson.widgets.diagnostics import DiagnosticsWidget
 from qwatson.widgets.tableviews import ActivityOverviewWidget
 from qwatson.widgets.toolbar import (QToolButtonSmall, DropDownToolButton,
                                      ToolBarWidget)
 from qwatson import __namever__
 from qwatson.models.tablemodels import WatsonTableModel
+from qwatson.models.filewatcher import WatsonFileWatcher
+from qwatson.models.syncworker import SyncWorker
 from qwatson.dialogs import (ImportDialog, DateTimeInputDialog, CloseDialog,
                              DelProjectDialog, MergeProjectDialog)
 from qwatson.widgets.layout import ColoredFrame
+from qwatson.control.protocol import ControlError, get_socket_path
+from qwatson.control.server import ControlServer
 
 ROUNDMIN = {'round to 1min': 1, 'round to 5min': 5, 'round to 10min': 10}
 STARTFROM = {'start from now': 'now', 'start from last': 'last',
              'start from other': 'other'}
+SYNC_TOOLTIP = ("<b>Sync</b><br><br>"
+                "Sync the activities with the Watson sync server set in "
+                "the backend url and token of the config.")
 
 
 class QWatsonProjectMixin(object):
@@ -101,12 +112,12 @@ class QWatsonProjectMixin(object):
             return
 
         if force is True:
-            self.model.beginResetModel()
-            self.project_manager.model.beginResetModel()
-            self.client.rename_project(old_name, new_name)
-            self.model.endResetModel()
-            self.project_manager.model.endResetModel()
-            self.project_manager.setCurrentProject(new_name)
+            renamed = self.run_project_operation(
+                'Renaming project "%s"...' % old_name,
+                self.model.rename_project, old_name, new_name)
+            self.project_manager.model.refresh()
+            self.project_manager.setCurrentProject(
+                new_name if renamed else old_name)
         elif force is False:
             na_old = get_frame_nbr_for_project(self.client, old_name)
             na_new = get_frame_nbr_for_project(self.client, new_name)
@@ -123,9 +134,8 @@ class QWatsonProjectMixin(object):
     def add_new_project(self, project):
         """Add the new project to the database."""
         if project not in self.client.projects:
-            self.project_manager.model.beginResetModel()
             self.client.add_project(project)
-            self.project_manager.model.endResetModel()
+            self.project_manager.model.refresh()
         self.project_manager.setCurrentProject(project)
 
     def del_project(self, project, force=False):
@@ -142,15 +152,36 @@ class QWatsonProjectMixin(object):
         elif force is True and project in self.client.projects:
             index = self.project_manager.currentProjectIndex()
 
-            self.model.beginResetModel()
-            self.project_manager.model.beginResetModel()
-            self.client.delete_project(project)
-            self.model.endResetModel()
-            self.project_manager.model.endResetModel()
+            deleted = self.run_project_operation(
+                'Deleting project "%s"...' % project,
+                self.model.delete_project, project)
+            if not deleted:
+                return
+            self.project_manager.model.refresh()
 
             index = min(index, len(self.client.projects)-1)
             self.project_manager.setCurrentProjectIndex(index)
 
+    def run_project_operation(self, label, operation, *args):
+        """
+        Run the operation on a project with a progress dialog that is shown
+        when the operation takes a while and that can be used to cancel it.
+        Return the result of the operation.
+        """
+        dialog = QProgressDialog(label, 'Cancel', 0, 0, self)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(500)
+
+        def progress(done, total):
+            dialog.setMaximum(total)
+            dialog.setValue(done)
+            return dialog.wasCanceled()
+
+        try:
+            return operation(*args, progress=progress)
+        finally:
+            dialog.deleteLater()
+
 
 class QWatsonImportMixin(object):
     """
@@ -179,19 +210,24 @@ class QWatsonImportMixin(object):
 
     def import_data_from_watson(self):
         """
-        Copy the relevant resources files from the watson application folder
-        to that of QWatson.
+        Merge the frames of the watson application folder into those of
+        QWatson and copy the other resources files of watson that QWatson
+        does not have yet.
         """
         if not osp.exists(self.client._dir):
             os.makedirs(self.client._dir)
 
-        filenames = ['frames', 'frames.bak', 'last_sync', 'state', 'state.bak']
         watson_dir = (os.environ.get('WATSON_DIR') or
                       click.get_app_dir('watson'))
-        for filename in filenames:
-            if osp.exists(osp.join(watson_dir, filename)):
+        for filename in ['last_sync', 'state']:
+            if (osp.exists(osp.join(watson_dir, filename)) and
+                    not osp.exists(osp.join(self.client._dir, filename))):
                 shutil.copyfile(osp.join(watson_dir, filename),
                                 osp.join(self.client._dir, filename))
+        self.client.import_frames(watson_dir)
+        self.client.save()
+        if not osp.exists(self.client.frames_file):
+            self.create_empty_frames_file()
         self.reset_model_and_gui()
 
     def create_empty_frames_file(self):
@@ -216,6 +252,93 @@ class QWatsonImportMixin(object):
         self.model.modelReset.emit()
         self.set_settings_from_index(-1)
 
+    def setup_file_watcher(self):
+        """
+        Setup the watcher that reloads the frames when they are modified
+        by another process, such as the watson CLI or a sync tool.
+        """
+        self.file_watcher = WatsonFileWatcher(self.client, parent=self)
+        self.file_watcher.sig_frames_reloaded.connect(
+            self.frames_file_changed)
+        self.file_watcher.sig_reload_failed.connect(
+            self.frames_file_reload_failed)
+        self.client.on_frames_merged = self.frames_merged
+
+    def frames_file_changed(self, frames):
+        """
+        Apply the changes made to the frames file by another process to the
+        client and the models without resetting them.
+        """
+        self.model.reload_frames(frames)
+        self.client.set_frames_synced(self.file_watcher.signature)
+        self.update_projects()
+
+    def frames_file_reload_failed(self, error):
+        """
+        Warn that the changes made to the frames file by another process
+        could not be applied.
+        """
+        self.show_warning(
+            "The changes made to the activities by another program could "
+            "not be loaded.<br><br>%s" % error)
+
+    def update_projects(self):
+        """
+        Reload the projects of the client and update the project manager
+        if they changed.
+        """
+        projects = list(self.client.projects)
+        self.client._projects = None
+        if self.client.projects != projects:
+            current_project = self.currentProject()
+            self.project_manager.model.refresh()
+            self.project_manager.setCurrentProject(current_project)
+
+    def frames_merged(self, report):
+        """
+        Handle when the frames were merged with the changes written to the
+        frames file by another process while the client was saving.
+        """
+        # The frames are merged while a model operation may be in progress,
+        # so the reset of the model is delayed until it is completed.
+        QTimer.singleShot(0, self.reset_model_after_merge)
+
+    def reset_model_after_merge(self):
+        """Reset the table model after the frames were merged."""
+        self.model.beginResetModel()
+        self.model.endResetModel()
+        self.file_watcher.set_signature(self.client.frames_signature)
+
+    def setup_sync(self):
+        """
+        Setup the worker that syncs the frames with the sync server set in
+        the config of the client in a background thread.
+        """
+        self.sync_worker = SyncWorker(self.model, parent=self)
+        self.sync_worker.sig_sync_finished.connect(self.frames_synced)
+        self.sync_worker.sig_sync_failed.connect(self.sync_failed)
+
+    def start_sync(self):
+        """Start a sync of the frames and return whether it was started."""
+        self.btn_sync.setEnabled(False)
+        started = self.sync_worker.start()
+        self.btn_sync.setEnabled(not started)
+        return started
+
+    def frames_synced(self, report):
+        """Handle when the frames were synced with the sync server."""
+        self.btn_sync.setEnabled(True)
+        self.file_watcher.set_signature(self.client.frames_signature)
+        self.update_projects()
+        self.btn_sync.setToolTip(
+            SYNC_TOOLTIP + "<br><br>Last sync: %d pushed, %d pulled, "
+            "%d added and %d updated." % report)
+
+    def sync_failed(self, error):
+        """Handle when the frames could not be synced."""
+        self.btn_sync.setEnabled(True)
+        self.btn_sync.setToolTip(SYNC_TOOLTIP + "<br><br>%s" % error)
+
 
 class QWatsonActivityMixin(object):
     """
@@ -228,6 +351,7 @@ class QWatsonActivityMixin(object):
         self.overview_widg = ActivityOverviewWidget(self.model)
         self.overview_widg.sig_add_activity.connect(self.add_new_activity)
         self.overview_widg.sig_del_activity.connect(self.del_activity_at)
+        self.overview_widg.sig_del_activities.connect(self.del_activities_at)
         self.overview_widg.sig_load_settings.connect(
             self.set_settings_from_index)
 
@@ -247,14 +371,137 @@ class QWatsonActivityMixin(object):
         """
         Delete the activity located at the specified index from the database.
         """
-        self.model.beginRemoveRows(QModelIndex(), frame_index, frame_index)
-        del self.client.frames[frame_index]
-        self.client.save()
-        self.model.endRemoveRows()
+        self.model.remove_frames([frame_index])
+
+    def del_activities_at(self, frame_indexes):
+        """
+        Delete the activities located at the specified indexes from the
+        database in a single batch.
+        """
+        self.model.remove_frames(frame_indexes)
+
+
+class QWatsonControlMixin(object):
+    """
+    A mixin for the main QWatson class with the necessary methods to handle
+    the commands received through the local control socket.
+    """
+
+    def setup_control_server(self):
+        """
+        Setup the local socket server used by scripts and editor plugins
+        to drive QWatson without going through the gui.
+        """
+        self.control_server = ControlServer(self)
+        self.control_server.register('start', self.control_start)
+        self.control_server.register('stop', self.control_stop)
+        self.control_server.register('cancel', self.control_cancel)
+        self.control_server.register('status', self.control_status)
+        self.control_server.register(
+            'current-project', self.control_current_project)
+        self.control_server.register('frames', self.control_frames)
+        self.control_server.register('sync', self.control_sync)
+        self.control_server.sig_listen_failed.connect(
+            self.control_server_failed)
+        self.control_server.listen(get_socket_path(self.client._dir))
+
+    def control_server_failed(self, error):
+        """
+        Warn that QWatson can't be driven through the control socket
+        because the server can't listen on it.
+        """
+        self.show_warning(
+            "QWatson can't be controlled from scripts and plugins.<br><br>"
+            "%s" % error)
+
+    def control_start(self, project=None, tags=None, message=None):
+        """
+        Start monitoring a new activity from now with the specified project,
+        tags and comment, or with those currently set in the mainwindow.
+        """
+        if self.client.is_started:
+            raise ControlError("Project %s is already started." %
+                               self.client.current['project'])
+        if project is not None:
+            self.add_new_project(project)
+        if tags is not None:
+            self.tag_manager.set_tags(tags)
+        if message is not None:
+            self.comment_manager.setText(message)
+        self.start_watson(arrow.now())
+        return self.control_status()
+
+    def control_stop(self, message=None, project=None, tags=None):
+        """
+        Stop monitoring the current activity and return the frame that was
+        added to the database.
+        """
+        if not self.client.is_started:
+            raise ControlError("No project started.")
+        if project is not None:
+            self.add_new_project(project)
+        self.stop_watson(message=message, project=project, tags=tags)
+        return {'frame': frame_to_dict(self.client.frames[-1])}
+
+    def control_cancel(self):
+        """Cancel the activity that is currently being monitored."""
+        if not self.client.is_started:
+            raise ControlError("No project started.")
+        self.cancel_watson()
+        return {}
+
+    def control_status(self):
+        """
+        Return whether an activity is being monitored and the project, tags,
+        and comment that will be saved with it.
+        """
+        status = {'started': self.client.is_started,
+                  'project': self.currentProject(),
+                  'tags': self.tag_manager.tags,
+                  'message': self.comment_manager.text()}
+        if self.client.is_started:
+            start = self.client.current['start']
+            status['start'] = start.timestamp
+            status['elapsed'] = (arrow.now() - start).total_seconds()
+        return status
+
+    def control_current_project(self, project=None):
+        """
+        Return the project currently selected in the mainwindow after
+        setting it to the specified project if any.
+        """
+        if project is not None:
+            self.add_new_project(project)
+        return {'project': self.currentProject()}
+
+    def control_sync(self):
+        """Start a sync of the frames with the sync server."""
+        if not self.start_sync():
+            raise ControlError("Unable to start the sync.")
+        return {}
+
+    def control_frames(self, start=None, stop=None, project=None, limit=None):
+        """
+        Return the last frames, up to limit, that started between
+        the start and stop timestamps and that are in the specified project.
+        """
+        frames = []
+        for frame in reversed(self.client.frames):
+            if limit is not None and len(frames) >= limit:
+                break
+            timestamp = frame.start.timestamp
+            if start is not None and timestamp < start:
+                continue
+            if stop is not None and timestamp > stop:
+                continue
+            if project is not None and frame.project != project:
+                continue
+            frames.append(frame_to_dict(frame))
+        return {'frames': frames[::-1]}
 
 
 class QWatson(QWidget, QWatsonImportMixin, QWatsonProjectMixin,
-              QWatsonActivityMixin):
+              QWatsonActivityMixin, QWatsonControlMixin):
 
     def __init__(self, config_dir=None, parent=None):
         super(QWatson, self).__init__(parent)
@@ -280,6 +527,10 @@ class QWatson(QWidget, QWatsonImportMixin, QWatsonProjectMixin,
 
         self.setup_activity_overview()
         self.setup()
+        self.setup_control_server()
+        self.setup_file_watcher()
+        self.setup_sync()
+        self.setup_diagnostics()
 
         if self.client.is_started:
             self.add_new_project(self.client.current['project'])
@@ -309,6 +560,38 @@ class QWatson(QWidget, QWatsonImportMixin, QWatsonProjectMixin,
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addWidget(self.stackwidget)
 
+    def setup_diagnostics(self):
+        """
+        Setup the hidden diagnostics window that is shown with the
+        Ctrl+Shift+D shortcut. The instrumentation is enabled at startup if
+        the QWATSON_TRACE environment variable is set to the path of a
+        trace file.
+        """
+        self.diagnostics = None
+        QShortcut(QKeySequence('Ctrl+Shift+D'), self, self.show_diagnostics)
+        if os.environ.get('QWATSON_TRACE'):
+            instrumentation.enable(os.environ['QWATSON_TRACE'])
+
+    def show_warning(self, message):
+        """Show a warning message box that does not block the gui."""
+        msgbox = QMessageBox(QMessageBox.Warning, __namever__, message,
+                             QMessageBox.Ok, self)
+        msgbox.setAttribute(Qt.WA_DeleteOnClose)
+        msgbox.setModal(False)
+        msgbox.show()
+        return msgbox
+
+    def show_diagnostics(self):
+        """Show the diagnostics window."""
+        if self.diagnostics is None:
+            self.diagnostics = DiagnosticsWidget(self.client, parent=self)
+            self.diagnostics.register_cache('rollups', self.client.rollups)
+            self.diagnostics.register_cache(
+                'search_index', self.client.search_index)
+            self.diagnostics.register_cache(
+                'conflicts', self.client.conflicts)
+        self.diagnostics.show()
+
     def setup_close_dialog(self):
         """
         Setup a dialog that is shown when closing QWatson while and activity
@@ -353,6 +636,7 @@ class QWatson(QWidget, QWatsonImportMixin, QWatsonProjectMixin,
         project_manager = self.setup_project_manager()
 
         self.tag_manager = TagLineEdit()
+        self.tag_manager.setup_completer(self.client)
         self.tag_manager.setPlaceholderText("Tags (comma separated)")
 
         self.comment_manager = QLineEdit()
@@ -407,6 +691,10 @@ class QWatson(QWidget, QWatsonImportMixin, QWatsonProjectMixin,
             "<b>Activity Overview</b><br><br>"
             "Open the activity overview window.")
 
+        self.btn_sync = QToolButtonSmall('sync')
+        self.btn_sync.clicked.connect(self.start_sync)
+        self.btn_sync.setToolTip(SYNC_TOOLTIP)
+
         self.round_time_btn = DropDownToolButton(style='text_only')
         self.round_time_btn.addItems(list(ROUNDMIN.keys()))
         self.round_time_btn.setCurrentIndex(1)
@@ -433,6 +721,7 @@ class QWatson(QWidget, QWatsonImportMixin, QWatsonProjectMixin,
         statusbar.addWidget(self.round_time_btn)
         statusbar.addWidget(self.btn_startfrom)
         statusbar.addStretch(100)
+        statusbar.addWidget(self.btn_sync)
         statusbar.addWidget(self.btn_report)
         statusbar.setSizePolicy(
             QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred))
@@ -544,6 +833,11 @@ class QWatson(QWidget, QWatsonImportMixin, QWatsonProjectMixin,
             event.ignore()
         else:
             self.overview_widg.close()
+            if self.diagnostics is not None:
+                self.diagnostics.close()
+            self.control_server.close()
+            self.file_watcher.close()
+            self.sync_worker.close()
             self.client.save()
             event.accept()
             print("QWatson is closed.\n")
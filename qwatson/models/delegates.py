@@ -8,7 +8,7 @@
 
 # ---- Third parties imports
 
-from PyQt5.QtCore import QEvent, QRect, QPoint, Qt
+from PyQt5.QtCore import QDateTime, QEvent, QRect, QPoint, Qt
 from PyQt5.QtGui import QPalette
 from PyQt5.QtWidgets import (
     QApplication, QComboBox, QDateTimeEdit, QLineEdit, QStyle,
@@ -16,19 +16,34 @@ from PyQt5.QtWidgets import (
 
 # ---- Local imports
 
-from qwatson.utils.dates import qdatetime_from_str
-from qwatson.utils import icons
-from qwatson.utils.strformating import list_to_str
+from qwatson.models.tablemodels import DayHeaderRole, RawValueRole
+from qwatson.utils import icons, instrumentation
 from qwatson.widgets.tags import TagLineEdit
 
 
 class BaseDelegate(QStyledItemDelegate):
+    # A widget that is shared by all the delegates to paint the items with
+    # the style of a list view.
+    _style_widget = None
 
     def __init__(self, parent):
         super(BaseDelegate, self) .__init__(parent)
 
+    @staticmethod
+    def style_widget():
+        """Return the widget used to paint the items."""
+        if BaseDelegate._style_widget is None:
+            BaseDelegate._style_widget = QListView()
+        return BaseDelegate._style_widget
+
+    @instrumentation.timed('delegate.paint')
     def paint(self, painter, option, index):
-        widget = QListView()
+        day_header = index.data(DayHeaderRole)
+        if day_header is not None:
+            self.paint_day_header(painter, option, index, *day_header)
+            return
+
+        widget = self.style_widget()
         style = widget.style()
 
         # A row can be highlighted only if the parent tableview is selected.
@@ -69,6 +84,21 @@ class BaseDelegate(QStyledItemDelegate):
 
         style.drawControl(QStyle.CE_ItemViewItem, option, painter, widget)
 
+    def paint_day_header(self, painter, option, index, title, timecount):
+        """
+        Paint the header row of a day, with the date on the left and the
+        time count on the right, like the title bar of a WatsonTableWidget.
+        """
+        painter.save()
+        painter.fillRect(option.rect, index.data(Qt.BackgroundRole))
+        font = option.font
+        font.setBold(True)
+        painter.setFont(font)
+        rect = option.rect.adjusted(5, 0, -5, 0)
+        painter.drawText(rect, Qt.AlignLeft | Qt.AlignVCenter, title)
+        painter.drawText(rect, Qt.AlignRight | Qt.AlignVCenter, timecount)
+        painter.restore()
+
 
 class TagEditDelegate(BaseDelegate):
     """
@@ -81,15 +111,16 @@ class TagEditDelegate(BaseDelegate):
     def createEditor(self, parent, option, index):
         """Qt method override."""
         self.editor = TagLineEdit(parent)
+        self.editor.setup_completer(index.model().sourceModel().client)
         return self.editor
 
     def setEditorData(self, editor, index):
         """Qt method override."""
-        editor.set_tags(index.model().get_tags_from_index(index))
+        editor.set_tags(list(index.data(RawValueRole)))
 
     def setModelData(self, editor, model, index):
         """Qt method override."""
-        if list_to_str(editor.tags) != model.data(index):
+        if tuple(editor.tags) != index.data(RawValueRole):
             model.editFrame(index, tags=editor.tags)
 
 
@@ -154,11 +185,11 @@ class LineEditDelegate(BaseDelegate):
 
     def setEditorData(self, editor, index):
         """Qt method override."""
-        editor.setText(index.model().data(index))
+        editor.setText(index.data(RawValueRole))
 
     def setModelData(self, editor, model, index):
         """Qt method override."""
-        if editor.text() != model.data(index):
+        if editor.text() != index.data(RawValueRole):
             model.editFrame(index, message=editor.text())
 
 
@@ -179,11 +210,11 @@ class ComboBoxDelegate(BaseDelegate):
         """Qt method override."""
         editor.addItems(index.model().projects)
         editor.setCurrentIndex(
-            editor.findText(index.model().get_project_from_index(index)))
+            editor.findText(index.data(RawValueRole)))
 
     def setModelData(self, editor, model, index):
         """Qt method override."""
-        if editor.currentText() != model.data(index):
+        if editor.currentText() != index.data(RawValueRole):
             model.editFrame(index, project=editor.currentText())
 
 
@@ -205,10 +236,12 @@ class DateTimeDelegate(BaseDelegate):
 
     def setEditorData(self, editor, index):
         """Qt method override."""
-        editor.setDateTime(qdatetime_from_str(index.model().data(index)))
+        editor.setDateTime(
+            QDateTime.fromSecsSinceEpoch(index.data(RawValueRole)))
 
     def setModelData(self, editor, model, index):
         """Qt method override."""
-        date_time = editor.dateTime().toString("yyyy-MM-dd hh:mm")
-        if date_time != model.data(index):
-            model.editDateTime(index, date_time+':00')
+        # The time is edited to the minute, as it is displayed in the table.
+        timestamp = editor.dateTime().toSecsSinceEpoch() // 60 * 60
+        if timestamp != index.data(RawValueRole) // 60 * 60:
+            model.editDateTime(index, timestamp)
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import json
+import os.path as osp
+from threading import Thread
+
+# ---- Third parties imports
+
+from PyQt5.QtCore import pyqtSignal as QSignal
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QTimer
+
+# ---- Local imports
+
+from qwatson.watson_ext.watsonextends import Frames
+from qwatson.utils.fileio import get_file_signature
+
+
+class WatsonFileWatcher(QObject):
+    """
+    Watch the config dir of a Watson client for changes made to the frames
+    file by another process, such as the watson CLI or a sync tool, and
+    reload the frames in a background thread.
+
+    The reloaded frames are sent with the sig_frames_reloaded signal, only
+    if the file was not modified again while they were being loaded. The
+    sig_reload_failed signal is sent with the error when the file can't be
+    read, in which case the changes are not applied.
+    """
+    sig_frames_reloaded = QSignal(list)
+    sig_reload_failed = QSignal(str)
+    _sig_frames_loaded = QSignal(list, object)
+    _sig_load_failed = QSignal(str)
+
+    def __init__(self, client, delay=250, parent=None):
+        super(WatsonFileWatcher, self).__init__(parent)
+        self.client = client
+        self._loading = False
+        self._signature = get_file_signature(client.frames_file)
+
+        # We wait for the file to stop changing before reloading it,
+        # because a save generates several file system events.
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.reload)
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._handle_path_changed)
+        self.watcher.fileChanged.connect(self._handle_path_changed)
+        self._sig_frames_loaded.connect(self._handle_frames_loaded)
+        self._sig_load_failed.connect(self._handle_load_failed)
+        self.watch_paths()
+
+    def watch_paths(self):
+        """
+        Add the config dir and the frames file to the watcher. The frames
+        file needs to be added back each time it is replaced on the disk.
+        """
+        for path in [self.client._dir, self.client.frames_file]:
+            if osp.exists(path) and path not in (self.watcher.files() +
+                                                 self.watcher.directories()):
+                self.watcher.addPath(path)
+
+    def close(self):
+        """Stop watching the config dir for changes."""
+        self.timer.stop()
+        paths = self.watcher.files() + self.watcher.directories()
+        if paths:
+            self.watcher.removePaths(paths)
+
+    @property
+    def signature(self):
+        """
+        Return the signature of the frames file that is known to match the
+        in-memory frames of the client.
+        """
+        return self._signature
+
+    def set_signature(self, signature=None):
+        """
+        Set the signature of the frames file that is known to match the
+        in-memory frames of the client.
+        """
+        self._signature = (get_file_signature(self.client.frames_file) if
+                           signature is None else signature)
+
+    def _handle_path_changed(self, path):
+        """Handle when the config dir or the frames file changed."""
+        self.watch_paths()
+        self.timer.start()
+
+    def reload(self):
+        """Reload the frames file in a background thread if it changed."""
+        signature = get_file_signature(self.client.frames_file)
+        if signature is None or signature == self._signature:
+            return
+        if signature == self.client.frames_signature:
+            # The file was written by the client itself.
+            self._signature = signature
+            return
+        if self._loading:
+            # The change will be detected when the current load completes.
+            return
+        self._loading = True
+        Thread(target=self._load_frames, args=(self.client.frames_file,),
+               daemon=True).start()
+
+    def _load_frames(self, filename):
+        """
+        Load the frames from the file. This is run in a background thread.
+        """
+        signature = get_file_signature(filename)
+        try:
+            with open(filename) as f:
+                content = f.read()
+            frames = list(Frames(json.loads(content) if content else []))
+        except (OSError, ValueError, TypeError) as e:
+            self._sig_load_failed.emit(
+                "Unable to reload %s: %s" % (filename, e))
+        else:
+            self._sig_frames_loaded.emit(frames, signature)
+
+    def _handle_load_failed(self, error):
+        """Handle when the frames file could not be reloaded."""
+        self._loading = False
+        self.sig_reload_failed.emit(error)
+
+    def _handle_frames_loaded(self, frames, signature):
+        """
+        Send the reloaded frames if the file did not change while they were
+        being loaded, else start a new reload.
+        """
+        self._loading = False
+        if signature is None:
+            return
+        if signature != get_file_signature(self.client.frames_file):
+            self.timer.start()
+            return
+        self._signature = signature
+        self.sig_frames_reloaded.emit(frames)
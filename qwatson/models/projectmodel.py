@@ -15,6 +15,8 @@ from PyQt5.QtCore import (QAbstractListModel, QModelIndex, Qt, QVariant)
 
 # ---- Local imports
 
+from qwatson.watson_ext.watsonhelpers import group_contiguous
+
 
 class WatsonProjectModel(QAbstractListModel):
     sig_model_changed = QSignal()
@@ -23,25 +25,59 @@ class WatsonProjectModel(QAbstractListModel):
         super(WatsonProjectModel, self).__init__()
         self.client = client
 
+        # The list of projects shown by the model, which is updated from
+        # the projects of the client when the model is reset or refreshed.
+        self._projects = list(client.projects)
+        self.modelReset.connect(self._update_projects)
+
         self.dataChanged.connect(self.model_changed)
         self.rowsInserted.connect(self.model_changed)
         self.modelReset.connect(self.model_changed)
         self.rowsRemoved.connect(self.model_changed)
 
+    def _update_projects(self):
+        """Update the list of projects from the client."""
+        self._projects = list(self.client.projects)
+
+    def refresh(self):
+        """
+        Update the list of projects from the client with row-level
+        signals, so that the selection of the views is preserved.
+        """
+        projects = self.client.projects
+        new_projects = set(projects)
+        removed = [row for row, project in enumerate(self._projects) if
+                   project not in new_projects]
+        for first, last in reversed(group_contiguous(removed)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._projects[first:last + 1]
+            self.endRemoveRows()
+
+        # Since both lists are sorted, the projects that remain are in the
+        # same order as in the projects of the client.
+        old_projects = set(self._projects)
+        for row, project in enumerate(projects):
+            if project not in old_projects:
+                self.beginInsertRows(QModelIndex(), row, row)
+                self._projects.insert(row, project)
+                self.endInsertRows()
+
     def model_changed(self):
         """Emit a signal whenever the model is changed."""
         self.sig_model_changed.emit()
 
     def rowCount(self, parent=QModelIndex()):
         """Qt method override. Return the number of row of the table."""
-        return len(self.client.projects)
+        return len(self._projects)
 
     def data(self, index, role=Qt.DisplayRole):
         """Qt method override."""
-        if role == Qt.DisplayRole:
-            return self.client.projects[index.row()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            # The EditRole is used for the text of the items of the
+            # combobox, since it is editable.
+            return self._projects[index.row()]
         elif role == Qt.ToolTipRole:
-            return self.client.projects[index.row()]
+            return self._projects[index.row()]
         else:
             return QVariant()
 
@@ -49,4 +85,4 @@ class WatsonProjectModel(QAbstractListModel):
 
     @property
     def projects(self):
-        return self.client.projects
+        return self._projects
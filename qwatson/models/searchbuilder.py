@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+from threading import Thread
+
+# ---- Third parties imports
+
+from PyQt5.QtCore import pyqtSignal as QSignal
+from PyQt5.QtCore import QObject
+
+# ---- Local imports
+
+from qwatson.watson_ext.searchindex import SearchIndex
+
+
+class SearchIndexBuilder(QObject):
+    """
+    Build the SearchIndex of the frames of a Watson client in a background
+    thread, so that loading a large history does not block the gui.
+
+    The index is attached to the client right away, so that the changes
+    made to the frames while it is being built are recorded, and
+    sig_index_ready is emitted once it can be queried.
+    """
+    sig_index_ready = QSignal()
+    _sig_data_built = QSignal(object, int, object)
+
+    def __init__(self, client, parent=None):
+        super(SearchIndexBuilder, self).__init__(parent)
+        self.client = client
+        self._sig_data_built.connect(self._handle_data_built)
+
+    def start(self):
+        """Start building the index of the client in a background thread."""
+        index = SearchIndex()
+        build_id = index.begin_build()
+        frames = list(self.client.frames)
+        self.client.set_search_index(index)
+        Thread(target=self._build_data, args=(index, build_id, frames),
+               daemon=True).start()
+
+    def _build_data(self, index, build_id, frames):
+        """
+        Build the data of the index. This is run in a background thread.
+        """
+        self._sig_data_built.emit(index, build_id, index.build_data(frames))
+
+    def _handle_data_built(self, index, build_id, data):
+        """Install the data built in the background in the index."""
+        index.finish_build(build_id, data)
+        if index.is_ready:
+            self.sig_index_ready.emit()
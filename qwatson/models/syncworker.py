@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+from threading import Thread
+
+# ---- Third parties imports
+
+from PyQt5.QtCore import pyqtSignal as QSignal
+from PyQt5.QtCore import QObject
+from watson.watson import WatsonError
+
+# ---- Local imports
+
+from qwatson.watson_ext.sync import SyncClient, apply_sync_result
+
+
+class SyncWorker(QObject):
+    """
+    Sync the frames of the client of a WatsonTableModel with a sync server
+    in a background thread.
+
+    The frames pulled from the server are merged into the model with
+    reload_frames once they are received, so that only the rows that were
+    added or changed are updated in the views. The frames that are edited
+    while the sync is running are pushed with the next sync.
+    """
+    sig_sync_finished = QSignal(object)
+    sig_sync_failed = QSignal(str)
+    _sig_synced = QSignal(object)
+    _sig_failed = QSignal(str)
+
+    def __init__(self, model, sync_client=None, parent=None):
+        super(SyncWorker, self).__init__(parent)
+        self.model = model
+        self.client = model.client
+        self.sync_client = sync_client
+        self._syncing = False
+        self._sig_synced.connect(self._handle_synced)
+        self._sig_failed.connect(self._handle_failed)
+
+    @property
+    def is_syncing(self):
+        """Return whether a sync is running."""
+        return self._syncing
+
+    def start(self):
+        """
+        Start a sync in a background thread and return whether it was
+        started. Nothing is done if a sync is already running.
+        """
+        if self._syncing:
+            return False
+        try:
+            if self.sync_client is None:
+                self.sync_client = SyncClient.from_config(self.client)
+        except WatsonError as e:
+            self.sig_sync_failed.emit(str(e))
+            return False
+        self._syncing = True
+        Thread(target=self._sync,
+               args=(list(self.client.frames), self.client.last_sync),
+               daemon=True).start()
+        return True
+
+    def close(self):
+        """Close the connection with the sync server."""
+        if self.sync_client is not None:
+            self.sync_client.close()
+
+    def _sync(self, frames, last_sync):
+        """
+        Pull and push the frames. This is run in a background thread, so
+        that any error is reported with the failed signal to not leave the
+        worker stuck in the syncing state.
+        """
+        try:
+            result = self.sync_client.sync(frames, last_sync)
+        except Exception as e:
+            self._sig_failed.emit(str(e))
+        else:
+            self._sig_synced.emit(result)
+
+    def _handle_synced(self, result):
+        """Merge the pulled frames into the model and save them."""
+        self._syncing = False
+        report = apply_sync_result(
+            self.client, result, commit=self.model.reload_frames)
+        try:
+            self.client.save()
+        except WatsonError as e:
+            self.sig_sync_failed.emit(str(e))
+            return
+        self.sig_sync_finished.emit(report)
+
+    def _handle_failed(self, error):
+        """Handle when the sync failed in the background thread."""
+        self._syncing = False
+        self.sig_sync_failed.emit(error)
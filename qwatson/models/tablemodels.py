@@ -20,10 +20,36 @@ from PyQt5.QtCore import (QAbstractTableModel, QModelIndex,
 
 # ---- Local imports
 
-from qwatson.utils import colors
-from qwatson.utils.dates import local_arrow_from_str, contraint_arrow_to_span
+from qwatson.utils import colors, instrumentation
+from qwatson.utils.dates import (
+    arrowspan_to_str, contraint_arrow_to_span, local_arrow_from_str,
+    total_seconds_to_hour_min)
 from qwatson.utils.strformating import list_to_str
-from qwatson.watson_ext.watsonhelpers import edit_frame_at
+from qwatson.utils.timecodec import codec
+from qwatson.watson_ext.events import (
+    PROJECT_EVENTS, FramesEdited, FramesRemoved, FramesReset)
+from qwatson.watson_ext.framefilters import FrameFilter
+from qwatson.watson_ext.watsonhelpers import (
+    edit_frame_at, diff_frames, find_span_range, group_contiguous, is_in_span)
+
+# The role used by the WatsonSpanTableModel to provide the title and the
+# time count of the day header rows.
+DayHeaderRole = Qt.UserRole + 1
+
+# The role used by the WatsonTableModel to provide the raw value of a cell,
+# so that the delegates do not need to parse the displayed text back. The
+# value is the epoch seconds of the start and end, the total seconds of the
+# duration, the project, the tuple of the tags, the comment and the id.
+RawValueRole = Qt.UserRole + 2
+
+# The role used by the WatsonTableModel to provide the key used to sort the
+# rows by a column. The keys are precomputed per frame, so that the rows
+# are compared without formatting or parsing the displayed text.
+SortRole = Qt.UserRole + 3
+
+# The background color of the activities that overlap other activities or
+# that are not sorted by start time.
+CONFLICT_COLOR = '#FFD8D8'
 
 
 class WatsonTableModel(QAbstractTableModel):
@@ -42,13 +68,28 @@ class WatsonTableModel(QAbstractTableModel):
         super(WatsonTableModel, self).__init__()
         self.client = client
 
+        # A counter that is incremented whenever the data of the model
+        # change, so that the proxy models can tell when the rows that
+        # they cached are outdated.
+        self.data_version = 0
+
+        # The sort keys of the frames stored by id along with the frame
+        # they were computed from, so that only the keys of the frames that
+        # were edited are computed again.
+        self._sort_keys = {}
+        # The ranks of the projects sorted by their lowercase name.
+        self._project_codes = {}
+
         self.dataChanged.connect(self.model_changed)
         self.rowsInserted.connect(self.model_changed)
         self.modelReset.connect(self.model_changed)
+        self.modelReset.connect(self.clear_sort_keys)
         self.rowsRemoved.connect(self.model_changed)
+        client.feed.subscribe(self.client_changed)
 
     def model_changed(self):
         """Emit a signal whenever the model is changed."""
+        self.data_version += 1
         self.sig_model_changed.emit()
 
     def rowCount(self, parent=QModelIndex()):
@@ -64,9 +105,9 @@ class WatsonTableModel(QAbstractTableModel):
         frames = self.client.frames
         if role == Qt.DisplayRole:
             if index.column() == self.COLUMNS['start']:
-                return frames[index.row()][0].format('YYYY-MM-DD HH:mm')
+                return codec.format_minutes(frames[index.row()][0])
             elif index.column() == self.COLUMNS['end']:
-                return frames[index.row()][1].format('YYYY-MM-DD HH:mm')
+                return codec.format_minutes(frames[index.row()][1])
             elif index.column() == self.COLUMNS['duration']:
                 total_seconds = (frames[index.row()][1] -
                                  frames[index.row()][0]).total_seconds()
@@ -82,6 +123,10 @@ class WatsonTableModel(QAbstractTableModel):
                 return list_to_str(frames[index.row()].tags)
             else:
                 return ''
+        elif role == RawValueRole:
+            return self.raw_value(frames[index.row()], index.column())
+        elif role == SortRole:
+            return self.sort_key(frames[index.row()], index.column())
         elif role == Qt.ToolTipRole:
             if index.column() == self.COLUMNS['comment']:
                 msg = frames[index.row()].message
@@ -95,6 +140,8 @@ class WatsonTableModel(QAbstractTableModel):
             elif index.column() == self.COLUMNS['tags']:
                 return list_to_str(frames[index.row()].tags)
         elif role == Qt.BackgroundRole:
+            if frames[index.row()].id in self.conflicting_ids():
+                return colors.get_qcolor(CONFLICT_COLOR)
             return colors.get_qcolor('base')
         elif role == Qt.TextAlignmentRole:
             if index.column() == self.COLUMNS['comment']:
@@ -106,6 +153,83 @@ class WatsonTableModel(QAbstractTableModel):
         else:
             return QVariant()
 
+    def raw_value(self, frame, column):
+        """Return the raw value of the frame for the specified column."""
+        if column == self.COLUMNS['start']:
+            return codec.to_timestamp(frame.start)
+        elif column == self.COLUMNS['end']:
+            return codec.to_timestamp(frame.stop)
+        elif column == self.COLUMNS['duration']:
+            return (frame.stop - frame.start).total_seconds()
+        elif column == self.COLUMNS['project']:
+            return frame.project
+        elif column == self.COLUMNS['tags']:
+            return tuple(frame.tags)
+        elif column == self.COLUMNS['comment']:
+            return '' if frame.message is None else frame.message
+        elif column == self.COLUMNS['id']:
+            return frame.id
+        else:
+            return None
+
+    def sort_key(self, frame, column):
+        """Return the key used to sort the frame by the specified column."""
+        if column == self.COLUMNS['project']:
+            return self.project_code(frame.project)
+        entry = self._sort_keys.get(frame.id)
+        if entry is None or entry[0] is not frame:
+            start = codec.to_timestamp(frame.start)
+            stop = codec.to_timestamp(frame.stop)
+            keys = {self.COLUMNS['start']: start,
+                    self.COLUMNS['end']: stop,
+                    self.COLUMNS['duration']: stop - start,
+                    self.COLUMNS['tags']: ', '.join(
+                        sorted(tag.lower() for tag in frame.tags)),
+                    self.COLUMNS['comment']: (frame.message or '').lower(),
+                    self.COLUMNS['id']: frame.id}
+            entry = self._sort_keys[frame.id] = (frame, keys)
+        return entry[1].get(column, 0)
+
+    def project_code(self, project):
+        """
+        Return the rank of the project among the projects sorted by their
+        lowercase name. The ranks are computed again when a project that
+        is not ranked yet is requested.
+        """
+        try:
+            return self._project_codes[project]
+        except KeyError:
+            projects = sorted(set(self.client.projects) | {project},
+                              key=lambda name: (name.lower(), name))
+            self._project_codes = {
+                name: rank for rank, name in enumerate(projects)}
+            return self._project_codes[project]
+
+    def client_changed(self, event):
+        """
+        Drop the sort keys of the frames that were edited or removed and
+        the ranks of the projects when the projects changed.
+        """
+        if isinstance(event, FramesEdited):
+            frames = event.old
+        elif isinstance(event, FramesRemoved):
+            frames = event.frames
+        elif isinstance(event, FramesReset):
+            self.clear_sort_keys()
+            return
+        elif isinstance(event, PROJECT_EVENTS):
+            self._project_codes = {}
+            return
+        else:
+            return
+        for frame in frames:
+            self._sort_keys.pop(frame.id, None)
+
+    def clear_sort_keys(self):
+        """Clear the sort keys of the frames and the ranks of the projects."""
+        self._sort_keys = {}
+        self._project_codes = {}
+
     def headerData(self, section, orientation, role):
         """Qt method override."""
         if role == Qt.DisplayRole and orientation == Qt.Horizontal:
@@ -144,17 +268,29 @@ class WatsonTableModel(QAbstractTableModel):
         """Return the frame id from a table index."""
         return self.client.frames[index.row()].id
 
+    def conflicting_ids(self):
+        """
+        Return the set of the ids of the frames that overlap other frames
+        or that are not sorted by start time.
+        """
+        return self.client.conflicts.conflicting_ids(self.client.frames)
+
     def get_start_datetime_range(self, index):
         """
         Return the range in which the start time of the frame located at
         index can be moved without creating any conflict.
+
+        The range is found from the frames sorted by start time in the
+        conflict index, so that it is also valid when the rows of the
+        frames are not sorted.
         """
-        frames = self.client.frames
-        lmin = (frames[index.row()-1].stop if index.row() > 0 else
-                local_arrow_from_str('1980-01-01 00:00:00',
+        frame = self.client.frames[index.row()]
+        previous_end, _ = self.client.conflicts.free_span(frame.id)
+        lmin = (local_arrow_from_str('1980-01-01 00:00:00',
                                      'YYYY-MM-DD HH:mm:ss')
-                )
-        lmax = frames[index.row()].stop
+                if previous_end is None else
+                codec.to_local(previous_end))
+        lmax = frame.stop
         return lmin, lmax
 
     def get_stop_datetime_range(self, index):
@@ -162,10 +298,11 @@ class WatsonTableModel(QAbstractTableModel):
         Return the range in which the stop time of the frame located at
         index can be moved without creating any conflict.
         """
-        frames = self.client.frames
-        lmin = frames[index.row()].start
-        lmax = (arrow.now() if index.row() == (len(frames)-1) else
-                frames[index.row()+1].start)
+        frame = self.client.frames[index.row()]
+        _, next_start = self.client.conflicts.free_span(frame.id)
+        lmin = frame.start
+        lmax = (arrow.now() if next_start is None else
+                codec.to_local(next_start))
         return lmin, lmax
 
     # ---- Watson handlers
@@ -186,11 +323,82 @@ class WatsonTableModel(QAbstractTableModel):
         edit_frame_at(self.client, index.row(), start,
                       stop, project, message, tags)
         self.client.save()
-        self.dataChanged.emit(index, index)
+        # The whole row is changed, since editing a field can change the
+        # duration and the sort keys of the other columns.
+        self.dataChanged.emit(self.index(index.row(), 0),
+                              self.index(index.row(), self.columnCount() - 1))
+
+    def edit_frames(self, rows, project=None, message=None, tags=None):
+        """
+        Edit the project, comment or tags of the frames stored at the
+        specified rows as a single batch, with one dataChanged signal per
+        range of contiguous rows and a single save.
+        """
+        rows = sorted(set(rows))
+        if not rows:
+            return
+        for row in rows:
+            edit_frame_at(self.client, row, project=project,
+                          message=message, tags=tags)
+        self.client.save()
+        for first, last in group_contiguous(rows):
+            self.dataChanged.emit(self.index(first, 0),
+                                  self.index(last, self.columnCount() - 1))
+
+    def remove_frames(self, rows):
+        """
+        Remove the frames stored at the specified rows as a single batch
+        and save them.
+        """
+        self.remove_rows(rows)
+        self.client.save()
 
-    def editDateTime(self, index, date_time):
-        """Edit the start or stop field in the frame stored at index."""
-        date_time = local_arrow_from_str(date_time, 'YYYY-MM-DD HH:mm:ss')
+    def remove_rows(self, rows):
+        """
+        Remove the frames stored at the specified rows with a single
+        Frames.remove_rows, with one rowsRemoved signal per range of
+        contiguous rows.
+        """
+        self.client.frames.remove_rows(
+            rows,
+            begin=lambda first, last: self.beginRemoveRows(
+                QModelIndex(), first, last),
+            end=lambda first, last: self.endRemoveRows())
+
+    def rename_project(self, old_name, new_name, progress=None):
+        """
+        Rename the project in all its frames in a single pass, with one
+        dataChanged signal per range of contiguous rows.
+
+        Return False if the rename was cancelled by the progress callback.
+        See find_project_rows.
+        """
+        rows = self.client.rename_project(old_name, new_name, progress)
+        if rows is None:
+            return False
+        for first, last in group_contiguous(rows):
+            self.dataChanged.emit(self.index(first, 0),
+                                  self.index(last, self.columnCount() - 1))
+        return True
+
+    def delete_project(self, project, progress=None):
+        """
+        Delete the project and all its frames in a single pass, with one
+        rowsRemoved signal per range of contiguous rows.
+
+        Return False if the deletion was cancelled by the progress
+        callback. See find_project_rows.
+        """
+        rows = self.client.delete_project(
+            project, progress, remove=self.remove_rows)
+        return rows is not None
+
+    def editDateTime(self, index, timestamp):
+        """
+        Edit the start or stop field in the frame stored at index from the
+        provided epoch seconds.
+        """
+        date_time = codec.to_local(timestamp)
         if index.column() == self.COLUMNS['start']:
             span = self.get_start_datetime_range(index)
             self.editFrame(
@@ -200,18 +408,183 @@ class WatsonTableModel(QAbstractTableModel):
             self.editFrame(
                 index, stop=contraint_arrow_to_span(date_time, span))
 
+    def reload_frames(self, frames):
+        """
+        Replace the frames of the client with the provided list of frames
+        using row-level model signals, so that the selections, scroll
+        positions and opened editors of the views survive the reload.
+
+        Return the FramesDiff that was applied or None if the model had to
+        be reset completely.
+        """
+        client_frames = self.client.frames
+        changed = client_frames.changed
+        diff = diff_frames(client_frames, frames)
+        if diff is None:
+            self.beginResetModel()
+            client_frames.replace_all(frames)
+            client_frames.changed = changed
+            self.endResetModel()
+            return None
+
+        for first, last in reversed(group_contiguous(diff.removed)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            client_frames.remove_range(first, last)
+            self.endRemoveRows()
+        for first, last in group_contiguous(diff.inserted):
+            self.beginInsertRows(QModelIndex(), first, last)
+            client_frames.insert_frames(first, frames[first:last + 1])
+            self.endInsertRows()
+        for first, last in group_contiguous(diff.changed):
+            for row in range(first, last + 1):
+                client_frames[row] = frames[row]
+            self.dataChanged.emit(self.index(first, 0),
+                                  self.index(last, self.columnCount() - 1))
+        client_frames.changed = changed
+
+        return diff
+
+
+class SpanRowFilter(object):
+    """
+    The rows of the source model within a date span that are accepted by
+    the project and tag filters of the overview.
+
+    The rows are evaluated once per date span, filters and version of the
+    data of the source model, and are shared by the proxy models of the
+    days of the span.
+    """
+
+    def __init__(self, source_model, date_span=None):
+        self.source_model = source_model
+        self.date_span = date_span
+        self.project_filters = None
+        self.tag_filters = None
+        self.frame_filter = FrameFilter()
+
+        # A counter that is incremented whenever the filters change, so
+        # that the proxy models sharing the filter can tell when they need
+        # to be invalidated.
+        self.generation = 0
+
+        self._version = None
+        self._first = self._last = 0
+        self._accepted = None
+
+    def set_date_span(self, date_span):
+        """Set the date span of the rows to evaluate."""
+        if date_span != self.date_span:
+            self.date_span = date_span
+            self._version = None
 
-class WatsonSortFilterProxyModel(QSortFilterProxyModel):
+    def set_project_filters(self, project_filters):
+        """Set the dict of the projects check state."""
+        self.project_filters = project_filters
+        self.compile_filters()
+
+    def set_tag_filters(self, tag_filters):
+        """Set the dict of the tags check state."""
+        self.tag_filters = tag_filters
+        self.compile_filters()
+
+    def compile_filters(self):
+        """Compile the filters and increment the generation if changed."""
+        frame_filter = FrameFilter(self.project_filters, self.tag_filters)
+        if frame_filter != self.frame_filter:
+            self.frame_filter = frame_filter
+            self.generation += 1
+            self._version = None
+
+    def update(self):
+        """
+        Evaluate the rows of the date span if the filters or the data of
+        the source model changed since the last evaluation.
+        """
+        if self._version == self.source_model.data_version:
+            return
+        frames = self.source_model.client.frames
+        self._first, self._last = find_span_range(frames, self.date_span)
+        self._accepted = self.frame_filter.accepted_rows(
+            frames, self._first, self._last)
+        self._version = self.source_model.data_version
+
+    def accepts(self, source_row):
+        """Return whether the row of the source model is accepted."""
+        if self.frame_filter.accepts_all:
+            return True
+        self.update()
+        if self._first <= source_row < self._last:
+            return self._accepted[source_row - self._first]
+        return self.frame_filter.accepts(
+            self.source_model.client.frames[source_row])
+
+
+class ProxyMappingMixin(object):
+    """
+    A mixin that maps the methods of the WatsonTableModel that are used
+    by the delegates from the indexes of a proxy model to the source model.
+    """
+
+    @property
+    def projects(self):
+        return self.sourceModel().client.projects
+
+    def get_frame_from_index(self, proxy_index):
+        """Return the frame stored at the row of index."""
+        return self.sourceModel().get_frame_from_index(
+                   self.mapToSource(proxy_index))
+
+    def get_project_from_index(self, proxy_index):
+        """Return the project of the frame corresponding to the model index."""
+        return self.sourceModel().get_project_from_index(
+                   self.mapToSource(proxy_index))
+
+    def get_tags_from_index(self, proxy_index):
+        """Return a list of tags for the frame from a table index."""
+        return self.sourceModel().get_tags_from_index(
+                   self.mapToSource(proxy_index))
+
+    def get_frameid_from_index(self, proxy_index):
+        """Return the frame id from a table index."""
+        return self.sourceModel().get_frameid_from_index(
+                   self.mapToSource(proxy_index))
+
+    def emit_btn_delrow_clicked(self, proxy_index):
+        """
+        Send a signal via the source model with the model index where the
+        button to delete an activity has been clicked.
+        """
+        self.sourceModel().emit_btn_delrow_clicked(
+            self.mapToSource(proxy_index))
+
+    def editFrame(self, proxy_index, start=None, stop=None, project=None,
+                  message=None, tags=None):
+        """Map proxy method to source."""
+        self.sourceModel().editFrame(
+            self.mapToSource(proxy_index), start=start, stop=stop,
+            project=project, message=message, tags=tags)
+
+    def editDateTime(self, proxy_index, timestamp):
+        """Map proxy method to source."""
+        self.sourceModel().editDateTime(
+            self.mapToSource(proxy_index), timestamp)
+
+
+class WatsonSortFilterProxyModel(ProxyMappingMixin,
+                                 QSortFilterProxyModel):
     sig_sourcemodel_changed = QSignal()
     sig_total_seconds_changed = QSignal(float)
 
-    def __init__(self, source_model, date_span=None):
-        super(WatsonSortFilterProxyModel, self).__init__()
+    def __init__(self, source_model, date_span=None, parent=None):
+        super(WatsonSortFilterProxyModel, self).__init__(parent)
         self.setSourceModel(source_model)
+        self.setSortRole(SortRole)
         self.date_span = date_span
         self.total_seconds = None
-        self.project_filters = None
-        self.tag_filters = None
+        self.row_filter = SpanRowFilter(source_model, date_span)
+        self._owns_row_filter = True
+        self._filter_generation = self.row_filter.generation
+        self._row_range = None
 
         source_model.dataChanged.connect(self.source_model_changed)
         source_model.rowsInserted.connect(self.source_model_changed)
@@ -223,10 +596,32 @@ class WatsonSortFilterProxyModel(QSortFilterProxyModel):
         self.sig_sourcemodel_changed.emit()
         self.calcul_total_seconds()
 
+    @property
+    def project_filters(self):
+        """Return the dict of the projects check state."""
+        return self.row_filter.project_filters
+
+    @property
+    def tag_filters(self):
+        """Return the dict of the tags check state."""
+        return self.row_filter.tag_filters
+
+    def set_row_filter(self, row_filter):
+        """
+        Set a SpanRowFilter that is shared with the proxy models of the
+        other days of its date span.
+        """
+        self.row_filter = row_filter
+        self._owns_row_filter = False
+        self.update_filter()
+
     def set_date_span(self, date_span):
         """Set the date span to use to filter the row of the source model."""
         if date_span != self.date_span:
             self.date_span = date_span
+            self._row_range = None
+            if self._owns_row_filter:
+                self.row_filter.set_date_span(date_span)
             self.invalidateFilter()
             self.calcul_total_seconds()
 
@@ -234,56 +629,85 @@ class WatsonSortFilterProxyModel(QSortFilterProxyModel):
         """
         Set the list of project for which activies are shown in the table.
         """
-        if project_filters != self.project_filters:
-            self.project_filters = project_filters
-            self.invalidateFilter()
-            self.calcul_total_seconds()
+        self.row_filter.set_project_filters(project_filters)
+        self.update_filter()
 
     def set_tag_filters(self, tag_filters):
         """
         Set the list of tags for which activies are shown in the table.
         """
-        if tag_filters != self.tag_filters:
-            self.tag_filters = tag_filters
+        self.row_filter.set_tag_filters(tag_filters)
+        self.update_filter()
+
+    def update_filter(self):
+        """Invalidate the filter if the filters of the row filter changed."""
+        if self._filter_generation != self.row_filter.generation:
+            self._filter_generation = self.row_filter.generation
             self.invalidateFilter()
             self.calcul_total_seconds()
 
+    @instrumentation.timed('proxy.filter_batch')
+    def invalidateFilter(self):
+        """Qt method override to instrument the filtering of the rows."""
+        instrumentation.count('proxy.filtered_rows',
+                              self.sourceModel().rowCount())
+        super(WatsonSortFilterProxyModel, self).invalidateFilter()
+
     def filterAcceptsRow(self, source_row, source_parent):
         """Qt method override."""
-        if self.project_filters is not None:
-            project = self.sourceModel().client.frames[source_row].project
-            if not self.project_filters.get(project, True):
-                return False
-        if self.tag_filters is not None:
-            tags = self.sourceModel().client.frames[source_row].tags or ['']
-            if not any([self.tag_filters.get(tag, True) for tag in tags]):
-                return False
-        if self.date_span is None:
-            return True
-        else:
-            return self.is_in_date_span(source_row, self.date_span)
+        first, last = self.get_row_range()
+        return (first <= source_row < last and
+                is_in_span(self.sourceModel().client.frames[source_row],
+                           self.date_span) and
+                self.row_filter.accepts(source_row))
+
+    def lessThan(self, left, right):
+        """
+        Qt method override to compare the precomputed sort keys of the rows.
+        The rows with equal keys are kept in the order of the source model
+        in both sort orders.
+        """
+        left_key = left.data(SortRole)
+        right_key = right.data(SortRole)
+        if left_key == right_key:
+            return ((left.row() < right.row()) !=
+                    (self.sortOrder() == Qt.DescendingOrder))
+        return left_key < right_key
 
-    def is_in_date_span(self, source_row, date_span):
+    def get_row_range(self):
         """
-        Return whether the start time of the frame stored at the specified
-        row of the source model is within the specified date_span.
+        Return the range of the rows of the source model that holds all the
+        rows whose start time is within the date span of the proxy, with
+        the last row excluded. See find_span_range.
         """
-        frame_start = self.sourceModel().client.frames[source_row].start
-        return (frame_start >= date_span[0] and frame_start <= date_span[1])
+        version = self.sourceModel().data_version
+        if self._row_range is None or self._row_range[0] != version:
+            self._row_range = (version,) + find_span_range(
+                self.sourceModel().client.frames, self.date_span)
+        return self._row_range[1:]
 
+    @instrumentation.timed('proxy.calcul_total_seconds')
     def calcul_total_seconds(self):
         """
         Return the total number of seconds of all the activities accepted
         by the proxy model.
         """
-        timedelta = datetime.timedelta()
-        for i in range(self.rowCount()):
-            source_row = self.mapToSource(self.index(i, 0)).row()
-            frame = self.sourceModel().client.frames[source_row]
-            timedelta = timedelta + (frame.stop - frame.start)
+        total_seconds_new = None
+        if self.date_span is not None:
+            # The date spans of the tables of the overview are days, so
+            # the total can be answered from the rollups in most cases.
+            total_seconds_new = (
+                self.sourceModel().client.rollups.filtered_total(
+                    self.date_span, self.row_filter.frame_filter))
+        if total_seconds_new is None:
+            timedelta = datetime.timedelta()
+            for i in range(self.rowCount()):
+                source_row = self.mapToSource(self.index(i, 0)).row()
+                frame = self.sourceModel().client.frames[source_row]
+                timedelta = timedelta + (frame.stop - frame.start)
+            total_seconds_new = timedelta.total_seconds()
 
         total_seconds_old = self.total_seconds
-        total_seconds_new = timedelta.total_seconds()
         if total_seconds_new != total_seconds_old:
             self.total_seconds = total_seconds_new
             total_seconds_old = total_seconds_old or 0
@@ -296,48 +720,328 @@ class WatsonSortFilterProxyModel(QSortFilterProxyModel):
         """Return the number of rows that were accepted by the proxy."""
         return self.rowCount()
 
-    # ---- Map proxy to source
 
-    @property
-    def projects(self):
-        return self.sourceModel().client.projects
+class WatsonSpanTableModel(ProxyMappingMixin, QAbstractTableModel):
+    """
+    A proxy model that flattens the activities of a date span in a single
+    table, where the activities of each day are preceded by a header row
+    that shows the date and the time count of the day.
 
-    def get_frame_from_index(self, proxy_index):
-        """Return the frame stored at the row of index."""
-        return self.sourceModel().get_frame_from_index(
-                   self.mapToSource(proxy_index))
+    The rows of the span are found by bisection when the frames are sorted
+    by start time, so that the cost of the layout only depends on the
+    number of activities in the date span and not on the size of the whole
+    history. The activities are grouped by day, so that the activities that
+    are not sorted are still shown under the header of their day, and the
+    rows that are added or removed in the source model only update the
+    layout of their day.
+    """
+    sig_sourcemodel_changed = QSignal()
+    sig_total_seconds_changed = QSignal(float)
 
-    def get_project_from_index(self, proxy_index):
-        """Return the project of the frame corresponding to the model index."""
-        return self.sourceModel().get_project_from_index(
-                   self.mapToSource(proxy_index))
+    def __init__(self, source_model, date_span=None, parent=None):
+        super(WatsonSpanTableModel, self).__init__(parent)
+        self._source_model = source_model
+        self.date_span = date_span
+        self.total_seconds = 0
+        self.project_filters = None
+        self.tag_filters = None
+        self.frame_filter = FrameFilter()
 
-    def get_tags_from_index(self, proxy_index):
-        """Return a list of tags for the frame from a table index."""
-        return self.sourceModel().get_tags_from_index(
-                   self.mapToSource(proxy_index))
+        # The source rows of the activities, or minus the ordinal of the
+        # day for the header rows of the days.
+        self._rows = []
+        # The [day span, total seconds] of the days shown in the table,
+        # stored by the ordinal of the day.
+        self._days = {}
+        self._source_to_row = {}
 
-    def get_frameid_from_index(self, proxy_index):
-        """Return the frame id from a table index."""
-        return self.sourceModel().get_frameid_from_index(
-                   self.mapToSource(proxy_index))
+        source_model.dataChanged.connect(self.source_data_changed)
+        source_model.rowsInserted.connect(self.source_rows_inserted)
+        source_model.rowsRemoved.connect(self.source_rows_removed)
+        source_model.modelReset.connect(self.source_model_changed)
 
-    def emit_btn_delrow_clicked(self, proxy_index):
+        self.update_layout()
+
+    def sourceModel(self):
+        """Return the WatsonTableModel of the proxy."""
+        return self._source_model
+
+    def rowCount(self, parent=QModelIndex()):
+        """Qt method override."""
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        """Qt method override."""
+        return self._source_model.columnCount()
+
+    def data(self, index, role=Qt.DisplayRole):
+        """Qt method override."""
+        if not self.is_header_row(index.row()):
+            if role == DayHeaderRole:
+                return None
+            return self._source_model.data(self.mapToSource(index), role)
+
+        day_span, total_seconds = self._days[-self._rows[index.row()]]
+        if role == DayHeaderRole:
+            return (arrowspan_to_str(day_span),
+                    total_seconds_to_hour_min(total_seconds))
+        elif role == Qt.DisplayRole and index.column() == 0:
+            return arrowspan_to_str(day_span)
+        elif role == Qt.BackgroundRole:
+            return colors.get_qcolor('grey')
+        else:
+            return QVariant()
+
+    def flags(self, index):
+        """Qt method override."""
+        if self.is_header_row(index.row()):
+            return Qt.ItemIsEnabled
+        return self._source_model.flags(self.mapToSource(index))
+
+    def is_header_row(self, row):
+        """Return whether the row is the header row of a day."""
+        return self._rows[row] < 0
+
+    def header_rows(self):
+        """Return the list of the header rows of the days."""
+        return [row for row, value in enumerate(self._rows) if value < 0]
+
+    def mapToSource(self, proxy_index):
+        """Return the index of the source model at the proxy index."""
+        if not proxy_index.isValid() or self.is_header_row(proxy_index.row()):
+            return QModelIndex()
+        return self._source_model.index(
+            self._rows[proxy_index.row()], proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        """Return the index of the proxy model at the source index."""
+        try:
+            row = self._source_to_row[source_index.row()]
+        except KeyError:
+            return QModelIndex()
+        return self.index(row, source_index.column())
+
+    def get_accepted_row_count(self):
+        """Return the number of activities shown in the table."""
+        return len(self._source_to_row)
+
+    # ---- Filters
+
+    def set_date_span(self, date_span):
+        """Set the date span of the activities to show in the table."""
+        if date_span != self.date_span:
+            self.date_span = date_span
+            self.update_layout()
+
+    def set_project_filters(self, project_filters):
         """
-        Send a signal via the source model with the model index where the
-        button to delete an activity has been clicked.
+        Set the list of project for which activies are shown in the table.
         """
-        self.sourceModel().emit_btn_delrow_clicked(
-            self.mapToSource(proxy_index))
+        self.project_filters = project_filters
+        self.compile_filters()
 
-    def editFrame(self, proxy_index, start=None, stop=None, project=None,
-                  message=None, tags=None):
-        """Map proxy method to source."""
-        self.sourceModel().editFrame(
-            self.mapToSource(proxy_index), start=start, stop=stop,
-            project=project, message=message, tags=tags)
+    def set_tag_filters(self, tag_filters):
+        """
+        Set the list of tags for which activies are shown in the table.
+        """
+        self.tag_filters = tag_filters
+        self.compile_filters()
 
-    def editDateTime(self, proxy_index, date_time):
-        """Map proxy method to source."""
-        self.sourceModel().editDateTime(
-            self.mapToSource(proxy_index), date_time)
+    def compile_filters(self):
+        """Compile the filters and update the layout if they changed."""
+        frame_filter = FrameFilter(self.project_filters, self.tag_filters)
+        if frame_filter != self.frame_filter:
+            self.frame_filter = frame_filter
+            self.update_layout()
+
+    # ---- Layout
+
+    @instrumentation.timed('span_model.calcul_layout')
+    def calcul_layout(self):
+        """
+        Return the list of the rows and the dict of the days of the
+        activities that are in the date span and accepted by the filters.
+        """
+        if self.date_span is None:
+            return [], {}
+        frames = self._source_model.client.frames
+        groups = {}
+        for source_row in range(*find_span_range(frames, self.date_span)):
+            frame = frames[source_row]
+            if self.accepts(frame):
+                groups.setdefault(self.day_of(frame), []).append(source_row)
+        rows = []
+        days = {}
+        for ordinal in sorted(groups):
+            rows.append(-ordinal)
+            rows.extend(groups[ordinal])
+            days[ordinal] = self.calcul_day(groups[ordinal])
+        return rows, days
+
+    def accepts(self, frame):
+        """
+        Return whether the frame is in the date span and accepted by the
+        filters.
+        """
+        return (self.date_span is not None and
+                is_in_span(frame, self.date_span) and
+                self.frame_filter.accepts(frame))
+
+    def day_of(self, frame):
+        """Return the ordinal of the day of the frame."""
+        return frame.start.date().toordinal()
+
+    def calcul_day(self, source_rows):
+        """Return the [day span, total seconds] of the rows of a day."""
+        frames = self._source_model.client.frames
+        return [frames[source_rows[0]].start.span('day'),
+                sum((frames[row].stop - frames[row].start).total_seconds()
+                    for row in source_rows)]
+
+    def day_rows(self, ordinal):
+        """
+        Return the range (header, last) of the rows of the day, with last
+        excluded, or None if the day is not shown in the table.
+        """
+        try:
+            header = self._rows.index(-ordinal)
+        except ValueError:
+            return None
+        last = header + 1
+        while last < len(self._rows) and self._rows[last] >= 0:
+            last += 1
+        return header, last
+
+    def update_days(self, ordinals):
+        """
+        Update the total seconds of the days that are still shown in the
+        table and emit a signal for their header rows.
+        """
+        self._source_to_row = {
+            value: row for row, value in enumerate(self._rows) if value >= 0}
+        for ordinal in ordinals:
+            rows = self.day_rows(ordinal)
+            if rows is None:
+                self._days.pop(ordinal, None)
+                continue
+            header, last = rows
+            self._days[ordinal] = self.calcul_day(self._rows[header + 1:last])
+            self.dataChanged.emit(
+                self.index(header, 0),
+                self.index(header, self.columnCount() - 1))
+        self.update_total_seconds()
+
+    def update_layout(self):
+        """Reset the model with the rows of the current span and filters."""
+        self.beginResetModel()
+        self._rows, self._days = self.calcul_layout()
+        self._source_to_row = {
+            value: row for row, value in enumerate(self._rows) if value >= 0}
+        self.endResetModel()
+        self.update_total_seconds()
+
+    def update_total_seconds(self):
+        """Update the total number of seconds of the activities shown."""
+        total_seconds = sum(day[1] for day in self._days.values())
+        if total_seconds != self.total_seconds:
+            self.total_seconds = total_seconds
+            self.sig_total_seconds_changed.emit(total_seconds)
+
+    def source_model_changed(self):
+        """Update the layout of the table when the source model is reset."""
+        self.update_layout()
+        self.sig_sourcemodel_changed.emit()
+
+    def source_rows_inserted(self, parent, first, last):
+        """
+        Insert the rows that were added to the source model in the layout
+        of their day, with row-level signals.
+        """
+        count = last - first + 1
+        for row, value in enumerate(self._rows):
+            if value >= first:
+                self._rows[row] = value + count
+
+        frames = self._source_model.client.frames
+        ordinals = set()
+        for source_row in range(first, last + 1):
+            frame = frames[source_row]
+            if not self.accepts(frame):
+                continue
+            ordinal = self.day_of(frame)
+            ordinals.add(ordinal)
+            rows = self.day_rows(ordinal)
+            if rows is None:
+                # Add the day before the first day that comes after it.
+                row = next((row for row, value in enumerate(self._rows) if
+                            value < 0 and -value > ordinal),
+                           len(self._rows))
+                self.beginInsertRows(QModelIndex(), row, row + 1)
+                self._rows[row:row] = [-ordinal, source_row]
+                self._days[ordinal] = self.calcul_day([source_row])
+                self.endInsertRows()
+            else:
+                # The activities of a day are kept in the order of the
+                # source model.
+                header, row = rows
+                while row > header + 1 and self._rows[row - 1] > source_row:
+                    row -= 1
+                self.beginInsertRows(QModelIndex(), row, row)
+                self._rows.insert(row, source_row)
+                self.endInsertRows()
+        self.update_days(ordinals)
+        self.sig_sourcemodel_changed.emit()
+
+    def source_rows_removed(self, parent, first, last):
+        """
+        Remove the rows that were removed from the source model from the
+        layout of their day, with row-level signals. The header of the
+        days that have no activity left is removed as well.
+        """
+        count = last - first + 1
+        removed = []
+        ordinals = set()
+        ordinal = None
+        for row, value in enumerate(self._rows):
+            if value < 0:
+                ordinal = -value
+            elif value > last:
+                self._rows[row] = value - count
+            elif value >= first:
+                removed.append(row)
+                ordinals.add(ordinal)
+
+        # The header rows of the days with no activity left are removed.
+        removed_set = set(removed)
+        for ordinal in ordinals:
+            header, last_row = self.day_rows(ordinal)
+            if all(row in removed_set for row in
+                   range(header + 1, last_row)):
+                removed.append(header)
+
+        for first_row, last_row in reversed(
+                group_contiguous(sorted(removed))):
+            self.beginRemoveRows(QModelIndex(), first_row, last_row)
+            del self._rows[first_row:last_row + 1]
+            self.endRemoveRows()
+        self.update_days(ordinals)
+        self.sig_sourcemodel_changed.emit()
+
+    def source_data_changed(self, top_left, bottom_right):
+        """
+        Update the table when the data of the source model changed. The
+        model is reset only if the edited activities moved to another day
+        or are no longer accepted by the filters, so that the selection
+        is preserved otherwise.
+        """
+        rows, days = self.calcul_layout()
+        if rows != self._rows:
+            self.update_layout()
+        else:
+            self._days = days
+            if self._rows:
+                self.dataChanged.emit(
+                    self.index(0, 0),
+                    self.index(len(self._rows) - 1, self.columnCount() - 1))
+            self.update_total_seconds()
+        self.sig_sourcemodel_changed.emit()
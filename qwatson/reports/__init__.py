@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+"""
+Qt free reports of the durations of the activities logged with QWatson,
+which can be produced from the command line without starting the GUI.
+"""
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A command line interface to produce the reports and the exports of the
+activities logged with QWatson, and to import those of watson, without
+starting the GUI.
+
+Usage example from a shell :
+
+    python -m qwatson.reports.cli report --from 2018-01-01 --by week
+    python -m qwatson.reports.cli report --by project --format csv
+    python -m qwatson.reports.cli export --from 2018-06-01 --format jsonl
+    python -m qwatson.reports.cli import ~/.config/watson
+"""
+
+# ---- Standard imports
+
+import datetime
+import os
+
+# ---- Third parties imports
+
+import click
+from watson.watson import WatsonError
+
+# ---- Local imports
+
+from qwatson.reports.engine import GROUPS, make_report
+from qwatson.reports.export import EXPORT_FORMATS, export_frames, iter_export
+from qwatson.reports.formatters import FORMATS, format_report
+from qwatson.watson_ext.watsonextends import Watson
+
+
+def date_range_options(func):
+    """Add the options of the range of dates of a command."""
+    func = click.option(
+        '--to', 'last', default=None,
+        type=click.DateTime(formats=['%Y-%m-%d']),
+        help="The last date of the range.  [default: today]")(func)
+    func = click.option(
+        '--from', 'first', default=None,
+        type=click.DateTime(formats=['%Y-%m-%d']),
+        help="The first date of the range.  [default: 6 days before "
+             "the last date]")(func)
+    return func
+
+
+def get_date_range(first, last):
+    """Return the first and last dates of the range of the options."""
+    last = datetime.date.today() if last is None else last.date()
+    first = (last - datetime.timedelta(days=6) if first is None else
+             first.date())
+    if first > last:
+        raise click.BadParameter("must not be after --to", param_hint='--from')
+    return first, last
+
+
+@click.group()
+@click.option('--config-dir', default=None,
+              help="The config dir of QWatson.")
+@click.pass_context
+def cli(ctx, config_dir):
+    """Report, export or import the activities logged with QWatson."""
+    ctx.obj = Watson(config_dir=(config_dir or
+                                 os.environ.get('QWATSON_DIR') or
+                                 click.get_app_dir('QWatson')))
+
+
+@cli.command()
+@date_range_options
+@click.option('--by', default='day', show_default=True,
+              type=click.Choice(GROUPS))
+@click.option('--project', default=None,
+              help="Only report the activities of this project.")
+@click.option('--tag', default=None,
+              help="Only report the activities with this tag.")
+@click.option('--format', 'fmt', default='table', show_default=True,
+              type=click.Choice(FORMATS))
+@click.pass_obj
+def report(client, first, last, by, project, tag, fmt):
+    """Report the durations of the activities."""
+    first, last = get_date_range(first, last)
+    try:
+        rows = make_report(client, first, last, by, project, tag)
+    except (OSError, ValueError) as e:
+        raise click.ClickException(
+            "Unable to read %s: %s" % (client.frames_file, e))
+    click.echo(format_report(rows, by, first, last, fmt), nl=fmt != 'csv')
+
+
+@cli.command()
+@date_range_options
+@click.option('--project', default=None,
+              help="Only export the activities of this project.")
+@click.option('--tag', default=None,
+              help="Only export the activities with this tag.")
+@click.option('--format', 'fmt', default='csv', show_default=True,
+              type=click.Choice(EXPORT_FORMATS))
+@click.option('--output', default='-', show_default=True,
+              help="The file where the activities are written.")
+@click.pass_obj
+def export(client, first, last, project, tag, fmt, output):
+    """Export the activities one per line."""
+    first, last = get_date_range(first, last)
+    frames = export_frames(client, first, last, project, tag)
+    try:
+        with click.open_file(output, 'w', encoding='utf-8') as f:
+            for line in iter_export(frames, fmt):
+                f.write(line)
+    except (OSError, ValueError) as e:
+        raise click.ClickException(
+            "Unable to export %s: %s" % (client.frames_file, e))
+
+
+@cli.command('import')
+@click.argument('path', type=click.Path(exists=True))
+@click.pass_obj
+def import_frames(client, path):
+    """Merge the activities of a watson data dir or of a frames file."""
+    try:
+        report = client.import_frames(path)
+        client.save()
+    except WatsonError as e:
+        raise click.ClickException(str(e))
+    click.echo("%d added, %d updated, %d unchanged" % report)
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+The aggregation of the durations of the activities saved in a QWatson config
+dir per day, week, month, project or tag over a range of dates.
+"""
+
+# ---- Standard imports
+
+from collections import namedtuple
+import datetime
+import os.path as osp
+
+# ---- Local imports
+
+from qwatson.reports.framesfile import (
+    iter_raw_frames, raw_tags, to_timestamp)
+from qwatson.reports.snapshot import ReportSnapshot
+from qwatson.utils import instrumentation
+from qwatson.utils.fileio import get_file_signature
+from qwatson.utils.timecodec import codec
+from qwatson.watson_ext.rollups import RollupStore
+
+GROUPS = ('day', 'week', 'month', 'project', 'tag')
+
+# The name of the snapshot file of the reports in the config dir.
+SNAPSHOT_NAME = 'reports.snapshot'
+
+ReportRow = namedtuple('ReportRow', ['key', 'seconds', 'count'])
+
+
+@instrumentation.timed('reports.scan_frames')
+def scan_frames(filename):
+    """
+    Return a RollupStore computed in a single streaming pass over the raw
+    values of the frames saved in the file, without creating the Frame and
+    the arrow objects of the frames. A ValueError is raised if the file is
+    not valid.
+    """
+    store = RollupStore()
+    try:
+        f = open(filename, 'rb')
+    except FileNotFoundError:
+        return store
+    with f:
+        for values in iter_raw_frames(f):
+            start = to_timestamp(values[0])
+            store.add_values(codec.local_ordinal(start),
+                             to_timestamp(values[1]) - start,
+                             values[2], raw_tags(values))
+    return store
+
+
+def load_snapshot(client):
+    """
+    Return the ReportSnapshot of the frames saved in the frames file of
+    the watson_ext client from the fastest available data path.
+
+    The snapshot file is used when it was saved from the current content
+    of the frames file. Otherwise, the snapshot is made from the rollups
+    file of QWatson if it is up to date, or else from a scan of the frames
+    file, and is saved for the next reports.
+    """
+    signature = get_file_signature(client.frames_file)
+    filename = osp.join(osp.dirname(client.rollups_file), SNAPSHOT_NAME)
+    snapshot = ReportSnapshot()
+    if snapshot.load(filename, signature):
+        return snapshot
+
+    store = RollupStore()
+    if not store.load(client.rollups_file, signature):
+        store = scan_frames(client.frames_file)
+    snapshot = ReportSnapshot.from_rollups(store)
+    if signature is not None:
+        try:
+            snapshot.save(filename, signature)
+        except OSError:
+            # The snapshot is only a cache that is rebuilt from the frames
+            # when the file can't be written.
+            pass
+    return snapshot
+
+
+def group_key(date, by):
+    """Return the key of the group of the date for the day, week or month."""
+    if by == 'day':
+        return date.isoformat()
+    elif by == 'week':
+        return (date - datetime.timedelta(days=date.weekday())).isoformat()
+    elif by == 'month':
+        return date.strftime('%Y-%m')
+    raise ValueError("Invalid date group: %r" % by)
+
+
+def aggregate(snapshot, first, last, by='day', project=None, tag=None):
+    """
+    Return the list of the ReportRow of the total seconds and the number of
+    the activities of the ReportSnapshot that started from the first to the
+    last date, grouped by day, week, month, project or tag and sorted by
+    key.
+
+    The activities can be restricted to those of a project, of a tag, or
+    both. Since an activity is counted once for each of its tags, the
+    rows grouped by tag can add up to more than the total of the range.
+    """
+    if by not in GROUPS:
+        raise ValueError("Invalid group: %r" % by)
+
+    # The group of each (project, tag) key, or None if the key is not
+    # included in the report.
+    key_groups = []
+    for _project, _tag in snapshot.keys:
+        if project is not None and _project != project:
+            key_groups.append(None)
+        elif by == 'tag':
+            key_groups.append(None if _tag is None or
+                              (tag is not None and _tag != tag) else _tag)
+        elif _tag != tag:
+            key_groups.append(None)
+        else:
+            key_groups.append(_project if by == 'project' else True)
+
+    totals = {}
+    date_keys = {}
+    for ordinal, key_id, seconds, count in snapshot.entries(
+            first.toordinal(), last.toordinal()):
+        key = key_groups[key_id]
+        if key is None:
+            continue
+        elif key is True:
+            try:
+                key = date_keys[ordinal]
+            except KeyError:
+                key = date_keys[ordinal] = group_key(
+                    datetime.date.fromordinal(ordinal), by)
+        try:
+            value = totals[key]
+        except KeyError:
+            value = totals[key] = [0, 0]
+        value[0] += seconds
+        value[1] += count
+    return [ReportRow(key, seconds, count) for
+            key, (seconds, count) in sorted(totals.items())]
+
+
+@instrumentation.timed('reports.make_report')
+def make_report(client, first, last, by='day', project=None, tag=None):
+    """
+    Return the list of the ReportRow of the activities saved in the config
+    dir of the watson_ext client, as described in aggregate.
+    """
+    return aggregate(load_snapshot(client), first, last, by, project, tag)
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+The streaming export of the frames saved in a QWatson config dir that
+started within a range of dates, as CSV or JSON Lines.
+"""
+
+# ---- Standard imports
+
+import csv
+import datetime
+import io
+import json
+
+# ---- Third parties imports
+
+import arrow
+
+# ---- Local imports
+
+from qwatson.reports.framesfile import (
+    find_start_offset, iter_raw_frames, raw_tags, to_timestamp)
+from qwatson.utils.fileio import get_file_signature
+from qwatson.utils.timecodec import codec
+from qwatson.watson_ext.rollups import RollupStore
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+# The fields of the exported frames.
+FIELDS = ('id', 'start', 'stop', 'seconds', 'project', 'tags', 'message')
+
+
+def day_timestamp(date):
+    """Return the epoch seconds of the local midnight of the date."""
+    return codec.to_timestamp(arrow.Arrow(
+        date.year, date.month, date.day, tzinfo=codec.tzinfo))
+
+
+def is_frames_file_sorted(client):
+    """
+    Return whether the frames saved in the frames file of the watson_ext
+    client are known to be sorted by start time, from the rollups file
+    that QWatson saved along with the current content of the frames file.
+    """
+    store = RollupStore()
+    return (store.load(client.rollups_file,
+                       get_file_signature(client.frames_file)) and
+            store.frames_sorted is True)
+
+
+def export_frames(client, first, last, project=None, tag=None):
+    """
+    Iterate over the raw values of the frames saved in the frames file of
+    the watson_ext client that started from the first to the last date.
+    The frames can be restricted to those of a project, of a tag, or both.
+
+    When the frames are known to be sorted by start time, they are read
+    one at a time from the first frame of the range, which is found by
+    bisection over the bytes of the frames file, so that the older frames
+    are not decoded. Otherwise, the whole file is scanned, so that the
+    frames that are not sorted are not missed. See is_frames_file_sorted.
+    """
+    start = day_timestamp(first)
+    end = day_timestamp(last + datetime.timedelta(days=1))
+    frames_sorted = is_frames_file_sorted(client)
+    try:
+        f = open(client.frames_file, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        offset = find_start_offset(f, start) if frames_sorted else 0
+        if offset is None:
+            return
+        for values in iter_raw_frames(f, offset):
+            frame_start = to_timestamp(values[0])
+            if frame_start >= end:
+                if frames_sorted:
+                    return
+                continue
+            elif frame_start < start:
+                continue
+            if project is not None and values[2] != project:
+                continue
+            if tag is not None and tag not in raw_tags(values):
+                continue
+            yield values
+
+
+def frame_record(values):
+    """
+    Return a dict with the FIELDS of the raw values of a frame, with the
+    start and stop formatted as local ISO 8601 date times.
+    """
+    start = to_timestamp(values[0])
+    stop = to_timestamp(values[1])
+    return {'id': values[3],
+            'start': codec.to_local(start).isoformat(),
+            'stop': codec.to_local(stop).isoformat(),
+            'seconds': stop - start,
+            'project': values[2],
+            'tags': raw_tags(values),
+            'message': (values[6] if len(values) > 6 else None) or ''}
+
+
+def iter_csv(frames):
+    """
+    Iterate over the lines of the CSV of the raw values of the frames,
+    starting with the header. The tags are separated by commas.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow(FIELDS)
+    yield output.getvalue()
+    for values in frames:
+        output.seek(0)
+        output.truncate()
+        record = frame_record(values)
+        record['tags'] = ', '.join(record['tags'])
+        writer.writerow([record[field] for field in FIELDS])
+        yield output.getvalue()
+
+
+def iter_jsonl(frames):
+    """Iterate over the JSON lines of the raw values of the frames."""
+    for values in frames:
+        yield json.dumps(frame_record(values), ensure_ascii=False) + '\n'
+
+
+def iter_export(frames, fmt='csv'):
+    """Iterate over the lines of the frames in the 'csv' or 'jsonl' format."""
+    if fmt == 'csv':
+        return iter_csv(frames)
+    elif fmt == 'jsonl':
+        return iter_jsonl(frames)
+    raise ValueError("Invalid format: %r" % fmt)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+The formatting of the rows of the reports as a text table, CSV or JSON.
+"""
+
+# ---- Standard imports
+
+import csv
+import io
+import json
+
+# ---- Local imports
+
+from qwatson.utils.dates import total_seconds_to_hour_min
+
+FORMATS = ('table', 'csv', 'json')
+
+
+def format_table(rows, by):
+    """Return the rows as a text table with a total line."""
+    lines = [(by.capitalize(), 'Duration', 'Activities')]
+    for row in rows:
+        lines.append((row.key or '(no %s)' % by,
+                      total_seconds_to_hour_min(row.seconds),
+                      str(row.count)))
+    lines.append(('Total',
+                  total_seconds_to_hour_min(sum(r.seconds for r in rows)),
+                  str(sum(row.count for row in rows))))
+    widths = [max(len(line[i]) for line in lines) for i in range(3)]
+    text = ['%-*s  %*s  %*s' % (widths[0], line[0], widths[1], line[1],
+                                widths[2], line[2]) for line in lines]
+    separator = ['-' * len(text[0])]
+    return '\n'.join(text[:1] + separator + text[1:-1] +
+                     (separator if rows else []) + text[-1:])
+
+
+def format_csv(rows, by):
+    """Return the rows as CSV with the total seconds of each group."""
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow([by, 'seconds', 'count'])
+    for row in rows:
+        writer.writerow([row.key, int(round(row.seconds)), row.count])
+    return output.getvalue()
+
+
+def format_json(rows, by, first, last):
+    """Return the rows as a JSON document along with the date range."""
+    return json.dumps({
+        'from': first.isoformat(),
+        'to': last.isoformat(),
+        'by': by,
+        'rows': [{by: row.key, 'seconds': int(round(row.seconds)),
+                  'count': row.count} for row in rows],
+        'seconds': int(round(sum(row.seconds for row in rows))),
+        'count': sum(row.count for row in rows)},
+        indent=1, ensure_ascii=False)
+
+
+def format_report(rows, by, first, last, fmt='table'):
+    """Return the rows formatted as a 'table', 'csv' or 'json' str."""
+    if fmt == 'table':
+        return format_table(rows, by)
+    elif fmt == 'csv':
+        return format_csv(rows, by)
+    elif fmt == 'json':
+        return format_json(rows, by, first, last)
+    raise ValueError("Invalid format: %r" % fmt)
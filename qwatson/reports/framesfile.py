@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A streaming reader of the raw values of the frames saved in a frames file,
+which decodes the frames one at a time from a byte offset of the file, and
+which finds by bisection the offset of the first frame that starts at or
+after a time.
+"""
+
+# ---- Standard imports
+
+import codecs
+import json
+import re
+
+# ---- Third parties imports
+
+import arrow
+
+# ---- Local imports
+
+from qwatson.utils.timecodec import codec
+
+CHUNK_SIZE = 65536
+
+# The size of the chunks read to find a frame during the bisection.
+PROBE_SIZE = 4096
+
+# Watson writes the frames file with an indent of 1, so that the frames,
+# and only them, start with a '[' on a line of their own after a space.
+FRAME_BOUNDARY = b'\n [\n'
+
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+def to_timestamp(value):
+    """Return the epoch seconds of a raw start or stop value of a frame."""
+    if isinstance(value, (int, float)):
+        return value
+    return codec.to_timestamp(arrow.get(value))
+
+
+def raw_tags(values):
+    """Return the list of the tags of the raw values of a frame."""
+    return (values[4] if len(values) > 4 else None) or []
+
+
+def iter_raw_frames(f, offset=0, chunk_size=CHUNK_SIZE):
+    """
+    Iterate over the raw values of the frames of a frames file opened in
+    binary mode, from the start of the file or from the frame that starts
+    at the byte offset. The file is read by chunks, so that the memory use
+    does not depend on the number of frames. A ValueError is raised if the
+    file is not valid.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    f.seek(offset)
+    buffer = ''
+    pos = 0
+    in_list = offset != 0
+    eof = False
+    while True:
+        pos = SEPARATORS.match(buffer, pos).end()
+        if pos < len(buffer):
+            if not in_list:
+                if buffer[pos] != '[':
+                    raise ValueError("The frames file does not contain a "
+                                     "list.")
+                in_list = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                # The frame is decoded again when more of it is read.
+                if eof:
+                    raise
+            else:
+                pos = end
+                yield value
+                continue
+        elif eof:
+            if in_list:
+                raise ValueError("The frames file is truncated.")
+            return
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + utf8.decode(chunk, final=eof)
+        pos = 0
+
+
+def _next_boundary(f, offset, end):
+    """
+    Return the byte offset of the first frame that starts at or after the
+    offset and before the end, or None if there is none.
+    """
+    position = max(offset - 1, 0)
+    f.seek(position)
+    tail = b''
+    while position < end:
+        chunk = f.read(PROBE_SIZE)
+        if not chunk:
+            return None
+        data = tail + chunk
+        index = data.find(FRAME_BOUNDARY)
+        if index != -1:
+            boundary = position - len(tail) + index + 1
+            return boundary if boundary < end else None
+        tail = data[-len(FRAME_BOUNDARY) + 1:]
+        position += len(chunk)
+    return None
+
+
+def find_start_offset(f, timestamp):
+    """
+    Return the byte offset of the first frame of a frames file opened in
+    binary mode that starts at or after the timestamp, or None if there is
+    none.
+
+    The frames are expected to be sorted by start time, so that the offset
+    is found by bisection over the bytes of the file instead of decoding
+    every frame. The start of the file is returned if the frames are not
+    written with an indent of 1.
+    """
+    f.seek(0, 2)
+    size = f.tell()
+    first = _next_boundary(f, 0, size)
+    if first is None:
+        return 0
+    lo, hi = first, size
+    while lo < hi:
+        mid = (lo + hi) // 2
+        boundary = _next_boundary(f, mid, hi)
+        if boundary is None:
+            hi = mid
+            continue
+        values = next(iter_raw_frames(f, boundary, PROBE_SIZE))
+        if to_timestamp(values[0]) < timestamp:
+            lo = boundary + 1
+        else:
+            hi = mid
+    return _next_boundary(f, lo, size)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A compact snapshot of the rollups of the frames for the reports, which is
+stored as columns of binary numbers so that it can be read back without
+parsing a JSON document with an entry per day, project and tag.
+"""
+
+# ---- Standard imports
+
+from array import array
+from bisect import bisect_left, bisect_right
+import json
+import os.path as osp
+import sys
+
+# The version of the format of the snapshot file. The snapshot is rebuilt
+# when the file was written with another version.
+SNAPSHOT_VERSION = 1
+
+# The typecodes of the columns of the snapshot.
+COLUMNS = (('ordinals', 'i'), ('key_ids', 'i'),
+           ('seconds', 'd'), ('counts', 'i'))
+
+
+class ReportSnapshot(object):
+    """
+    The total duration and the number of the activities per local day,
+    project and tag, as in a RollupStore, stored as parallel columns that
+    are sorted by day ordinal.
+
+    The (project, tag) keys are stored once in the keys list and are
+    referred to by their index in the key_ids column.
+    """
+
+    def __init__(self):
+        self.keys = []
+        for name, typecode in COLUMNS:
+            setattr(self, name, array(typecode))
+        self.signature = None
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    @classmethod
+    def from_rollups(cls, store):
+        """Return the snapshot of the rollups of a RollupStore."""
+        snapshot = cls()
+        key_ids = {}
+        for ordinal, rollups in store.days(-sys.maxsize, sys.maxsize):
+            for key, (seconds, count) in rollups.items():
+                try:
+                    key_id = key_ids[key]
+                except KeyError:
+                    key_id = key_ids[key] = len(snapshot.keys)
+                    snapshot.keys.append(key)
+                snapshot.ordinals.append(ordinal)
+                snapshot.key_ids.append(key_id)
+                snapshot.seconds.append(seconds)
+                snapshot.counts.append(count)
+        return snapshot
+
+    def entries(self, first, last):
+        """
+        Return an iterator over the (ordinal, key_id, seconds, count) of
+        the days from the first to the last ordinal, inclusively.
+        """
+        start = bisect_left(self.ordinals, first)
+        stop = bisect_right(self.ordinals, last)
+        return zip(self.ordinals[start:stop], self.key_ids[start:stop],
+                   self.seconds[start:stop], self.counts[start:stop])
+
+    # ---- Persistence
+
+    def save(self, filename, signature):
+        """
+        Write the snapshot to a file as a JSON header line with the keys,
+        the version of the format and the signature of the frames file,
+        followed by the bytes of the columns.
+        """
+        self.signature = signature
+        header = {'version': SNAPSHOT_VERSION,
+                  'signature': signature,
+                  'byteorder': sys.byteorder,
+                  'itemsizes': [getattr(self, name).itemsize for
+                                name, typecode in COLUMNS],
+                  'length': len(self),
+                  'keys': self.keys}
+        with open(filename, 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            for name, typecode in COLUMNS:
+                getattr(self, name).tofile(f)
+
+    def load(self, filename, signature):
+        """
+        Read the snapshot from a file and return whether it was computed
+        from the frames file with the specified signature with the current
+        version of the format on a platform with the same number types.
+        The snapshot is left empty otherwise.
+        """
+        self.__init__()
+        if signature is None or not osp.exists(filename):
+            return False
+        try:
+            with open(filename, 'rb') as f:
+                header = json.loads(f.readline().decode('utf-8'))
+                if (header.get('version') != SNAPSHOT_VERSION or
+                        header.get('signature') != list(signature) or
+                        header.get('byteorder') != sys.byteorder or
+                        header.get('itemsizes') != [
+                            getattr(self, name).itemsize for
+                            name, typecode in COLUMNS]):
+                    return False
+                for name, typecode in COLUMNS:
+                    getattr(self, name).fromfile(f, header['length'])
+        except (OSError, ValueError, EOFError):
+            self.__init__()
+            return False
+        self.keys = [tuple(key) for key in header['keys']]
+        self.signature = signature
+        return True
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import datetime
+import json
+import os
+
+# ---- Third party imports
+
+import arrow
+from click.testing import CliRunner
+import pytest
+
+# ---- Local imports
+
+from qwatson.reports import export
+from qwatson.reports.cli import cli
+from qwatson.reports.export import export_frames
+from qwatson.reports.framesfile import find_start_offset, iter_raw_frames
+from qwatson.watson_ext.watsonextends import Watson
+
+FIRST = datetime.date(2018, 6, 11)
+
+
+@pytest.fixture
+def client(tmpdir):
+    """A client with the frames of 30 days saved in its frames file."""
+    client = Watson(config_dir=str(tmpdir))
+    start = arrow.get(FIRST).replace(tzinfo='local').shift(hours=9)
+    for day in range(30):
+        for i, project in enumerate(['qwatson', 'admin'][:day % 2 + 1]):
+            client.frames.add(project, start.shift(days=day, hours=i),
+                              start.shift(days=day, hours=i, minutes=45),
+                              tags=['dev'] if i == 0 else [],
+                              message='Réunion %d' % day)
+    client.save()
+    return client
+
+
+def test_iter_raw_frames(client):
+    """
+    Test that the frames are decoded one at a time from the start of the
+    file or from the byte offsets found by bisection.
+    """
+    dumped = [list(values) for values in client.frames.dump()]
+    with open(client.frames_file, 'rb') as f:
+        # Small chunks split the frames and the non ascii characters.
+        assert list(iter_raw_frames(f, chunk_size=7)) == dumped
+
+        for frame in dumped[::5] + [dumped[-1]]:
+            for timestamp in (frame[0] - 1, frame[0]):
+                offset = find_start_offset(f, timestamp)
+                assert next(iter_raw_frames(f, offset)) == [
+                    values for values in dumped if
+                    values[0] >= timestamp][0]
+        assert find_start_offset(f, dumped[0][0] - 86400) == 2
+        assert find_start_offset(f, dumped[-1][0] + 1) is None
+
+    # The frames are read from the start of the files that are not written
+    # with an indent of 1.
+    with open(client.frames_file, 'w') as f:
+        json.dump(dumped, f)
+    with open(client.frames_file, 'rb') as f:
+        assert find_start_offset(f, dumped[-1][0]) == 0
+        assert list(iter_raw_frames(f, chunk_size=16)) == dumped
+
+    with open(client.frames_file, 'w') as f:
+        f.write(json.dumps(dumped, indent=1)[:-20])
+    with pytest.raises(ValueError):
+        with open(client.frames_file, 'rb') as f:
+            list(iter_raw_frames(f))
+
+
+def test_export_frames(client):
+    """
+    Test that the frames of a range of dates are exported, with the
+    project and tag filters.
+    """
+    dumped = [list(values) for values in client.frames.dump()]
+    first = FIRST + datetime.timedelta(days=3)
+    last = FIRST + datetime.timedelta(days=9)
+    assert list(export_frames(client, first, last)) == dumped[4:15]
+    assert list(export_frames(client, first, last, project='admin')) == [
+        values for values in dumped[4:15] if values[2] == 'admin']
+    assert list(export_frames(client, first, last, tag='dev')) == [
+        values for values in dumped[4:15] if values[4] == ['dev']]
+    assert list(export_frames(
+        client, last + datetime.timedelta(days=30), last +
+        datetime.timedelta(days=31))) == []
+
+
+def test_export_unsorted_frames(client, mocker):
+    """
+    Test that the frames file is bisected only when its frames are known
+    to be sorted by start time, so that the frames that are not sorted are
+    exported with the frames of their day.
+    """
+    find_start_offset = mocker.spy(export, 'find_start_offset')
+    day = FIRST + datetime.timedelta(days=3)
+    expected = list(export_frames(client, day, day))
+    assert len(expected) == 2
+    assert find_start_offset.call_count == 0
+
+    # The rollups are saved along with whether the frames are sorted.
+    assert client.rollups.frames_sorted is True
+    assert list(export_frames(client, day, day)) == expected
+    assert find_start_offset.call_count == 1
+
+    # A frame of the day before the first one is stored after the others.
+    day = FIRST - datetime.timedelta(days=1)
+    start = arrow.get(day).replace(tzinfo='local').shift(hours=9)
+    frame = client.frames.add('late', start, start.shift(hours=1))
+    client.save()
+    assert client.rollups.frames_sorted is False
+    assert [values[3] for values in export_frames(client, day, day)] == [
+        frame.id]
+    assert find_start_offset.call_count == 1
+
+
+def test_export_cli(client):
+    """Test that the frames are exported as CSV and as JSON lines."""
+    runner = CliRunner()
+    args = ['--config-dir', client._dir, 'export', '--from', '2018-06-12',
+            '--to', '2018-06-12']
+
+    result = runner.invoke(cli, args)
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert lines[0] == 'id,start,stop,seconds,project,tags,message'
+    assert len(lines) == 3
+    assert lines[1].split(',')[3:] == ['2700', 'qwatson', 'dev',
+                                       'Réunion 1']
+    assert lines[2].split(',')[3:] == ['2700', 'admin', '', 'Réunion 1']
+
+    result = runner.invoke(cli, args + ['--format', 'jsonl',
+                                        '--project', 'admin'])
+    records = [json.loads(line) for line in result.output.splitlines()]
+    frame = client.frames[2]
+    assert records == [{
+        'id': frame.id, 'start': frame.start.isoformat(),
+        'stop': frame.stop.isoformat(), 'seconds': 2700,
+        'project': 'admin', 'tags': [], 'message': 'Réunion 1'}]
+
+
+def test_import_cli(client, tmpdir):
+    """Test that the frames of a watson data dir are imported."""
+    other = Watson(config_dir=str(tmpdir.mkdir('watson')))
+    other.frames.insert_frames(0, list(client.frames)[-3:])
+    other.frames.add('watson', arrow.now().shift(hours=-1), arrow.now())
+    other.save()
+
+    runner = CliRunner()
+    args = ['--config-dir', client._dir, 'import', other._dir]
+    result = runner.invoke(cli, args)
+    assert result.output == '1 added, 0 updated, 3 unchanged\n'
+    assert Watson(config_dir=client._dir).frames[-1].id == (
+        other.frames[-1].id)
+    result = runner.invoke(cli, args)
+    assert result.output == '0 added, 0 updated, 4 unchanged\n'
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import datetime
+import json
+import os
+import os.path as osp
+import subprocess
+import sys
+
+# ---- Third party imports
+
+import arrow
+from click.testing import CliRunner
+import pytest
+
+# ---- Local imports
+
+from qwatson.reports.cli import cli
+from qwatson.reports.engine import (
+    GROUPS, SNAPSHOT_NAME, ReportRow, make_report)
+from qwatson.watson_ext.watsonextends import Watson
+
+FIRST = datetime.date(2018, 6, 11)
+LAST = datetime.date(2018, 7, 8)
+
+
+@pytest.fixture
+def config_dir(tmpdir):
+    """A config dir with the frames of four weeks saved in it."""
+    client = Watson(config_dir=str(tmpdir))
+    start = arrow.get(FIRST).replace(tzinfo='local').shift(hours=9)
+    for day in range(28):
+        for i, (project, tags) in enumerate([('qwatson', ['dev']),
+                                             ('qwatson', ['dev', 'review']),
+                                             ('admin', [])][:day % 3 + 1]):
+            client.frames.add(project, start.shift(days=day, hours=i),
+                              start.shift(days=day, hours=i, minutes=30))
+            client.frames[-1] = client.frames[-1]._replace(tags=tags)
+    client.save()
+    return str(tmpdir)
+
+
+def test_report_data_paths(config_dir):
+    """
+    Test that the reports are the same whether they are made from a scan
+    of the frames file, from the rollups file or from the snapshot.
+    """
+    client = Watson(config_dir=config_dir)
+    expected = {by: make_report(client, FIRST, LAST, by) for by in GROUPS}
+    assert osp.exists(osp.join(config_dir, SNAPSHOT_NAME))
+    assert not osp.exists(client.rollups_file)
+
+    assert expected['project'] == [
+        ReportRow('admin', 9 * 1800, 9), ReportRow('qwatson', 46 * 1800, 46)]
+    assert expected['tag'] == [
+        ReportRow('', 9 * 1800, 9), ReportRow('dev', 46 * 1800, 46),
+        ReportRow('review', 18 * 1800, 18)]
+    assert [row.key for row in expected['week']] == [
+        '2018-06-11', '2018-06-18', '2018-06-25', '2018-07-02']
+    assert sum(row.count for row in expected['day']) == 55
+    assert make_report(client, FIRST, FIRST, 'project', tag='review') == []
+    assert make_report(client, FIRST, LAST, 'month', project='admin',
+                       tag='') == [ReportRow('2018-06', 6 * 1800, 6),
+                                   ReportRow('2018-07', 3 * 1800, 3)]
+
+    # The reports are made from the snapshot when it is up to date.
+    for by in GROUPS:
+        assert make_report(client, FIRST, LAST, by) == expected[by]
+
+    # The reports are made from the rollups file of QWatson otherwise.
+    os.remove(osp.join(config_dir, SNAPSHOT_NAME))
+    client.rollups
+    assert osp.exists(client.rollups_file)
+    for by in GROUPS:
+        assert make_report(
+            Watson(config_dir=config_dir), FIRST, LAST, by) == expected[by]
+
+    # The snapshot is rebuilt when the frames file is changed.
+    client.frames.add('admin', arrow.get(LAST).replace(tzinfo='local'),
+                      arrow.get(LAST).replace(tzinfo='local').shift(hours=1))
+    client.save()
+    assert make_report(client, FIRST, LAST, 'project')[0] == (
+        ReportRow('admin', 11 * 1800, 10))
+
+
+def test_report_cli(config_dir):
+    """Test that the reports are output as a table, as CSV and as JSON."""
+    runner = CliRunner()
+    args = ['--config-dir', config_dir, 'report', '--from', '2018-06-11',
+            '--to', '2018-06-17', '--by', 'project']
+
+    result = runner.invoke(cli, args)
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert lines[0].split() == ['Project', 'Duration', 'Activities']
+    assert lines[2].split() == ['admin', '1h', '0min', '2']
+    assert lines[-1].split() == ['Total', '6h', '30min', '13']
+
+    result = runner.invoke(cli, args + ['--format', 'csv'])
+    assert result.output == 'project,seconds,count\nadmin,3600,2\n' \
+                            'qwatson,19800,11\n'
+
+    result = runner.invoke(cli, args + ['--format', 'json', '--tag', 'dev'])
+    assert json.loads(result.output) == {
+        'from': '2018-06-11', 'to': '2018-06-17', 'by': 'project',
+        'rows': [{'project': 'qwatson', 'seconds': 19800, 'count': 11}],
+        'seconds': 19800, 'count': 11}
+
+    result = runner.invoke(cli, args + ['--from', '2018-06-18'])
+    assert result.exit_code != 0
+
+
+def test_reports_without_qt():
+    """Test that the reports can be made without importing PyQt5."""
+    subprocess.check_call([
+        sys.executable, '-c',
+        "import sys; import qwatson.reports.cli; "
+        "assert 'PyQt5' not in sys.modules"])
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
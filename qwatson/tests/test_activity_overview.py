@@ -16,17 +16,23 @@ import json
 
 import pytest
 from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QMessageBox
 
 # ---- Local imports
 
-from qwatson.watson_ext.watsonextends import Frames
+from qwatson.watson_ext.watsonextends import Frames, Watson
 from qwatson.mainwindow import QWatson
-from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.utils.dates import arrowspan_to_str, local_arrow_from_tuple
 from qwatson.utils.fileio import delete_folder_recursively
 from qwatson.utils.dates import qdatetime_from_str
 from qwatson.models.delegates import (DateTimeDelegate, LineEditDelegate,
                                       TagEditDelegate, ToolButtonDelegate)
+from qwatson.models.tablemodels import (
+    CONFLICT_COLOR, DayHeaderRole, RawValueRole, WatsonSortFilterProxyModel,
+    WatsonSpanTableModel, WatsonTableModel)
+from qwatson.watson_ext.events import FramesRemoved, ProjectDeleted
+from qwatson.watson_ext.framefilters import FrameFilter
 
 
 # ---- Fixtures and utilities
@@ -110,11 +116,10 @@ def test_overview_init(qwatson, span):
     assert overview.table_widg.get_row_count() == [2, 2, 2, 2, 2, 2, 2]
 
     # Test that the tag and project filters are all checked.
-    for item, action in overview.filter_btn.projects_menu._actions.items():
-        assert action.defaultWidget().isChecked()
-
-    for item, action in overview.filter_btn.tags_menu._actions.items():
-        assert action.defaultWidget().isChecked()
+    for menu in (overview.filter_btn.projects_menu,
+                 overview.filter_btn.tags_menu):
+        assert menu.select_all_chbox.isChecked()
+        assert menu.checked_items() == menu.model.items()
 
 
 def test_overview_row_selection(qwatson, qtbot):
@@ -195,6 +200,38 @@ def test_mouse_hovered_row(qwatson, qtbot):
     assert tables[4].view._hovered_row == 0
 
 
+def test_hovered_row_damage_region(qwatson, qtbot, mocker):
+    """
+    Test that changing the mouse hovered row only repaints the rows whose
+    highlighting changed, and that the hover updates are throttled when
+    scrolling.
+    """
+    table_widg = qwatson.overview_widg.table_widg
+    view = table_widg.tables[1].view
+
+    updated_rects = []
+    mocker.patch.object(view.viewport(), 'update',
+                        side_effect=lambda *args: updated_rects.append(args))
+    view.set_hovered_row(0)
+    view.set_hovered_row(1)
+    assert updated_rects == [(view.row_rect(0),),
+                             (view.row_rect(0),), (view.row_rect(1),)]
+    assert view.row_rect(1).height() == view.rowHeight(1)
+    assert view.row_rect(None) is None
+    assert view.row_rect(99) is None
+
+    # The table under the mouse cursor is found by its vertical position.
+    for table in table_widg.tables:
+        assert table_widg.table_at(table.y() + 1) is table
+
+    # Several changes of the scrollbar value between two screen refreshes
+    # update the hovered row only once.
+    mocked = mocker.patch.object(table_widg, 'srollbar_value_changed')
+    for value in range(5):
+        table_widg.schedule_hovered_row_update(value)
+    qtbot.waitUntil(lambda: mocked.call_count == 1)
+
+
 @pytest.mark.parametrize("attr", ['projects_menu', 'tags_menu'])
 def test_select_all_filter(qwatson, attr):
     """Test checking/unchecking all project and tag filters at once."""
@@ -202,17 +239,14 @@ def test_select_all_filter(qwatson, attr):
     menu = getattr(overview.filter_btn, attr)
 
     # Uncheck (Select All).
-    menu._actions['__select_all__'].defaultWidget().setChecked(False)
-    for item, action in menu._actions.items():
-        assert not action.defaultWidget().isChecked()
+    menu.select_all_chbox.setChecked(False)
     assert menu.checked_items() == []
     assert overview.table_widg.get_row_count() == [0, 0, 0, 0, 0, 0, 0]
     assert overview.table_widg.total_seconds == 0
 
     # Check (Select All).
-    menu._actions['__select_all__'].defaultWidget().setChecked(True)
-    for item, action in menu._actions.items():
-        assert action.defaultWidget().isChecked()
+    menu.select_all_chbox.setChecked(True)
+    assert menu.checked_items() == menu.model.items()
     assert overview.table_widg.get_row_count() == [2, 2, 2, 2, 2, 2, 2]
     assert overview.table_widg.total_seconds == 7*(2*6)*60*60
 
@@ -224,20 +258,20 @@ def test_filter_activities(qwatson):
     tags_menu = overview.filter_btn.tags_menu
 
     # Uncheck the (Select All) in the projects and tags menu.
-    projects_menu._actions['__select_all__'].defaultWidget().setChecked(False)
-    tags_menu._actions['__select_all__'].defaultWidget().setChecked(False)
+    projects_menu.select_all_chbox.setChecked(False)
+    tags_menu.select_all_chbox.setChecked(False)
 
     # Check some projects.
     checked_projects = ['p0', 'p1', 'p4', 'p6', 'p7']
     for project in checked_projects:
-        projects_menu._actions[project].defaultWidget().setChecked(True)
+        projects_menu.set_item_checked(project, True)
 
     # Check some tags.
     # Note that the activity associated with the tag '#10' won't be shown
     # because its associated project is not checked.
     checked_tags = ['#0', '#1', '#6', '#10']
     for tag in checked_tags:
-        tags_menu._actions[tag].defaultWidget().setChecked(True)
+        tags_menu.set_item_checked(tag, True)
 
     assert overview.table_widg.get_row_count() == [2, 0, 0, 1, 0, 0, 0]
     assert projects_menu.checked_items() == ['p0', 'p1', 'p4', 'p6', 'p7']
@@ -245,12 +279,42 @@ def test_filter_activities(qwatson):
     assert overview.table_widg.total_seconds == 3*(6*60*60)
 
     # Check tag 'test'.
-    tags_menu._actions['test'].defaultWidget().setChecked(True)
+    tags_menu.set_item_checked('test', True)
     assert overview.table_widg.get_row_count() == [2, 0, 1, 2, 0, 0, 0]
     assert tags_menu.checked_items() == ['#0', '#1', '#10', '#6', 'test']
     assert overview.table_widg.total_seconds == 5*(6*60*60)
 
 
+def test_filters_are_evaluated_once_per_span(qwatson, mocker):
+    """
+    Test that the rows accepted by the filters are evaluated once for the
+    week and shared by the tables of the days.
+    """
+    overview = qwatson.overview_widg
+    table_widg = overview.table_widg
+    accepted_rows = mocker.spy(FrameFilter, 'accepted_rows')
+
+    table_widg.set_project_filters({'p0': False, 'p3': False})
+    assert accepted_rows.call_count == 1
+    assert table_widg.get_row_count() == [1, 1, 2, 2, 2, 2, 2]
+    assert table_widg.total_seconds == 12*(6*60*60)
+
+    # The filters are not evaluated again when they did not change.
+    table_widg.set_project_filters({'p0': False, 'p3': False, 'p1': True})
+    assert accepted_rows.call_count == 1
+
+    # The rows are evaluated again when the data change.
+    index = qwatson.model.index(2, qwatson.model.COLUMNS['project'])
+    qwatson.model.editFrame(index, project='p0')
+    assert accepted_rows.call_count == 2
+    assert table_widg.get_row_count() == [1, 0, 2, 2, 2, 2, 2]
+
+    # The rows are not evaluated when (Select All) is checked.
+    table_widg.set_project_filters(None)
+    assert table_widg.get_row_count() == [2, 2, 2, 2, 2, 2, 2]
+    assert accepted_rows.call_count == 2
+
+
 def test_filter_no_tags_or_project(qwatson):
     """Test that activities without tag or project are shown in the table."""
     overview = qwatson.overview_widg
@@ -276,13 +340,96 @@ def test_filter_no_tags_or_project(qwatson):
     assert overview.table_widg.get_row_count() == [2, 2, 2, 2, 2, 2, 2]
 
     # Uncheck the '' item in the projects and tags filter menu.
-    projects_menu._actions[''].defaultWidget().setChecked(False)
-    tags_menu._actions[''].defaultWidget().setChecked(False)
+    projects_menu.set_item_checked('', False)
+    tags_menu.set_item_checked('', False)
 
     assert overview.table_widg.total_seconds == (12*6) * (60*60)
     assert overview.table_widg.get_row_count() == [0, 2, 2, 2, 2, 2, 2]
 
 
+def test_search_activities(qwatson, span, qtbot):
+    """
+    Test that the search box of the overview goes to the weeks with
+    activities matching the search.
+    """
+    overview = qwatson.overview_widg
+    date_range_nav = overview.date_range_nav
+    qtbot.waitUntil(overview.search_box.isEnabled)
+
+    # Add activities in older weeks.
+    frames = list(qwatson.client.frames)
+    for weeks, message in [(-5, 'Release party'), (-3, 'Release notes')]:
+        frames.insert(0, qwatson.client.frames.new_frame(
+            'p9', span[0].shift(weeks=weeks), span[0].shift(weeks=weeks),
+            message=message, updated_at=span[0]))
+    frames.sort(key=lambda frame: frame.start)
+    qwatson.model.reload_frames(frames)
+
+    overview.search_box.setText('rel')
+    qtbot.keyPress(overview.search_box, Qt.Key_Enter)
+    assert date_range_nav.current == span[0].shift(weeks=-3).span('week')
+    assert overview.search_labl.text() == '1 of 2'
+
+    # Go to the next older week and wrap around to the most recent one.
+    qtbot.keyPress(overview.search_box, Qt.Key_Enter)
+    assert date_range_nav.current == span[0].shift(weeks=-5).span('week')
+    assert overview.search_labl.text() == '2 of 2'
+    qtbot.keyPress(overview.search_box, Qt.Key_Enter)
+    assert date_range_nav.current == span[0].shift(weeks=-3).span('week')
+
+    overview.search_box.setText('release par')
+    qtbot.keyPress(overview.search_box, Qt.Key_Enter)
+    assert date_range_nav.current == span[0].shift(weeks=-5).span('week')
+    assert overview.search_labl.text() == '1 of 1'
+
+    # Edit the comment of an activity of the current week.
+    date_range_nav.go_home()
+    index = qwatson.model.index(3, qwatson.model.COLUMNS['comment'])
+    qwatson.model.editFrame(index, message='Release')
+    overview.search_box.setText('release')
+    qtbot.keyPress(overview.search_box, Qt.Key_Enter)
+    assert date_range_nav.current == span
+    assert overview.search_labl.text() == '1 of 3'
+
+    overview.search_box.setText('unknown')
+    qtbot.keyPress(overview.search_box, Qt.Key_Enter)
+    assert date_range_nav.current == span
+    assert overview.search_labl.text() == 'No match'
+
+
+def test_go_to_next_conflict(qwatson, span, qtbot, mocker):
+    """
+    Test that the activities that overlap other activities are highlighted
+    and that the overview goes to the date range of the next conflict.
+    """
+    overview = qwatson.overview_widg
+    date_range_nav = overview.date_range_nav
+    model = qwatson.model
+
+    qtbot.mouseClick(overview.conflict_btn, Qt.LeftButton)
+    assert overview.conflict_labl.text() == 'No conflict'
+
+    # Extend the first activity of the week past the start of the second.
+    index = model.index(0, model.COLUMNS['end'])
+    model.editFrame(index, stop=span[0].shift(hours=19))
+    for row in (0, 1):
+        assert (model.index(row, 0).data(Qt.BackgroundRole) ==
+                QColor(CONFLICT_COLOR))
+    assert model.index(2, 0).data(Qt.BackgroundRole) != QColor(CONFLICT_COLOR)
+
+    # The stop time of the first activity can't be moved after the start
+    # of the activity that starts after it.
+    assert model.get_stop_datetime_range(index)[1] == span[0].shift(hours=18)
+
+    # The conflicts are computed once to go to the next one.
+    conflicts = mocker.spy(model.client.conflicts, 'conflicts')
+    date_range_nav.go_previous_range()
+    qtbot.mouseClick(overview.conflict_btn, Qt.LeftButton)
+    assert date_range_nav.current == span
+    assert overview.conflict_labl.text() == '1 of 1'
+    assert conflicts.call_count == 1
+
+
 def test_daterange_navigation(qwatson, span, qtbot):
     """
     Test that the widget to change the datespan of the activity overview is
@@ -320,6 +467,171 @@ def test_daterange_navigation(qwatson, span, qtbot):
     assert not overview.date_range_nav.btn_next.isEnabled()
 
 
+def test_month_span_overview(qwatson, span, qtbot):
+    """
+    Test that the activities of a month are shown in a single table with a
+    header row for each day.
+    """
+    overview = qwatson.overview_widg
+    overview.date_range_nav.set_span('month')
+    month_span = span[0].span('month')
+    assert overview.table_stack.currentWidget() == overview.span_table_widg
+    assert overview.span_table_widg.date_span == month_span
+    assert not overview.date_range_nav.btn_next.isEnabled()
+
+    span_table_widg = overview.span_table_widg
+    view = span_table_widg.view
+    model = view.proxy_model
+    assert model.rowCount() == 21
+    assert model.header_rows() == [0, 3, 6, 9, 12, 15, 18]
+    assert span_table_widg.get_row_count() == 14
+    assert span_table_widg.total_time_labl.text() == "Total : 84h 0min"
+    assert view.columnSpan(0, 0) == model.columnCount()
+    assert model.index(0, 0).data(DayHeaderRole) == (
+        arrowspan_to_str(span[0].span('day')), '12h 0min')
+    assert model.get_frame_from_index(model.index(1, 0)).message == (
+        'activity #0')
+
+    # Edit the comment of the second activity of the first day, which
+    # should not reset the table nor clear the selection.
+
+    col = model.sourceModel().COLUMNS['comment']
+    index = model.index(2, col)
+    visual_rect = view.visualRect(index)
+    qtbot.mouseClick(view.viewport(), Qt.LeftButton, pos=visual_rect.center())
+    assert overview.span_table_widg.selectedFrame() == 1
+
+    view.edit(index)
+    delegate = view.itemDelegate(index)
+    qtbot.keyClicks(delegate.editor, 'activity #1 (edited)')
+    with qtbot.waitSignal(model.sig_sourcemodel_changed):
+        qtbot.keyPress(delegate.editor, Qt.Key_Enter)
+    assert index.data() == 'activity #1 (edited)'
+    assert overview.span_table_widg.selectedFrame() == 1
+
+    # Filter out the first project.
+
+    overview.span_table_widg.set_project_filters({'p0': False})
+    assert model.rowCount() == 20
+    assert overview.span_table_widg.get_row_count() == 13
+
+    # Navigate to the previous month, which is empty, and back home.
+
+    qtbot.mouseClick(overview.date_range_nav.btn_prev, Qt.LeftButton)
+    assert overview.span_table_widg.date_span == (
+        month_span[0].shift(months=-1).span('month'))
+    assert model.rowCount() == 0
+    assert span_table_widg.total_time_labl.text() == "Total : 0h 0min"
+
+    qtbot.mouseClick(overview.date_range_nav.btn_home, Qt.LeftButton)
+    assert overview.span_table_widg.date_span == month_span
+    assert model.rowCount() == 20
+
+    # Switch back to the week of the first day of the month.
+
+    overview.date_range_nav.set_span('week')
+    assert overview.table_stack.currentWidget() == overview.table_widg
+    assert overview.table_widg.date_span == month_span[0].span('week')
+    assert overview.span_table_widg.date_span is None
+    assert model.rowCount() == 0
+
+
+def test_proxy_model_unsorted_frames(tmpdir, span):
+    """
+    Test that the activities that are not sorted by start time are shown
+    in the table of their day.
+    """
+    client = Watson(config_dir=str(tmpdir))
+    day1 = span[0].shift(hours=8)
+    day2 = span[0].shift(days=1, hours=8)
+    for start in (day1, day2, day2.shift(hours=2), day1.shift(hours=2)):
+        client.frames.add('p', start, start.shift(hours=1))
+    model = WatsonTableModel(client)
+    proxies = [WatsonSortFilterProxyModel(model, day.span('day')) for
+               day in (day1, day2)]
+    assert [[proxy.mapToSource(proxy.index(row, 0)).row() for
+             row in range(proxy.rowCount())] for proxy in proxies] == [
+        [0, 3], [1, 2]]
+    for proxy in proxies:
+        proxy.calcul_total_seconds()
+    assert [proxy.total_seconds for proxy in proxies] == [7200, 7200]
+
+
+def test_delete_project_from_model(tmpdir, span):
+    """
+    Test that deleting a project from the model removes its frames in a
+    single pass, with one rowsRemoved signal per range of contiguous rows,
+    and publishes the rows of the deleted frames.
+    """
+    client = Watson(config_dir=str(tmpdir))
+    start = span[0].shift(hours=8)
+    for hour, project in enumerate(['p1', 'p1', 'p2', 'p1', 'p2']):
+        client.frames.add(project, start.shift(hours=hour),
+                          start.shift(hours=hour, minutes=30))
+    client.save()
+    client._projects = None
+
+    model = WatsonTableModel(client)
+    proxy = WatsonSortFilterProxyModel(model, span)
+    rows_removed = []
+    model.rowsRemoved.connect(
+        lambda parent, first, last: rows_removed.append((first, last)))
+    events = []
+    client.feed.subscribe(events.append)
+
+    assert model.delete_project('p1')
+    assert rows_removed == [(3, 3), (0, 1)]
+    assert [type(event) for event in events] == [
+        FramesRemoved, ProjectDeleted]
+    assert events[0].rows == events[1].rows == [0, 1, 3]
+    assert [frame.project for frame in client.frames] == ['p2', 'p2']
+    assert client.projects == ['', 'p2']
+    assert proxy.rowCount() == 2
+    assert proxy.total_seconds == 3600
+    assert len(Watson(config_dir=str(tmpdir)).frames) == 2
+
+    with pytest.raises(ValueError):
+        model.delete_project('p1')
+    assert rows_removed == [(3, 3), (0, 1)]
+
+
+def test_span_model_unsorted_frames(tmpdir, span, qtbot):
+    """
+    Test that the activities that are not sorted by start time are shown
+    under the header of their day, and that the rows added to or removed
+    from the source model only update the layout of their day.
+    """
+    client = Watson(config_dir=str(tmpdir))
+    day1 = span[0].shift(hours=8)
+    day2 = span[0].shift(days=1, hours=8)
+    for start in (day2, day2.shift(hours=2), day1):
+        client.frames.add('p', start, start.shift(hours=1))
+    model = WatsonSpanTableModel(WatsonTableModel(client), span)
+    assert model.header_rows() == [0, 2]
+    assert model.mapToSource(model.index(1, 0)).row() == 2
+    assert model.index(0, 0).data(DayHeaderRole) == (
+        arrowspan_to_str(day1.span('day')), '1h 0min')
+
+    source = model.sourceModel()
+    frames = list(client.frames)
+    day3 = span[0].shift(days=2, hours=8)
+    frame = client.frames.new_frame('p', day3, day3.shift(hours=3))
+    with qtbot.assertNotEmitted(model.modelReset):
+        source.reload_frames(frames[:1] + [frame] + frames[1:])
+        assert model.header_rows() == [0, 2, 5]
+        assert [model.mapToSource(model.index(row, 0)).row() for
+                row in (1, 3, 4, 6)] == [3, 0, 2, 1]
+        assert model.total_seconds == 6 * 3600
+
+        source.remove_frames([3])
+        assert model.header_rows() == [0, 3]
+        assert [model.mapToSource(model.index(row, 0)).row() for
+                row in (1, 2, 4)] == [0, 2, 1]
+    assert model.index(0, 0).data(DayHeaderRole) == (
+        arrowspan_to_str(day2.span('day')), '2h 0min')
+    assert model.total_seconds == 5 * 3600
+
+
 def test_selected_row_is_cleared_when_navigating(qwatson, qtbot):
     """
     Test that the selected row is cleared when changing the date span of the
@@ -476,6 +788,87 @@ def test_edit_stop_datetime(qwatson, qtbot):
             '2018-06-13 18:00')
 
 
+def test_raw_value_role(qwatson, qtbot):
+    """
+    Test that the models return the raw values of the frames with the
+    RawValueRole and that the delegates do not edit a frame when its value
+    is not changed.
+    """
+    overview = qwatson.overview_widg
+    table = overview.table_widg.tables[0]
+    model = table.view.proxy_model
+    columns = model.sourceModel().COLUMNS
+    frame = model.get_frame_from_index(model.index(0, 0))
+
+    assert model.index(0, columns['start']).data(RawValueRole) == (
+        frame.start.timestamp)
+    assert model.index(0, columns['end']).data(RawValueRole) == (
+        frame.stop.timestamp)
+    assert model.index(0, columns['duration']).data(RawValueRole) == 6*3600
+    assert model.index(0, columns['project']).data(RawValueRole) == 'p0'
+    assert model.index(0, columns['tags']).data(RawValueRole) == (
+        'CI', 'test', '#0')
+    assert model.index(0, columns['comment']).data(RawValueRole) == (
+        'activity #0')
+    assert model.index(0, columns['id']).data(RawValueRole) == frame.id
+
+    # Open and close the editor of the start time without changing its
+    # value, which should not edit the frame.
+
+    index = model.index(0, columns['start'])
+    table.view.edit(index)
+    delegate = table.view.itemDelegate(index)
+    assert (delegate.editor.dateTime().toSecsSinceEpoch() ==
+            frame.start.timestamp)
+
+    data_version = overview.model.data_version
+    qtbot.keyPress(delegate.editor, Qt.Key_Enter)
+    assert overview.model.data_version == data_version
+
+
+def test_sort_activities(qwatson, qtbot):
+    """
+    Test that the activities of each day are sorted by the column selected
+    in the overview, that the sort is stable and that it is updated when
+    an activity is edited.
+    """
+    overview = qwatson.overview_widg
+    model = overview.table_widg.tables[0].view.proxy_model
+
+    def comments():
+        return [model.get_frame_from_index(model.index(row, 0)).message for
+                row in range(model.rowCount())]
+    assert comments() == ['activity #0', 'activity #1']
+
+    # The activities have the same duration, so the order of the frames is
+    # kept in both sort orders.
+    overview.sort_cbox.setCurrentIndex(overview.sort_cbox.findText('Duration'))
+    assert comments() == ['activity #0', 'activity #1']
+    overview.sort_order_btn.setValue(True)
+    assert comments() == ['activity #0', 'activity #1']
+
+    overview.sort_cbox.setCurrentIndex(overview.sort_cbox.findText('Project'))
+    assert comments() == ['activity #1', 'activity #0']
+    for table in overview.table_widg.tables:
+        assert table.view.proxy_model.sortColumn() == (
+            model.sourceModel().COLUMNS['project'])
+
+    # Edit the comment of an activity while sorting by comment.
+    overview.sort_order_btn.setValue(False)
+    overview.sort_cbox.setCurrentIndex(overview.sort_cbox.findText('Comment'))
+    assert comments() == ['activity #0', 'activity #1']
+    model.editFrame(model.index(0, 0), message='Zzz')
+    assert comments() == ['activity #1', 'Zzz']
+
+    # Sort the activities in the order of the frames again.
+    overview.sort_cbox.setCurrentIndex(overview.sort_cbox.findText('Time'))
+    assert comments() == ['Zzz', 'activity #1']
+
+    # The tables are not sorted for the longer date spans.
+    overview.date_range_nav.set_span('month')
+    assert not overview.sort_cbox.isEnabled()
+
+
 def test_edit_comment(qwatson, qtbot):
     """
     Test editing the comment in the activity overview table.
@@ -531,6 +924,7 @@ def test_edit_tags(qwatson, qtbot):
     assert isinstance(delegate, TagEditDelegate)
     assert delegate.editor.tags == ['#8', 'CI', 'test']
     assert delegate.editor.text() == 'CI, test, #8'
+    assert delegate.editor.tag_completer.completions('CI, te') == ['test']
 
     # Enter a new list of tags for the activity :
 
@@ -624,5 +1018,61 @@ def test_delete_frame_yes(qwatson, qtbot, mocker):
     assert table.rowCount() == 0
 
 
+def test_bulk_edit_and_delete(qwatson, qtbot, mocker):
+    """
+    Test that activities can be selected across the tables of the days and
+    edited or deleted as a single batch.
+    """
+    overview = qwatson.overview_widg
+    model = overview.model
+    tables = overview.table_widg.tables
+
+    # Select two activities of the first day and one of the third day.
+    for table, row, modifier in [(tables[0], 0, Qt.NoModifier),
+                                 (tables[0], 1, Qt.ControlModifier),
+                                 (tables[2], 0, Qt.ControlModifier)]:
+        view = table.view
+        visual_rect = view.visualRect(view.proxy_model.index(row, 0))
+        qtbot.mouseClick(view.viewport(), Qt.LeftButton, modifier,
+                         pos=visual_rect.center())
+    assert overview.selected_frames() == [0, 1, 4]
+
+    # Set the project and the comment of the selected activities.
+    data_changed = []
+    model.dataChanged.connect(
+        lambda first, last: data_changed.append((first.row(), last.row())))
+    save = mocker.spy(model.client, 'save')
+
+    bulk_edit_btn = overview.bulk_edit_btn
+    bulk_edit_btn.setup_projects()
+    bulk_edit_btn.project_chbox.setChecked(True)
+    bulk_edit_btn.project_cbox.setCurrentIndex(
+        bulk_edit_btn.project_cbox.findText('p6'))
+    bulk_edit_btn.comment_chbox.setChecked(True)
+    bulk_edit_btn.comment_edit.setText('Cleanup')
+    qtbot.mouseClick(bulk_edit_btn.apply_btn, Qt.LeftButton)
+
+    assert data_changed == [(0, 1), (4, 4)]
+    assert save.call_count == 1
+    for i, frame in enumerate(list(model.client.frames)[:6]):
+        if i in (0, 1, 4):
+            assert (frame.project, frame.message) == ('p6', 'Cleanup')
+        else:
+            assert frame.project == 'p%d' % i
+    assert model.client.frames[0].tags == ['CI', 'test', '#0']
+
+    # Delete the selected activities.
+    rows_removed = []
+    model.rowsRemoved.connect(
+        lambda parent, first, last: rows_removed.append((first, last)))
+    mocker.patch.object(QMessageBox, 'question', return_value=QMessageBox.Yes)
+    qtbot.mouseClick(overview.del_selected_btn, Qt.LeftButton)
+
+    assert rows_removed == [(4, 4), (0, 1)]
+    assert save.call_count == 2
+    assert len(model.client.frames) == 11
+    assert [table.rowCount() for table in tables] == [0, 2, 1, 2, 2, 2, 2]
+
+
 if __name__ == "__main__":
     pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+Tests for the reloading of frames modified by another process.
+"""
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import json
+
+# ---- Third party imports
+
+import pytest
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QMessageBox
+
+# ---- Local imports
+
+from qwatson.watson_ext.watsonextends import Frames
+from qwatson.mainwindow import QWatson
+from qwatson.utils.dates import local_arrow_from_tuple
+
+
+# ---- Fixtures and utilities
+
+
+@pytest.fixture(scope="module")
+def now():
+    return local_arrow_from_tuple((2018, 6, 17, 23, 59, 0))
+
+
+@pytest.fixture
+def appdir(now, tmpdir):
+    """Temporary app directory fixture that also creates a test Frame file."""
+    appdir = osp.join(str(tmpdir), 'appdir')
+    os.makedirs(appdir)
+
+    span = now.floor('week').span('week')
+    frames = Frames()
+    for i in range(7):
+        frames.add(project='p%d' % i,
+                   start=span[0].shift(days=i, hours=6).timestamp,
+                   stop=span[0].shift(days=i, hours=12).timestamp,
+                   message='activity #%d' % i,
+                   updated_at=now.shift(weeks=-1))
+    write_frames(appdir, frames)
+
+    return appdir
+
+
+def write_frames(appdir, frames):
+    """
+    Write the frames to the frames file the same way the watson CLI does,
+    by replacing the file on the disk.
+    """
+    filename = osp.join(appdir, 'frames')
+    with open(filename + '.tmp', 'w') as f:
+        f.write(json.dumps(frames.dump(), indent=1, ensure_ascii=False))
+    os.replace(filename + '.tmp', filename)
+
+
+@pytest.fixture
+def qwatson(qtbot, mocker, appdir, now):
+    mocker.patch('arrow.now', return_value=now)
+    qwatson = QWatson(config_dir=appdir)
+
+    qtbot.addWidget(qwatson)
+    qwatson.show()
+    qtbot.waitForWindowShown(qwatson)
+
+    qtbot.addWidget(qwatson.overview_widg)
+    qtbot.mouseClick(qwatson.btn_report, Qt.LeftButton)
+    qtbot.waitForWindowShown(qwatson.overview_widg)
+
+    yield qwatson
+
+    qwatson.control_server.close()
+    qwatson.file_watcher.close()
+
+
+# ---- Tests
+
+
+def test_reload_frames_modified_externally(qwatson, qtbot, appdir, now):
+    """
+    Test that the changes made to the frames file by another process are
+    applied incrementally and that the row selection survives the reload.
+    """
+    overview = qwatson.overview_widg
+    assert overview.table_widg.get_row_count() == [1, 1, 1, 1, 1, 1, 1]
+
+    # Select the row of the fourth table.
+    table = overview.table_widg.tables[3]
+    visual_rect = table.view.visualRect(table.view.proxy_model.index(0, 0))
+    qtbot.mouseClick(
+        table.view.viewport(), Qt.LeftButton, pos=visual_rect.center())
+    selected_id = qwatson.client.frames[table.get_selected_frame_index()].id
+
+    resets = []
+    qwatson.model.modelReset.connect(lambda: resets.append(True))
+
+    # Remove the first frame, edit the third and add a new project and
+    # frame to the last day of the week, like the watson CLI would.
+    frames = Frames(json.loads(open(osp.join(appdir, 'frames')).read()))
+    del frames[0]
+    frames[1] = frames[1]._replace(message='edited by the CLI',
+                                   updated_at=now)
+    frames.add(project='p7', start=frames[-1].stop.shift(hours=1),
+               stop=frames[-1].stop.shift(hours=2), updated_at=now)
+    write_frames(appdir, frames)
+
+    qtbot.waitUntil(lambda: qwatson.client.frames[-1].project == 'p7',
+                    timeout=5000)
+
+    assert not resets
+    assert len(qwatson.client.frames) == 7
+    assert qwatson.client.frames[1].message == 'edited by the CLI'
+    assert overview.table_widg.get_row_count() == [0, 1, 1, 1, 1, 1, 2]
+    assert 'p7' in qwatson.client.projects
+    assert 'p0' not in qwatson.client.projects
+    assert not qwatson.client.frames.changed
+
+    # Assert that the selection survived the reload.
+    assert overview.table_widg.last_focused_table == table
+    assert (qwatson.client.frames[table.get_selected_frame_index()].id ==
+            selected_id)
+
+
+def test_reload_failed(qwatson, qtbot, appdir):
+    """
+    Test that the main window is warned when the frames file modified by
+    another process can't be read, and that the next change is reloaded.
+    """
+    frames = Frames(json.loads(open(osp.join(appdir, 'frames')).read()))
+    filename = osp.join(appdir, 'frames')
+    with open(filename + '.tmp', 'w') as f:
+        f.write('[not json')
+    with qtbot.waitSignal(qwatson.file_watcher.sig_reload_failed,
+                          timeout=5000) as blocker:
+        os.replace(filename + '.tmp', filename)
+    assert filename in blocker.args[0]
+    msgboxes = [msgbox for msgbox in qwatson.findChildren(QMessageBox) if
+                msgbox.isVisible()]
+    assert len(msgboxes) == 1
+    assert filename in msgboxes[0].text()
+    msgboxes[0].close()
+    assert len(qwatson.client.frames) == len(frames)
+
+    del frames[0]
+    write_frames(appdir, frames)
+    qtbot.waitUntil(lambda: len(qwatson.client.frames) == len(frames),
+                    timeout=5000)
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -259,5 +259,35 @@ def test_del_project(qwatson_creator):
     assert qwatson.client.frames[2].project == 'p2'
 
 
+def test_project_operations_signals(qwatson_creator):
+    """
+    Test that renaming and deleting a project do not reset the models and
+    that they can be cancelled from the progress dialog.
+    """
+    qwatson, qtbot, mocker = qwatson_creator
+    assert qwatson.client.projects == ['', 'p2']
+
+    with qtbot.assertNotEmitted(qwatson.model.modelReset):
+        with qtbot.assertNotEmitted(qwatson.project_manager.model.modelReset):
+            with qtbot.waitSignal(qwatson.model.dataChanged):
+                qwatson.rename_project('p2', 'p4', force=True)
+    assert qwatson.client.projects == ['', 'p4']
+    assert qwatson.project_manager.model.projects == ['', 'p4']
+    assert qwatson.currentProject() == 'p4'
+
+    # Cancel the deletion of the project from the progress dialog.
+    mocker.patch('qwatson.mainwindow.QProgressDialog.wasCanceled',
+                 return_value=True)
+    qwatson.del_project('p4', force=True)
+    assert len(qwatson.client.frames) == 3
+
+    mocker.stopall()
+    with qtbot.assertNotEmitted(qwatson.model.modelReset):
+        with qtbot.waitSignal(qwatson.model.rowsRemoved):
+            qwatson.del_project('p4', force=True)
+    assert len(qwatson.client.frames) == 0
+    assert qwatson.project_manager.model.projects == ['']
+
+
 if __name__ == "__main__":
     pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+Tests for the delta sync of the frames with a local stand-in of a Watson
+sync server.
+"""
+
+# ---- Standard imports
+
+import gzip
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+from threading import Thread
+from urllib.parse import parse_qs, urlparse
+import uuid
+
+# ---- Third party imports
+
+import arrow
+import pytest
+from watson.watson import WatsonError
+
+# ---- Local imports
+
+from qwatson.models.syncworker import SyncWorker
+from qwatson.models.tablemodels import WatsonTableModel
+from qwatson.watson_ext.sync import SyncClient, encode_frame, sync
+from qwatson.watson_ext.watsonextends import Watson
+
+TOKEN = 'secret'
+
+
+# ---- Fixtures and utilities
+
+
+class SyncRequestHandler(BaseHTTPRequestHandler):
+    """
+    A stand-in of the frames API of a Watson sync server. The frames are
+    pulled by the time they were received by the server.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, content=None):
+        body = b'' if content is None else json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _log_request(self):
+        url = urlparse(self.path)
+        self.server.requests.append({
+            'method': self.command, 'path': url.path,
+            'query': parse_qs(url.query), 'port': self.client_address[1],
+            'encoding': self.headers.get('Content-Encoding')})
+        return self.headers.get('Authorization') == 'Token ' + TOKEN
+
+    def do_GET(self):
+        if not self._log_request():
+            return self._send(401)
+        query = self.server.requests[-1]['query']
+        last_sync = arrow.get(query['last_sync'][0])
+        page, page_size = int(query['page'][0]), int(query['page_size'][0])
+        frames = sorted((frame for frame in self.server.frames.values() if
+                         frame['received_at'] > last_sync),
+                        key=lambda frame: (frame['received_at'], frame['id']))
+        self._send(200, [
+            {key: value for key, value in frame.items() if
+             key != 'received_at'} for
+            frame in frames[(page - 1) * page_size:page * page_size]])
+
+    def do_POST(self):
+        if not self._log_request():
+            return self._send(401)
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        for frame in json.loads(body.decode('utf-8')):
+            self.server.frames[frame['id']] = dict(
+                frame, received_at=arrow.utcnow())
+        self._send(201)
+
+
+@pytest.fixture
+def sync_server():
+    """A stand-in sync server that listens on a local port."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SyncRequestHandler)
+    server.daemon_threads = True
+    server.frames = {}
+    server.requests = []
+    server.url = 'http://127.0.0.1:%d' % server.server_address[1]
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def add_remote_frame(server, frame):
+    """Add a frame to the server as if it was pushed by another client."""
+    server.frames[encode_frame(frame)['id']] = dict(
+        encode_frame(frame), received_at=arrow.utcnow())
+
+
+@pytest.fixture
+def client(tmpdir):
+    """A client with five frames that were never synced."""
+    client = Watson(config_dir=str(tmpdir))
+    start = arrow.now().floor('day').shift(days=-1, hours=8)
+    for hour in range(5):
+        client.frames.add('local', start.shift(hours=hour),
+                          start.shift(hours=hour, minutes=30),
+                          updated_at=arrow.utcnow().shift(minutes=-10))
+    client.save()
+    return client
+
+
+# ---- Tests
+
+
+def test_delta_sync(client, sync_server):
+    """
+    Test that only the frames updated since the last sync are pushed, that
+    the changes of the server are pulled by pages and that all requests
+    are sent compressed over the same connection.
+    """
+    other = Watson(config_dir=client._dir + '_other')
+    start = arrow.now().floor('day').shift(days=-2, hours=8)
+    remote = [other.frames.new_frame('remote', start.shift(hours=hour),
+                                     start.shift(hours=hour, minutes=15))
+              for hour in range(3)]
+    for frame in remote:
+        add_remote_frame(sync_server, frame)
+    # The server does not always tell when a frame was updated.
+    del sync_server.frames[encode_frame(remote[-1])['id']]['updated_at']
+    edited = client.frames[0]._replace(project='edited',
+                                       updated_at=arrow.utcnow())
+    add_remote_frame(sync_server, edited)
+
+    sync_client = SyncClient(sync_server.url, TOKEN, page_size=2,
+                             batch_size=2)
+    report = sync(client, sync_client)
+    assert report == (5, 4, 3, 1)
+    assert [frame.project for frame in client.frames] == (
+        ['remote'] * 3 + ['edited'] + ['local'] * 4)
+    assert len(sync_server.frames) == 8
+
+    # The pages are pulled until one is incomplete and the frames are
+    # pushed by batches of 2 in gzip compressed requests.
+    requests = sync_server.requests
+    assert [(r['method'], r['path']) for r in requests] == (
+        [('GET', '/frames/')] * 3 + [('POST', '/frames/bulk/')] * 3)
+    assert all(r['encoding'] == 'gzip' for r in requests[3:])
+    assert len({r['port'] for r in requests}) == 1
+
+    # The frames that were pulled or pushed are not sent again, including
+    # those pulled without an updated_at, and the last sync watermark is
+    # saved.
+    assert (Watson(config_dir=client._dir).last_sync.timestamp ==
+            client.last_sync.timestamp)
+    del requests[:]
+    client.frames.add('local', arrow.now().shift(hours=-1), arrow.now(),
+                      updated_at=arrow.utcnow())
+    report = sync(client, sync_client)
+    assert report.pushed == 1
+    assert report.added == report.updated == 0
+    assert [r['method'] for r in requests].count('POST') == 1
+    sync_client.close()
+
+    with SyncClient(sync_server.url, 'wrong token') as sync_client:
+        with pytest.raises(WatsonError):
+            sync(client, sync_client)
+    with pytest.raises(WatsonError):
+        sync(client)
+
+
+def test_sync_worker(client, sync_server, qtbot):
+    """
+    Test that the frames are synced in a background thread and that the
+    pulled frames are applied to the model with row-level signals.
+    """
+    model = WatsonTableModel(client)
+    worker = SyncWorker(model, SyncClient(sync_server.url, TOKEN))
+    other = Watson(config_dir=client._dir + '_other')
+    frame = other.frames.new_frame('remote', arrow.now().shift(hours=-2),
+                                   arrow.now().shift(hours=-1))
+    add_remote_frame(sync_server, frame)
+
+    inserted = []
+    model.rowsInserted.connect(
+        lambda parent, first, last: inserted.append((first, last)))
+    with qtbot.assertNotEmitted(model.modelReset):
+        with qtbot.waitSignal(worker.sig_sync_finished) as blocker:
+            assert worker.start()
+            assert worker.is_syncing
+            assert not worker.start()
+    assert blocker.args[0] == (5, 1, 1, 0)
+    assert not worker.is_syncing
+    assert inserted == [(5, 5)]
+    assert model.rowCount() == 6
+    assert Watson(config_dir=client._dir).frames[-1].id == frame.id
+
+    # The sync fails, and can be started again, when a frame received from
+    # the server is not valid.
+    invalid = encode_frame(frame._replace(id=uuid.uuid4().hex))
+    del invalid['start_at']
+    sync_server.frames[invalid['id']] = dict(
+        invalid, received_at=arrow.utcnow())
+    with qtbot.waitSignal(worker.sig_sync_failed) as blocker:
+        assert worker.start()
+    assert 'Invalid frames' in blocker.args[0]
+    assert not worker.is_syncing
+    assert len(client.frames) == 6
+    with pytest.raises(WatsonError):
+        sync(client, worker.sync_client)
+    worker.close()
+
+    # The sync fails without a sync server in the config.
+    worker = SyncWorker(model)
+    with qtbot.waitSignal(worker.sig_sync_failed):
+        assert not worker.start()
+    worker.close()
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -15,7 +15,10 @@ from datetime import datetime
 # ---- Imports: third parties
 
 import arrow
-from PyQt5.QtCore import QDateTime
+
+# ---- Imports: local
+
+from qwatson.utils.timecodec import PARSED_FORMATS, codec
 
 
 def total_seconds_to_hour_min(total_seconds):
@@ -30,6 +33,7 @@ def total_seconds_to_hour_min(total_seconds):
 
 def qdatetime_from_arrow(arrow_datetime):
     """Conver an arrow date time object to a QDateTime object"""
+    from PyQt5.QtCore import QDateTime
     return QDateTime(arrow_datetime.year, arrow_datetime.month,
                      arrow_datetime.day, arrow_datetime.hour,
                      arrow_datetime.minute)
@@ -37,6 +41,7 @@ def qdatetime_from_arrow(arrow_datetime):
 
 def qdatetime_from_str(str_date_time, datetime_format="%Y-%m-%d %H:%M"):
     """Convert a date time str to a QDateTime object."""
+    from PyQt5.QtCore import QDateTime
     struct_time = strptime(str_date_time, datetime_format)
     return QDateTime(struct_time.tm_year, struct_time.tm_mon,
                      struct_time.tm_mday, struct_time.tm_hour,
@@ -104,6 +109,12 @@ def local_arrow_from_str(datetime_str, fmt='YYYY-MM-DD HH:mm:ss'):
     """
     Return an arrow object from a string formatted for local timezone.
     """
+    if fmt in PARSED_FORMATS:
+        try:
+            return codec.parse_local(datetime_str)
+        except ValueError:
+            # Let arrow raise a parser error for the invalid strings.
+            pass
     return arrow.get(datetime_str, fmt).replace(tzinfo=dateutil.tz.tzlocal())
 
 
@@ -9,10 +9,18 @@
 
 # ---- Stantard imports
 
+import errno
 import os
 import os.path as osp
+import time
 from shutil import rmtree
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
 
 def delete_file_safely(filename):
     """Try to delete a file on the disk and return the error if any."""
@@ -35,3 +43,71 @@ def delete_folder_recursively(dirpath, delroot=False):
                 delete_file_safely(filepath)
         if delroot:
             os.rmdir(dirpath)
+
+
+def get_file_signature(filename):
+    """
+    Return a tuple that changes whenever the file is written or replaced,
+    or None if the file does not exist.
+    """
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class FileLock(object):
+    """
+    An advisory lock held on a file to serialize the writes of several
+    processes. The lock is taken with fcntl on posix and with msvcrt on
+    Windows and can be used as a context manager.
+    """
+
+    def __init__(self, filename, timeout=10):
+        self.filename = filename
+        self.timeout = timeout
+        self._file = None
+
+    def acquire(self):
+        """
+        Acquire the lock, waiting at most timeout seconds for another
+        process to release it before raising a TimeoutError.
+        """
+        self._file = open(self.filename, 'a+')
+        t0 = time.monotonic()
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(),
+                                fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                if time.monotonic() - t0 >= self.timeout:
+                    self._file.close()
+                    self._file = None
+                    raise TimeoutError(errno.ETIMEDOUT,
+                                       "Unable to acquire the lock",
+                                       self.filename)
+                time.sleep(0.01)
+
+    def release(self):
+        """Release the lock."""
+        if self._file is not None:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
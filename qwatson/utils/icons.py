@@ -41,7 +41,12 @@ APP_ICONS = {
     'copy_over': 'copy_over'}
 
 COLOR = '#282828'
-FA_ICONS = {'filters': [('fa.filter',), {'color': COLOR, 'scale_factor': 1.3}]}
+FA_ICONS = {'filters': [('fa.filter',), {'color': COLOR, 'scale_factor': 1.3}],
+            'conflicts': [('fa.exclamation-triangle',),
+                          {'color': COLOR, 'scale_factor': 1.2}],
+            'sort_descending': [('fa.sort-amount-desc',),
+                                {'color': COLOR, 'scale_factor': 1.2}],
+            'sync': [('fa.refresh',), {'color': COLOR, 'scale_factor': 1.1}]}
 
 
 ICON_SIZES = {'huge': (128, 128),
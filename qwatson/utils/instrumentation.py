@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A lightweight instrumentation of the hot paths of QWatson.
+
+The instrumentation is disabled by default, in which case the instrumented
+functions only pay for a check of a module level flag. When enabled, the
+duration of each call is added to a histogram and optionally written to
+a trace file in the JSON array format of the Chrome trace viewer, with one
+event per line.
+"""
+
+# ---- Standard imports
+
+from bisect import bisect_left
+import functools
+import json
+import os
+import threading
+import time
+
+
+# The upper bounds in milliseconds of the buckets of the histograms.
+BUCKETS = (0.01, 0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000,
+           float('inf'))
+
+_enabled = False
+_stats = {}
+_counters = {}
+_trace_file = None
+_trace_lock = threading.Lock()
+
+
+class Histogram(object):
+    """The number of calls and the distribution of their durations."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = float('inf')
+        self.max = 0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, duration):
+        """Add a duration in milliseconds to the histogram."""
+        self.count += 1
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+        self.buckets[bisect_left(BUCKETS, duration)] += 1
+
+    def to_dict(self):
+        """Return the histogram as a JSON serializable dict."""
+        return {'count': self.count,
+                'total': self.total,
+                'mean': self.total / self.count if self.count else 0,
+                'min': self.min if self.count else 0,
+                'max': self.max,
+                'buckets': self.buckets}
+
+
+def is_enabled():
+    """Return whether the instrumentation is enabled."""
+    return _enabled
+
+
+def enable(trace_filename=None):
+    """
+    Enable the instrumentation. If a trace filename is provided, each
+    instrumented call is also written to that file as a trace event.
+    """
+    global _enabled, _trace_file
+    disable()
+    if trace_filename is not None:
+        _trace_file = open(trace_filename, 'w')
+        _trace_file.write('[\n')
+    _enabled = True
+
+
+def disable():
+    """Disable the instrumentation and close the trace file if any."""
+    global _enabled, _trace_file
+    _enabled = False
+    with _trace_lock:
+        if _trace_file is not None:
+            _trace_file.close()
+            _trace_file = None
+
+
+def reset():
+    """Clear all the histograms and counters."""
+    _stats.clear()
+    _counters.clear()
+
+
+def get_stats():
+    """
+    Return a dict with the histograms of the instrumented functions and
+    the values of the counters.
+    """
+    return {'timings': {name: hist.to_dict() for
+                        name, hist in sorted(_stats.items())},
+            'counters': dict(sorted(_counters.items()))}
+
+
+def record(name, start, stop):
+    """
+    Record a call of the specified name that started and stopped at the
+    provided perf_counter values.
+    """
+    try:
+        hist = _stats[name]
+    except KeyError:
+        hist = _stats[name] = Histogram()
+    hist.add((stop - start) * 1000)
+
+    if _trace_file is not None:
+        event = {'name': name, 'ph': 'X', 'pid': os.getpid(),
+                 'tid': threading.get_ident(),
+                 'ts': start * 1000000, 'dur': (stop - start) * 1000000}
+        with _trace_lock:
+            if _trace_file is not None:
+                _trace_file.write(json.dumps(event) + ',\n')
+
+
+def count(name, value=1):
+    """Increment the counter of the specified name if enabled."""
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def timed(name):
+    """
+    A decorator that records the duration of the calls of the decorated
+    function under the specified name when the instrumentation is enabled.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, start, time.perf_counter())
+        return wrapper
+    return decorator
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+Utilities to estimate the memory held by the data of QWatson, to count the
+live instances of Qt objects and to locate leaks with tracemalloc.
+"""
+
+# ---- Standard imports
+
+import gc
+import sys
+import tracemalloc
+from types import BuiltinFunctionType, FunctionType, ModuleType
+
+# ---- Third party imports
+
+try:
+    from PyQt5 import sip
+except ImportError:
+    import sip
+
+
+def deep_getsizeof(obj, seen=None):
+    """
+    Return the estimated number of bytes held by obj and all the objects
+    it references. Objects whose id is in seen are not counted, so that
+    objects shared between several calls are counted only once.
+    """
+    seen = set() if seen is None else seen
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(
+                obj, (type, ModuleType, FunctionType, BuiltinFunctionType)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif not isinstance(obj, (str, bytes, int, float)):
+            if hasattr(obj, '__dict__'):
+                stack.append(obj.__dict__)
+            for slot in getattr(type(obj), '__slots__', ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+    return size
+
+
+def frames_memory(frames, sample_size=1000):
+    """
+    Return a dict with the number of frames, and the estimated number of
+    bytes held per frame and in total by the frames.
+
+    The size is estimated from a sample of frames evenly spread in the
+    list, since walking through all the objects of a large history
+    would take too long.
+    """
+    count = len(frames)
+    if count == 0:
+        return {'count': 0, 'per_frame': 0, 'total': sys.getsizeof([])}
+    step = max(count // sample_size, 1)
+    sample = [frames[i] for i in range(0, count, step)]
+    seen = set()
+    sample_bytes = sum(deep_getsizeof(frame, seen) for frame in sample)
+    per_frame = sample_bytes / len(sample)
+    return {'count': count,
+            'per_frame': per_frame,
+            'total': per_frame * count + sys.getsizeof(list(range(count)))}
+
+
+def live_instances(classes):
+    """
+    Return a dict with the number of Python wrappers of the specified
+    classes that are alive, and the number of those whose underlying
+    Qt object was already deleted, which points to a leak of the wrapper.
+    """
+    counts = {cls.__name__: {'alive': 0, 'deleted': 0} for cls in classes}
+    gc.collect()
+    for obj in gc.get_objects():
+        for cls in classes:
+            if isinstance(obj, cls):
+                try:
+                    deleted = sip.isdeleted(obj)
+                except TypeError:
+                    deleted = False
+                key = 'deleted' if deleted else 'alive'
+                counts[cls.__name__][key] += 1
+    return counts
+
+
+def memory_report(client, classes=(), caches=None):
+    """
+    Return a dict with the estimated bytes held by the frames, the
+    project and tag lists and the provided caches of the client, and with
+    the live counts of the instances of the specified classes.
+    """
+    projects = client.projects
+    tags = client.tags
+    return {'frames': frames_memory(client.frames),
+            'projects': {'count': len(projects),
+                         'total': deep_getsizeof(projects)},
+            'tags': {'count': len(tags), 'total': deep_getsizeof(tags)},
+            'caches': {name: deep_getsizeof(cache) for
+                       name, cache in (caches or {}).items()},
+            'instances': live_instances(classes)}
+
+
+class TracemallocSession(object):
+    """
+    Take tracemalloc snapshots on demand and compare them to locate the
+    code that allocated the memory between two points of the session.
+    """
+
+    def __init__(self, nframe=5):
+        self.nframe = nframe
+        self.snapshots = []
+
+    def is_tracing(self):
+        """Return whether tracemalloc is tracing the allocations."""
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        """Start tracing the memory allocations."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframe)
+
+    def stop(self):
+        """Stop tracing the memory allocations and clear the snapshots."""
+        tracemalloc.stop()
+        self.snapshots = []
+
+    def take_snapshot(self, label=None):
+        """
+        Take a snapshot of the allocations, starting tracemalloc first if
+        needed, and return its index.
+        """
+        self.start()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>')))
+        label = label or 'snapshot %d' % (len(self.snapshots) + 1)
+        self.snapshots.append((label, snapshot))
+        return len(self.snapshots) - 1
+
+    def compare(self, first=0, last=-1, limit=20, key_type='lineno'):
+        """
+        Return the list of the limit tracemalloc StatisticDiff with the
+        largest size differences between two snapshots.
+        """
+        old = self.snapshots[first][1]
+        new = self.snapshots[last][1]
+        return new.compare_to(old, key_type)[:limit]
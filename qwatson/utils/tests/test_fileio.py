@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils.fileio import FileLock
+
+
+def test_file_lock(tmpdir):
+    """Test that a lock can't be acquired twice at the same time."""
+    filename = osp.join(str(tmpdir), 'frames.lock')
+    with FileLock(filename):
+        with pytest.raises(TimeoutError):
+            FileLock(filename, timeout=0.1).acquire()
+
+    # The lock is available again once released.
+    with FileLock(filename, timeout=0.1):
+        pass
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import os.path as osp
+import json
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils import instrumentation
+
+
+@pytest.fixture
+def instrumented():
+    @instrumentation.timed('test.func')
+    def func(value):
+        return value * 2
+
+    instrumentation.reset()
+    yield func
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_disabled_instrumentation(instrumented):
+    """Test that nothing is recorded when the instrumentation is disabled."""
+    assert not instrumentation.is_enabled()
+    assert instrumented(2) == 4
+    instrumentation.count('test.counter')
+    assert instrumentation.get_stats() == {'timings': {}, 'counters': {}}
+
+
+def test_enabled_instrumentation(instrumented, tmpdir):
+    """
+    Test that the calls are recorded in the histograms and in the trace
+    file when the instrumentation is enabled.
+    """
+    filename = osp.join(str(tmpdir), 'trace.json')
+    instrumentation.enable(filename)
+    for i in range(3):
+        assert instrumented(i) == i * 2
+    instrumentation.count('test.counter', 5)
+    instrumentation.disable()
+
+    stats = instrumentation.get_stats()
+    assert stats['timings']['test.func']['count'] == 3
+    assert sum(stats['timings']['test.func']['buckets']) == 3
+    assert stats['counters'] == {'test.counter': 5}
+
+    # The trace is in the JSON array format of the Chrome trace viewer,
+    # where the closing bracket is optional.
+    with open(filename) as f:
+        content = f.read()
+    events = json.loads(content.rstrip(',\n') + ']')
+    assert [event['name'] for event in events] == ['test.func'] * 3
+    assert all(event['ph'] == 'X' for event in events)
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
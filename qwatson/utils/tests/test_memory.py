@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+
+# ---- Third party imports
+
+import arrow
+import pytest
+from PyQt5.QtWidgets import QLabel
+
+# ---- Local imports
+
+from qwatson.utils.memory import (
+    TracemallocSession, deep_getsizeof, live_instances, memory_report)
+from qwatson.watson_ext.watsonextends import Watson
+
+
+def test_deep_getsizeof():
+    """Test that shared objects are counted only once."""
+    shared = ['x' * 1000]
+    seen = set()
+    first = deep_getsizeof([shared], seen)
+    second = deep_getsizeof([shared], seen)
+    assert first > 1000
+    assert second < 1000
+
+
+def test_memory_report(tmpdir):
+    """Test that the memory report accounts for the frames of the client."""
+    client = Watson(config_dir=str(tmpdir))
+    for i in range(10):
+        client.frames.add('p%d' % (i % 3), arrow.now(), arrow.now(),
+                          tags=['tag%d' % i], message='frame %d' % i)
+
+    report = memory_report(client, caches={'cache': list(range(100))})
+    assert report['frames']['count'] == 10
+    assert report['frames']['per_frame'] > 0
+    assert report['frames']['total'] > 10 * report['frames']['per_frame']
+    assert report['projects']['count'] == 4
+    assert report['tags']['count'] == 10
+    assert report['caches']['cache'] > 100 * 8
+
+
+def test_live_instances(qtbot):
+    """Test counting the wrappers of live and deleted Qt objects."""
+    class CountedLabel(QLabel):
+        pass
+
+    labels = [CountedLabel() for i in range(3)]
+    assert live_instances([CountedLabel]) == {
+        'CountedLabel': {'alive': 3, 'deleted': 0}}
+
+    labels[0].deleteLater()
+    qtbot.wait(10)
+    assert live_instances([CountedLabel]) == {
+        'CountedLabel': {'alive': 2, 'deleted': 1}}
+
+
+def test_tracemalloc_session():
+    """Test comparing two tracemalloc snapshots."""
+    session = TracemallocSession()
+    try:
+        session.take_snapshot()
+        data = [str(i) * 10 for i in range(10000)]
+        session.take_snapshot()
+        stats = session.compare(limit=5)
+        assert stats and stats[0].size_diff > 0
+        assert len(data) == 10000
+    finally:
+        session.stop()
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
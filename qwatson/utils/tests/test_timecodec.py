@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import time
+
+# ---- Third party imports
+
+import arrow
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_str
+from qwatson.utils.timecodec import TimeCodec
+
+
+@pytest.fixture
+def codec(monkeypatch):
+    """A codec of a local timezone with DST transitions."""
+    monkeypatch.setenv('TZ', 'America/Montreal')
+    time.tzset()
+    yield TimeCodec()
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize('day', ['2018-03-11', '2018-11-04', '2018-06-14'])
+def test_codec_around_dst(codec, day):
+    """
+    Test that the codec converts, formats and parses the times of the days
+    with and without a DST transition like arrow does.
+    """
+    start = arrow.get(day).timestamp
+    for timestamp in range(start, start + 2 * 86400, 15 * 60 + 7):
+        expected = arrow.get(timestamp).to(codec.tzinfo)
+        local = codec.to_local(timestamp)
+        assert local.datetime == expected.datetime
+        assert local.utcoffset() == expected.utcoffset()
+        assert codec.to_timestamp(local) == expected.timestamp
+        assert codec.to_timestamp(arrow.get(timestamp)) == timestamp
+        assert (codec.format_minutes(local) ==
+                expected.format('YYYY-MM-DD HH:mm'))
+
+        string = expected.format('YYYY-MM-DD HH:mm:ss')
+        parsed = arrow.get(string, 'YYYY-MM-DD HH:mm:ss').replace(
+            tzinfo=codec.tzinfo)
+        assert codec.parse_local(string) == parsed
+        assert codec.to_timestamp(codec.parse_local(string)) == (
+            parsed.timestamp)
+
+
+def test_parse_local():
+    """Test that invalid strings are still rejected by the arrow parser."""
+    assert local_arrow_from_str('2018-06-14 09:30', 'YYYY-MM-DD HH:mm') == (
+        local_arrow_from_str('2018-06-14 09:30:00'))
+    with pytest.raises(ValueError):
+        TimeCodec().parse_local('2018/06/14 09:30')
+    with pytest.raises(arrow.parser.ParserError):
+        local_arrow_from_str('2018/06/14 09:30:00')
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
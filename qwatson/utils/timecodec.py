@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A codec to convert the epoch seconds of the frames to local arrow objects
+and back, and to format and parse the local date times shown in QWatson,
+without going through the timezone conversions and the format parsers of
+arrow for each value.
+"""
+
+# ---- Standard imports
+
+import calendar
+import datetime
+import time
+
+# ---- Third party imports
+
+import arrow
+from dateutil import tz
+
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# The 'HH:mm' strings of all the minutes of a day.
+MINUTE_STRS = ['%02d:%02d' % divmod(minute, 60) for minute in range(1440)]
+
+# The formats that are parsed by slicing the string.
+PARSED_FORMATS = ('YYYY-MM-DD HH:mm:ss', 'YYYY-MM-DD HH:mm')
+
+
+class TimeCodec(object):
+    """
+    A converter between epoch seconds and local arrow objects.
+
+    The utc offsets of the local timezone are cached per utc day. The days
+    in which the offset changes, because of a DST transition, are flagged in
+    the table and their offsets are computed exactly for each value.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Clear the cached offsets and dates. This must be called when the
+        local timezone is changed with time.tzset.
+        """
+        self.tzinfo = tz.tzlocal()
+        # A dict that maps the utc days since the epoch to the offset of
+        # the day in seconds, or to None if the offset changes in the day.
+        self._offsets = {}
+        # A dict that maps the date ordinals to their 'YYYY-MM-DD' str.
+        self._dates = {}
+
+    def _day_offset(self, day):
+        """
+        Return the utc offset of the specified utc day since the epoch, or
+        None if the offset changes during the day.
+        """
+        try:
+            return self._offsets[day]
+        except KeyError:
+            first = time.localtime(day * 86400).tm_gmtoff
+            last = time.localtime(day * 86400 + 86399).tm_gmtoff
+            offset = self._offsets[day] = first if first == last else None
+            return offset
+
+    def utcoffset(self, timestamp):
+        """Return the utc offset in seconds of the local time at timestamp."""
+        offset = self._day_offset(int(timestamp // 86400))
+        if offset is None:
+            return time.localtime(timestamp).tm_gmtoff
+        return offset
+
+    def local_ordinal(self, timestamp):
+        """Return the ordinal of the local date of the epoch seconds."""
+        return (int((timestamp + self.utcoffset(timestamp)) // 86400) +
+                EPOCH_ORDINAL)
+
+    def to_local(self, timestamp):
+        """Return the local arrow object of the specified epoch seconds."""
+        dt = datetime.datetime.utcfromtimestamp(
+            timestamp + self.utcoffset(timestamp))
+        return arrow.Arrow(dt.year, dt.month, dt.day, dt.hour, dt.minute,
+                           dt.second, dt.microsecond, self.tzinfo)
+
+    def localize(self, value):
+        """
+        Return the specified arrow object in the local timezone. The object
+        is returned as is if it is already local.
+        """
+        if isinstance(value.tzinfo, tz.tzlocal):
+            return value
+        return self.to_local(value.float_timestamp)
+
+    def get_local(self, value):
+        """
+        Return the local arrow object of the specified epoch seconds, arrow
+        object or of any other value that is accepted by arrow.get.
+        """
+        if isinstance(value, arrow.Arrow):
+            return self.localize(value)
+        elif isinstance(value, (int, float)):
+            return self.to_local(value)
+        else:
+            return arrow.get(value).to(self.tzinfo)
+
+    def to_timestamp(self, value):
+        """
+        Return the integer epoch seconds of the specified arrow or aware
+        datetime object.
+        """
+        dt = value.datetime if isinstance(value, arrow.Arrow) else value
+        if isinstance(dt.tzinfo, tz.tzlocal):
+            wall = ((dt.toordinal() - EPOCH_ORDINAL) * 86400 +
+                    dt.hour * 3600 + dt.minute * 60 + dt.second)
+            offset = self._day_offset(wall // 86400)
+            if offset is not None:
+                timestamp = wall - offset
+                if self._day_offset(timestamp // 86400) == offset:
+                    return timestamp
+        # The local times around the DST transitions, which can be
+        # ambiguous, are resolved by the tzinfo of the datetime.
+        return calendar.timegm(dt.utctimetuple())
+
+    def format_date(self, value):
+        """Return the 'YYYY-MM-DD' str of the date of the arrow object."""
+        dt = value.datetime if isinstance(value, arrow.Arrow) else value
+        ordinal = dt.toordinal()
+        try:
+            return self._dates[ordinal]
+        except KeyError:
+            string = self._dates[ordinal] = dt.date().isoformat()
+            return string
+
+    def format_minutes(self, value):
+        """Return the 'YYYY-MM-DD HH:mm' str of the arrow object."""
+        dt = value.datetime if isinstance(value, arrow.Arrow) else value
+        return (self.format_date(dt) + ' ' +
+                MINUTE_STRS[dt.hour * 60 + dt.minute])
+
+    def parse_local(self, string):
+        """
+        Return the local arrow object of a 'YYYY-MM-DD HH:mm:ss' or a
+        'YYYY-MM-DD HH:mm' str. A ValueError is raised if the str is not
+        formatted as expected.
+        """
+        if (len(string) not in (16, 19) or string[4] != '-' or
+                string[7] != '-' or string[10] != ' ' or string[13] != ':' or
+                string[16:17] not in ('', ':')):
+            raise ValueError('Invalid date time str: %r' % string)
+        second = int(string[17:19]) if len(string) == 19 else 0
+        return arrow.Arrow(int(string[0:4]), int(string[5:7]),
+                           int(string[8:10]), int(string[11:13]),
+                           int(string[14:16]), second, 0, self.tzinfo)
+
+
+# The codec of the local timezone that is shared by QWatson.
+codec = TimeCodec()
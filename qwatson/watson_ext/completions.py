@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+Sorted indexes of the projects and tags of the activities to complete
+the names starting with a prefix, ranked by how often and how recently
+they were used.
+"""
+
+# ---- Standard imports
+
+from bisect import bisect_left, insort
+import datetime
+import heapq
+import time
+
+# ---- Local imports
+
+from qwatson.utils import instrumentation
+
+# The number of seconds after which the weight of an activity in the rank
+# of its project and tags is halved.
+HALF_LIFE = 30 * 24 * 60 * 60
+
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# A character that sorts after all the others, to find the end of the
+# range of the keys starting with a prefix.
+MAX_CHAR = '\U0010ffff'
+
+
+class CompletionIndex(object):
+    """
+    A sorted index of names that are ranked by frecency.
+
+    Each use of a name adds 2**((time - reference) / HALF_LIFE) to its
+    score, so that the ranks are those of the scores decayed to any
+    present time, and that a use can be removed by subtracting its weight.
+    The names are kept sorted by their lowercase key, so that the range of
+    the names starting with a prefix is found with two bisections.
+    """
+
+    def __init__(self, reference=None, stats=None):
+        self.reference = time.time() if reference is None else reference
+        # A dict that maps the names to their [count, score].
+        self._stats = stats or {}
+        self._keys = sorted((name.lower(), name) for name in self._stats)
+
+    def __len__(self):
+        return len(self._stats)
+
+    def __contains__(self, name):
+        return name in self._stats
+
+    def weight(self, timestamp):
+        """Return the weight of a use of a name at the specified time."""
+        return 2 ** ((timestamp - self.reference) / HALF_LIFE)
+
+    def add(self, name, timestamp, sign=1):
+        """Add a use of the name at the specified time to the index."""
+        if not name:
+            return
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = [0, 0]
+            insort(self._keys, (name.lower(), name))
+        stats[0] += sign
+        stats[1] += sign * self.weight(timestamp)
+        if stats[0] <= 0:
+            del self._stats[name]
+            del self._keys[bisect_left(self._keys, (name.lower(), name))]
+
+    def remove(self, name, timestamp):
+        """Remove a use of the name at the specified time from the index."""
+        self.add(name, timestamp, sign=-1)
+
+    def names(self):
+        """Return the sorted list of the names of the index."""
+        return sorted(self._stats)
+
+    def count(self, name):
+        """Return the number of uses of the name."""
+        return self._stats.get(name, [0])[0]
+
+    def score(self, name):
+        """Return the frecency score of the name."""
+        return self._stats.get(name, [0, 0])[1]
+
+    def complete(self, prefix, limit=10):
+        """
+        Return the names that start with the prefix, ignoring the case,
+        ranked by frecency. At most limit names are returned.
+        """
+        prefix = prefix.lower()
+        first = bisect_left(self._keys, (prefix,))
+        last = bisect_left(self._keys, (prefix + MAX_CHAR,))
+        keys = self._keys
+        return heapq.nlargest(
+            limit, (keys[i][1] for i in range(first, last)), key=self.score)
+
+
+class Completions(object):
+    """
+    The completion indexes of the projects and of the tags of the frames.
+    """
+
+    def __init__(self, reference=None):
+        self.projects = CompletionIndex(reference)
+        self.tags = CompletionIndex(self.projects.reference)
+        # The number of frames without a project, which are not completed.
+        self.unnamed_count = 0
+
+    @staticmethod
+    def frame_time(frame):
+        """
+        Return the timestamp of the local day of the start of the frame,
+        which is the time used to rank its project and tags.
+        """
+        return (frame.start.date().toordinal() - EPOCH_ORDINAL) * 86400
+
+    def add_frame(self, frame, sign=1):
+        """Add the project and tags of the frame to the indexes."""
+        timestamp = self.frame_time(frame)
+        self.projects.add(frame.project, timestamp, sign)
+        if not frame.project:
+            self.unnamed_count += sign
+        for tag in frame.tags:
+            self.tags.add(tag, timestamp, sign)
+
+    def remove_frame(self, frame):
+        """Remove the project and tags of the frame from the indexes."""
+        self.add_frame(frame, sign=-1)
+
+    def project_count(self, project):
+        """Return the number of frames of the project, which can be empty."""
+        if not project:
+            return self.unnamed_count
+        return self.projects.count(project)
+
+    def update(self, removed=(), added=()):
+        """Remove and add the specified frames from the indexes."""
+        for frame in removed:
+            self.remove_frame(frame)
+        for frame in added:
+            self.add_frame(frame)
+
+    @instrumentation.timed('completions.rebuild')
+    def rebuild(self, frames):
+        """Rebuild the indexes from the provided frames."""
+        projects = {}
+        tags = {}
+        weights = {}
+        self.unnamed_count = 0
+        for frame in frames:
+            if not frame.project:
+                self.unnamed_count += 1
+            # The weights are computed once per day.
+            timestamp = self.frame_time(frame)
+            weight = weights.get(timestamp)
+            if weight is None:
+                weight = weights[timestamp] = self.projects.weight(timestamp)
+            for stats, names in ((projects, [frame.project]),
+                                 (tags, frame.tags)):
+                for name in names:
+                    if not name:
+                        continue
+                    value = stats.get(name)
+                    if value is None:
+                        stats[name] = [1, weight]
+                    else:
+                        value[0] += 1
+                        value[1] += weight
+        self.projects = CompletionIndex(self.projects.reference, projects)
+        self.tags = CompletionIndex(self.projects.reference, tags)
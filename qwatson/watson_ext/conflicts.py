@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A sweep-line index of the time intervals of the activities to find the
+activities that overlap, the gaps between the activities of a same day and
+the activities that are not sorted by start time in the frames.
+"""
+
+# ---- Standard imports
+
+from bisect import bisect_left, bisect_right, insort
+from collections import namedtuple
+import heapq
+
+# ---- Local imports
+
+from qwatson.utils import instrumentation
+from qwatson.utils.timecodec import codec
+
+OVERLAP = 'overlap'
+GAP = 'gap'
+OUT_OF_ORDER = 'out_of_order'
+
+# The fraction of the indexed intervals above which the changes are applied
+# with a single pass over the intervals and a full sweep, rather than by
+# removing and inserting each interval in the sorted list.
+BULK_FRACTION = 0.05
+
+# A conflict between the frame with id and the frame with other_id that
+# precedes it. The start and stop are the epoch seconds of the overlap or
+# of the gap between the frames, or the start of the frames for the frames
+# that are out of order.
+Conflict = namedtuple('Conflict', ['kind', 'id', 'other_id', 'start', 'stop'])
+
+
+def frame_interval(frame):
+    """
+    Return the (start, stop, id, day) tuple of the frame, with the start
+    and stop in epoch seconds and the day as the ordinal of its local date.
+    """
+    return (codec.to_timestamp(frame.start), codec.to_timestamp(frame.stop),
+            frame.id, frame.start.date().toordinal())
+
+
+class ConflictIndex(object):
+    """
+    An index of the conflicts between the time intervals of the frames.
+
+    The intervals are kept sorted by start time, so that the overlaps and
+    gaps are found with a single sweep in which each interval is compared
+    with the interval that ends the latest among the ones that start before.
+    When frames are added or removed, only the intervals around the time
+    range of the changes are swept again.
+
+    Gaps are only reported between the activities of a same day and when
+    they are longer than min_gap seconds. No gap is reported when min_gap
+    is None.
+    """
+
+    def __init__(self, min_gap=None):
+        self.min_gap = min_gap
+        self._intervals = []
+        self._by_id = {}
+        # The conflicts of the intervals, stored by the id of the frame that
+        # starts the latest.
+        self._conflicts = {}
+        # The longest duration of the indexed intervals, which bounds how
+        # far back in time an interval can end after the start of another.
+        self._max_duration = 0
+        # A counter that is incremented whenever the index changes, which
+        # is used to cache the results of the queries.
+        self.version = 0
+        self._cache = {}
+
+    def __len__(self):
+        """Return the number of indexed frames."""
+        return len(self._intervals)
+
+    @instrumentation.timed('conflicts.rebuild')
+    def rebuild(self, frames):
+        """Rebuild the index from the provided frames."""
+        self._intervals = sorted(frame_interval(frame) for frame in frames)
+        self._by_id = {interval[2]: interval for interval in self._intervals}
+        self._max_duration = max(
+            [stop - start for start, stop, _, _ in self._intervals] or [0])
+        self._conflicts = {}
+        self._sweep(0, len(self._intervals))
+        self._changed()
+
+    def update(self, removed=(), added=()):
+        """Remove and add the specified frames from the index."""
+        if (len(removed) + len(added) >
+                BULK_FRACTION * max(len(self._intervals), 1)):
+            self._bulk_update(removed, added)
+            return
+        changes = []
+        for frame in removed:
+            interval = self._by_id.pop(frame.id, None)
+            if interval is None:
+                continue
+            del self._intervals[bisect_left(self._intervals, interval)]
+            self._conflicts.pop(frame.id, None)
+            changes.append(interval)
+        for frame in added:
+            interval = frame_interval(frame)
+            insort(self._intervals, interval)
+            self._by_id[frame.id] = interval
+            self._max_duration = max(
+                self._max_duration, interval[1] - interval[0])
+            changes.append(interval)
+        if not changes:
+            return
+
+        # The intervals that start before the changes are not affected,
+        # nor are the ones that start after the first interval starting
+        # after the end of the changes. The intervals that start at the end
+        # of the changes, including those with no duration, are swept.
+        low = min(interval[0] for interval in changes)
+        high = max(interval[1] for interval in changes)
+        first = bisect_left(self._intervals, (low,))
+        last = min(bisect_right(self._intervals, (high, float('inf'))) + 1,
+                   len(self._intervals))
+        for interval in self._intervals[first:last]:
+            self._conflicts.pop(interval[2], None)
+        self._sweep(first, last)
+        self._changed()
+
+    def _bulk_update(self, removed, added):
+        """
+        Remove and add the specified frames from the index with a single
+        pass over the intervals and sweep all the intervals again.
+        """
+        removed_ids = set()
+        for frame in removed:
+            if self._by_id.pop(frame.id, None) is not None:
+                removed_ids.add(frame.id)
+        added = sorted(frame_interval(frame) for frame in added)
+        for interval in added:
+            self._by_id[interval[2]] = interval
+        self._intervals = list(heapq.merge(
+            [interval for interval in self._intervals if
+             interval[2] not in removed_ids], added))
+        self._max_duration = max(
+            [stop - start for start, stop, _, _ in self._intervals] or [0])
+        self._conflicts = {}
+        self._sweep(0, len(self._intervals))
+        self._changed()
+
+    def _changed(self):
+        """Invalidate the results of the queries."""
+        self.version += 1
+        self._cache = {}
+
+    def _sweep(self, first, last):
+        """
+        Find the overlaps and gaps of the intervals stored between the
+        first and last positions, with the last position excluded.
+        """
+        intervals = self._intervals
+        end = None
+        if first > 0:
+            # Only the intervals that start less than the longest duration
+            # before the previous one can end after it.
+            start = intervals[first - 1][0] - self._max_duration
+            for interval in intervals[
+                    bisect_left(intervals, (start,)):first]:
+                if end is None or interval[1] > end[1]:
+                    end = interval
+        min_gap = self.min_gap
+        conflicts = self._conflicts
+        for interval in intervals[first:last]:
+            start, stop, frame_id, day = interval
+            if end is not None:
+                if end[1] > start:
+                    conflicts[frame_id] = Conflict(
+                        OVERLAP, frame_id, end[2], start, min(stop, end[1]))
+                elif (min_gap is not None and end[3] == day and
+                        start - end[1] > min_gap):
+                    conflicts[frame_id] = Conflict(
+                        GAP, frame_id, end[2], end[1], start)
+            if end is None or stop > end[1]:
+                end = interval
+
+    # ---- Queries
+
+    def conflicts(self, frames=None, kinds=(OVERLAP, GAP, OUT_OF_ORDER)):
+        """
+        Return the list of the conflicts of the specified kinds sorted by
+        time. The frames are required to find the frames that are out of
+        order.
+        """
+        conflicts = [conflict for conflict in self._conflicts.values() if
+                     conflict.kind in kinds]
+        if frames is not None and OUT_OF_ORDER in kinds:
+            conflicts.extend(self.out_of_order(frames))
+        return sorted(conflicts, key=lambda c: (c.start, c.stop, c.id))
+
+    def out_of_order(self, frames):
+        """
+        Return the list of the conflicts of the frames that start before
+        the frame that precedes them in the frames.
+        """
+        key = ('out_of_order', id(frames))
+        if key not in self._cache:
+            by_id = self._by_id
+            conflicts = []
+            previous = None
+            for frame in frames:
+                interval = by_id.get(frame.id)
+                if interval is None:
+                    continue
+                if previous is not None and interval[0] < previous[0]:
+                    conflicts.append(Conflict(
+                        OUT_OF_ORDER, frame.id, previous[2],
+                        interval[0], previous[0]))
+                previous = interval
+            self._cache[key] = conflicts
+        return self._cache[key]
+
+    def conflicting_ids(self, frames=None):
+        """
+        Return the set of the ids of the frames that are involved in a
+        conflict.
+        """
+        key = ('ids', None if frames is None else id(frames))
+        if key not in self._cache:
+            ids = set()
+            for conflict in self.conflicts(frames):
+                ids.add(conflict.id)
+                ids.add(conflict.other_id)
+            self._cache[key] = ids
+        return self._cache[key]
+
+    def free_span(self, frame_id):
+        """
+        Return the epoch seconds of the latest end of the frames that start
+        before the frame with the specified id and of the start of the
+        frame that starts after it. None is returned for the bounds with no
+        such frame.
+        """
+        intervals = self._intervals
+        interval = self._by_id[frame_id]
+        pos = bisect_left(intervals, interval)
+        previous_end = None
+        if pos > 0:
+            # Only the intervals that start less than the longest duration
+            # before the previous one can end after it.
+            start = intervals[pos - 1][0] - self._max_duration
+            for other in intervals[bisect_left(intervals, (start,)):pos]:
+                if previous_end is None or other[1] > previous_end:
+                    previous_end = other[1]
+        next_start = (intervals[pos + 1][0] if pos + 1 < len(intervals) else
+                      None)
+        return previous_end, next_start
+
+    def next_conflict(self, timestamp, frames=None):
+        """
+        Return the first conflict that starts after the specified epoch
+        seconds, or the first conflict if there is none, or None if there
+        are no conflicts.
+        """
+        conflicts = self.conflicts(frames)
+        index = next_conflict_index(conflicts, timestamp)
+        return None if index is None else conflicts[index]
+
+
+def next_conflict_index(conflicts, timestamp):
+    """
+    Return the position in the conflicts sorted by time of the first one
+    that starts after the specified epoch seconds, or of the first one if
+    there is none, or None if there are no conflicts.
+    """
+    if not conflicts:
+        return None
+    lo, hi = 0, len(conflicts)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if conflicts[mid].start <= timestamp:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo if lo < len(conflicts) else 0
+
+
+def find_conflicts(frames, min_gap=None):
+    """
+    Return the sorted list of the overlaps, the gaps longer than min_gap
+    seconds and the frames out of order in the provided frames.
+
+    This can be used to check the frames of a Watson client without
+    starting QWatson, for example::
+
+        from qwatson.watson_ext.watsonextends import Watson
+        conflicts = find_conflicts(Watson().frames, min_gap=3600)
+    """
+    index = ConflictIndex(min_gap)
+    index.rebuild(frames)
+    return index.conflicts(frames)
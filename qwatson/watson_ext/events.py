@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A feed of the changes made to the frames and the projects, so that the
+indexes, caches and models that are derived from them can be updated
+incrementally instead of being computed again from scratch.
+"""
+
+# ---- Standard imports
+
+from collections import namedtuple
+
+# ---- Events
+# Each event is stamped with the data version of the feed after the change.
+# The rows of the frame events are the indexes of the frames in the list of
+# frames, and those of the removed frames are their indexes before removal.
+
+FramesAdded = namedtuple('FramesAdded', ['version', 'rows', 'frames'])
+FramesEdited = namedtuple('FramesEdited', ['version', 'rows', 'old', 'new'])
+FramesRemoved = namedtuple('FramesRemoved', ['version', 'rows', 'frames'])
+FramesReset = namedtuple('FramesReset', ['version', 'frames'])
+
+ProjectAdded = namedtuple('ProjectAdded', ['version', 'project'])
+ProjectRenamed = namedtuple(
+    'ProjectRenamed', ['version', 'old_name', 'new_name', 'rows'])
+ProjectMerged = namedtuple(
+    'ProjectMerged', ['version', 'old_name', 'new_name', 'rows'])
+ProjectDeleted = namedtuple('ProjectDeleted', ['version', 'project', 'rows'])
+
+FRAME_EVENTS = (FramesAdded, FramesEdited, FramesRemoved, FramesReset)
+PROJECT_EVENTS = (ProjectAdded, ProjectRenamed, ProjectMerged,
+                  ProjectDeleted)
+
+
+class ChangeFeed(object):
+    """
+    A publisher of the changes made to the frames and the projects.
+
+    The subscribers are callables that are called with each event in the
+    order they subscribed, after the change was applied.
+    """
+
+    def __init__(self):
+        # A counter that is incremented for each published event.
+        self.version = 0
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        """Subscribe the callback to the events and return it."""
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Unsubscribe the callback from the events, if it is subscribed."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def publish(self, event_type, *args):
+        """
+        Create an event of the specified type from the provided arguments,
+        stamped with a new data version, send it to the subscribers and
+        return it.
+        """
+        self.version += 1
+        event = event_type(self.version, *args)
+        for callback in list(self._subscribers):
+            callback(event)
+        return event
+
+
+def index_subscriber(index):
+    """
+    Return a subscriber that keeps the index up to date with the frame
+    events. The index must implement update(removed, added) and
+    rebuild(frames), like the RollupStore, the SearchIndex, the Completions
+    and the ConflictIndex.
+    """
+    def update_index(event):
+        if isinstance(event, FramesAdded):
+            index.update(added=event.frames)
+        elif isinstance(event, FramesEdited):
+            index.update(removed=event.old, added=event.new)
+        elif isinstance(event, FramesRemoved):
+            index.update(removed=event.frames)
+        elif isinstance(event, FramesReset):
+            index.rebuild(event.frames)
+    return update_index
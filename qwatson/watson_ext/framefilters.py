@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+The project and tag filters of the overview compiled in an immutable
+object that can be evaluated quickly on the frames.
+"""
+
+
+class FrameFilter(object):
+    """
+    The project and tag filters of the overview, compiled from the dicts
+    that map the projects and tags to whether they are shown or not.
+
+    The projects and tags that are not in the dicts are shown. A frame
+    without tag is shown if the empty tag '' is shown. A frame with tags is
+    shown if any of its tags is shown.
+
+    The hidden projects are compiled in a set and the tags in a bitmask,
+    where each tag of the filters is given a bit. The masks of the tag
+    lists of the frames are memoized, since a history usually has only a
+    few distinct tag lists.
+    """
+    __slots__ = ('hidden_projects', 'tag_bits', 'shown_tags_mask',
+                 'accepts_all', '_tags_masks')
+
+    def __init__(self, project_filters=None, tag_filters=None):
+        self.hidden_projects = frozenset(
+            project for project, shown in (project_filters or {}).items()
+            if not shown)
+
+        tag_filters = tag_filters or {}
+        self.tag_bits = {tag: 1 << i for i, tag in
+                         enumerate(sorted(tag_filters))}
+        self.shown_tags_mask = sum(
+            bit for tag, bit in self.tag_bits.items() if tag_filters[tag])
+        all_tags_shown = all(tag_filters.values())
+
+        # The fast path used when the (Select All) items of both the
+        # projects and tags filters are checked.
+        self.accepts_all = not self.hidden_projects and all_tags_shown
+        self._tags_masks = {}
+
+    def __eq__(self, other):
+        return (isinstance(other, FrameFilter) and
+                self.hidden_projects == other.hidden_projects and
+                self.hidden_tags == other.hidden_tags)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.hidden_projects, self.hidden_tags))
+
+    @property
+    def hidden_tags(self):
+        """Return the set of the tags that are hidden."""
+        return frozenset(tag for tag, bit in self.tag_bits.items() if
+                         not bit & self.shown_tags_mask)
+
+    @property
+    def all_tags_shown(self):
+        """Return whether no tag is hidden by the filter."""
+        return self.shown_tags_mask == sum(self.tag_bits.values())
+
+    def tags_accepted(self, tags):
+        """Return whether a frame with the list of tags is accepted."""
+        key = tuple(tags)
+        try:
+            return self._tags_masks[key]
+        except KeyError:
+            pass
+        mask = 0
+        for tag in (tags or ['']):
+            bit = self.tag_bits.get(tag)
+            if bit is None:
+                # The tag is not in the filters, so it is shown.
+                accepted = True
+                break
+            mask |= bit
+        else:
+            accepted = bool(mask & self.shown_tags_mask)
+        self._tags_masks[key] = accepted
+        return accepted
+
+    def accepts(self, frame):
+        """Return whether the frame is accepted by the filter."""
+        if self.accepts_all:
+            return True
+        if frame.project in self.hidden_projects:
+            return False
+        return self.tags_accepted(frame.tags)
+
+    def accepted_rows(self, frames, first, last):
+        """
+        Return a bytearray with whether each of the frames stored between
+        the first and last indexes, with last excluded, is accepted by the
+        filter, or None if all the frames are accepted.
+        """
+        if self.accepts_all:
+            return None
+        return bytearray(self.accepts(frames[row]) for
+                         row in range(first, last))
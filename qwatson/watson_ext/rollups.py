@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A store of the durations of the activities pre-aggregated per local day,
+project and tag, so that the totals of any span of days can be answered
+without iterating over the frames.
+"""
+
+# ---- Standard imports
+
+import datetime
+import json
+import os.path as osp
+
+# ---- Local imports
+
+from qwatson.utils import instrumentation
+
+# The version of the format of the rollups file. The store is rebuilt from
+# the frames when the file was written with another version.
+ROLLUPS_VERSION = 1
+
+
+def span_to_ordinals(span):
+    """
+    Return the range of the proleptic Gregorian ordinals of the days that
+    are included in the specified arrow span.
+    """
+    return range(span[0].date().toordinal(), span[1].date().toordinal() + 1)
+
+
+class RollupStore(object):
+    """
+    The total duration and the number of the activities per local day,
+    project and tag.
+
+    The activities are counted on the day of their start time, which is
+    how they are shown in the overview. An activity is counted once for
+    each of its tags, and once under the tag None that holds the totals of
+    its project. Activities without tags are counted under the empty tag.
+    """
+
+    def __init__(self):
+        # A dict of dict that maps the day ordinals to the (project, tag)
+        # keys, which map to the [total seconds, count] of the activities.
+        self._days = {}
+        self.signature = None
+        # Whether the frames file is sorted by start time, or None if
+        # unknown, as saved along with the rollups.
+        self.frames_sorted = None
+
+    def __len__(self):
+        """Return the number of days with activities."""
+        return len(self._days)
+
+    # ---- Updates
+
+    @staticmethod
+    def rollup_keys(project, tags):
+        """
+        Return the (project, tag) keys an activity of the project with the
+        specified tags is counted under.
+        """
+        return [(project, None)] + [(project, tag) for tag in (tags or [''])]
+
+    def add_frame(self, frame, sign=1):
+        """Add the duration of the frame to the rollups."""
+        self.add_values(frame.start.date().toordinal(),
+                        (frame.stop - frame.start).total_seconds(),
+                        frame.project, frame.tags, sign)
+
+    def add_values(self, ordinal, seconds, project, tags, sign=1):
+        """
+        Add the duration in seconds of an activity of the project with the
+        specified tags that started on the day ordinal to the rollups.
+        """
+        rollups = self._days.setdefault(ordinal, {})
+        for key in self.rollup_keys(project, tags):
+            value = rollups.setdefault(key, [0, 0])
+            value[0] += sign * seconds
+            value[1] += sign
+            if value[1] == 0:
+                del rollups[key]
+        if not rollups:
+            del self._days[ordinal]
+
+    def remove_frame(self, frame):
+        """Remove the duration of the frame from the rollups."""
+        self.add_frame(frame, sign=-1)
+
+    def update(self, removed=(), added=()):
+        """Remove and add the specified frames from the rollups."""
+        for frame in removed:
+            self.remove_frame(frame)
+        for frame in added:
+            self.add_frame(frame)
+
+    @instrumentation.timed('rollups.rebuild')
+    def rebuild(self, frames):
+        """Rebuild the rollups from the provided frames."""
+        self._days = {}
+        for frame in frames:
+            self.add_frame(frame)
+
+    # ---- Queries
+
+    def total(self, span, project=None, tag=None):
+        """
+        Return the total number of seconds of the activities that started
+        within the days of the span. The total can be restricted to the
+        activities of a project, of a tag, or both.
+        """
+        return self.totals(span, project, tag)[0]
+
+    def count(self, span, project=None, tag=None):
+        """
+        Return the number of activities that started within the days of the
+        span, with the same restrictions as for the total.
+        """
+        return self.totals(span, project, tag)[1]
+
+    def totals(self, span, project=None, tag=None):
+        """
+        Return the total number of seconds and the number of the activities
+        that started within the days of the span.
+        """
+        return self._totals(span_to_ordinals(span), project, tag)
+
+    def _totals(self, ordinals, project=None, tag=None):
+        seconds = count = 0
+        for ordinal in ordinals:
+            rollups = self._days.get(ordinal)
+            if rollups is None:
+                continue
+            if project is not None:
+                value = rollups.get((project, tag))
+                if value is not None:
+                    seconds += value[0]
+                    count += value[1]
+            else:
+                for (_project, _tag), value in rollups.items():
+                    if _tag == tag:
+                        seconds += value[0]
+                        count += value[1]
+        return seconds, count
+
+    def daily_totals(self, span, project=None, tag=None):
+        """
+        Return a dict with the total number of seconds of each day of the
+        span with activities.
+        """
+        totals = {}
+        for ordinal in span_to_ordinals(span):
+            if ordinal in self._days:
+                seconds, count = self._totals([ordinal], project, tag)
+                if count:
+                    totals[datetime.date.fromordinal(ordinal)] = seconds
+        return totals
+
+    def project_totals(self, span):
+        """Return a dict with the total number of seconds per project."""
+        return self._grouped_totals(span, lambda key: key[1] is None, 0)
+
+    def tag_totals(self, span):
+        """Return a dict with the total number of seconds per tag."""
+        return self._grouped_totals(span, lambda key: key[1] is not None, 1)
+
+    def _grouped_totals(self, span, accept, group):
+        totals = {}
+        for ordinal in span_to_ordinals(span):
+            for key, value in self._days.get(ordinal, {}).items():
+                if accept(key):
+                    totals[key[group]] = totals.get(key[group], 0) + value[0]
+        return totals
+
+    def days(self, first, last):
+        """
+        Iterate over the day ordinals from first to last, inclusively, that
+        have activities, along with the dict that maps their (project, tag)
+        keys to the [total seconds, count] of the activities.
+        """
+        for ordinal in sorted(self._days):
+            if first <= ordinal <= last:
+                yield ordinal, self._days[ordinal]
+
+    def filtered_total(self, span, frame_filter=None):
+        """
+        Return the total number of seconds of the activities of the span
+        that are accepted by the FrameFilter, or None if it can't be
+        answered from the rollups.
+
+        The rollups can't tell whether an activity with several tags is
+        accepted when some tags are filtered out, so None is returned
+        when the filter does not accept all the tags.
+        """
+        if frame_filter is not None and not frame_filter.all_tags_shown:
+            return None
+        total_seconds = self.total(span)
+        if frame_filter is not None:
+            for project in frame_filter.hidden_projects:
+                total_seconds -= self.total(span, project=project)
+        return total_seconds
+
+    # ---- Persistence
+
+    def save(self, filename, signature, frames_sorted=None):
+        """
+        Write the rollups to a file along with the version of the format,
+        the signature of the frames file they were computed from and
+        whether its frames are sorted by start time, if known.
+        """
+        self.signature = signature
+        self.frames_sorted = frames_sorted
+        days = {datetime.date.fromordinal(ordinal).isoformat(): [
+                [project, tag, value[0], value[1]] for
+                (project, tag), value in rollups.items()] for
+                ordinal, rollups in self._days.items()}
+        with open(filename, 'w') as f:
+            json.dump({'version': ROLLUPS_VERSION,
+                       'signature': signature,
+                       'frames_sorted': frames_sorted,
+                       'days': days}, f)
+
+    def load(self, filename, signature):
+        """
+        Read the rollups from a file and return whether they were computed
+        from the frames file with the specified signature with the current
+        version of the format. The rollups are left empty otherwise.
+        """
+        self._days = {}
+        self.signature = None
+        self.frames_sorted = None
+        if signature is None or not osp.exists(filename):
+            return False
+        try:
+            with open(filename, 'r') as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if (content.get('version') != ROLLUPS_VERSION or
+                content.get('signature') != list(signature)):
+            return False
+        for day, items in content['days'].items():
+            ordinal = datetime.datetime.strptime(
+                day, '%Y-%m-%d').date().toordinal()
+            self._days[ordinal] = {
+                (project, tag): [seconds, count] for
+                project, tag, seconds, count in items}
+        self.signature = signature
+        self.frames_sorted = content.get('frames_sorted')
+        return True
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+An inverted index of the words of the comments, tags and projects of the
+activities, to find the activities mentioning some words without
+iterating over the frames.
+"""
+
+# ---- Standard imports
+
+from bisect import bisect_left, insort
+import re
+
+# ---- Local imports
+
+from qwatson.utils import instrumentation
+
+WORD_REGEX = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Return the list of the lowercase words of the text."""
+    return WORD_REGEX.findall(text.lower()) if text else []
+
+
+def frame_tokens(frame):
+    """
+    Return the set of the words of the comment, tags and project of the
+    frame.
+    """
+    tokens = set(tokenize(frame.project))
+    tokens.update(tokenize(frame.message))
+    for tag in frame.tags:
+        tokens.update(tokenize(tag))
+    return tokens
+
+
+class SearchIndex(object):
+    """
+    An inverted index that maps the words of the frames to the ids of the
+    frames that contain them and to the number of these frames per local
+    day. The words are also kept in a sorted list, so that the words
+    starting with a prefix are found by bisection.
+
+    The index can be built from a snapshot of the frames in a background
+    thread with build_data. The changes made to the frames between
+    begin_build and finish_build are recorded and applied once the data
+    built in the background are installed.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._day_counts = {}
+        self._words = []
+        # The ordinal of the local day of the start of each indexed frame.
+        self._days = {}
+        self._pending = None
+        self._build_id = 0
+
+    def __len__(self):
+        """Return the number of indexed frames."""
+        return len(self._days)
+
+    @property
+    def is_ready(self):
+        """Return whether the index is not waiting for a background build."""
+        return self._pending is None
+
+    # ---- Build
+
+    @staticmethod
+    def build_data(frames):
+        """
+        Return the postings, the day counts, the sorted words and the days
+        of the provided frames. This does not change the index and can be
+        run in a background thread on a snapshot of the frames.
+        """
+        postings = {}
+        day_counts = {}
+        days = {}
+        for frame in frames:
+            day = frame.start.date().toordinal()
+            for token in frame_tokens(frame):
+                postings.setdefault(token, set()).add(frame.id)
+                counts = day_counts.setdefault(token, {})
+                counts[day] = counts.get(day, 0) + 1
+            days[frame.id] = day
+        return postings, day_counts, sorted(postings), days
+
+    def begin_build(self):
+        """
+        Start recording the changes made to the frames until the data that
+        are built in the background are passed to finish_build. Return the
+        id of the build that needs to be passed to finish_build.
+        """
+        self._build_id += 1
+        self._pending = []
+        return self._build_id
+
+    def finish_build(self, build_id, data):
+        """
+        Install the data built in the background and apply the changes that
+        were made to the frames in the meantime. The data are discarded if
+        the index was rebuilt since the build was started.
+        """
+        if build_id != self._build_id or self._pending is None:
+            return False
+        (self._postings, self._day_counts, self._words,
+         self._days) = data
+        pending, self._pending = self._pending, None
+        for removed, added in pending:
+            self.update(removed, added)
+        return True
+
+    @instrumentation.timed('search_index.rebuild')
+    def rebuild(self, frames):
+        """Rebuild the index from the provided frames."""
+        self._build_id += 1
+        self._pending = None
+        (self._postings, self._day_counts, self._words,
+         self._days) = self.build_data(frames)
+
+    # ---- Updates
+
+    def add_frame(self, frame):
+        """Add the words of the frame to the index."""
+        day = frame.start.date().toordinal()
+        for token in frame_tokens(frame):
+            ids = self._postings.get(token)
+            if ids is None:
+                ids = self._postings[token] = set()
+                self._day_counts[token] = {}
+                insort(self._words, token)
+            ids.add(frame.id)
+            counts = self._day_counts[token]
+            counts[day] = counts.get(day, 0) + 1
+        self._days[frame.id] = day
+
+    def remove_frame(self, frame):
+        """Remove the words of the frame from the index."""
+        day = self._days.pop(frame.id, None)
+        if day is None:
+            return
+        for token in frame_tokens(frame):
+            ids = self._postings.get(token)
+            if ids is None or frame.id not in ids:
+                continue
+            ids.remove(frame.id)
+            counts = self._day_counts[token]
+            counts[day] -= 1
+            if counts[day] == 0:
+                del counts[day]
+            if not ids:
+                del self._postings[token]
+                del self._day_counts[token]
+                del self._words[bisect_left(self._words, token)]
+
+    def update(self, removed=(), added=()):
+        """Remove and add the specified frames from the index."""
+        if self._pending is not None:
+            self._pending.append((list(removed), list(added)))
+            return
+        for frame in removed:
+            self.remove_frame(frame)
+        for frame in added:
+            self.add_frame(frame)
+
+    # ---- Queries
+
+    def words(self, prefix):
+        """Return the sorted list of the indexed words starting with prefix."""
+        words = []
+        for i in range(bisect_left(self._words, prefix), len(self._words)):
+            if not self._words[i].startswith(prefix):
+                break
+            words.append(self._words[i])
+        return words
+
+    def _prefix_groups(self, query):
+        """
+        Return a list with the list of the words starting with each word
+        of the query, sorted by the number of frames they contain.
+        """
+        groups = [self.words(prefix) for prefix in tokenize(query)]
+        return sorted(groups, key=lambda words: sum(
+            len(self._postings[word]) for word in words))
+
+    def _candidate_days(self, groups):
+        """
+        Return the set of the days on which frames contain a word of each
+        group of words.
+        """
+        days = None
+        for words in groups:
+            group_days = set()
+            for word in words:
+                group_days.update(self._day_counts[word])
+            days = group_days if days is None else days & group_days
+            if not days:
+                break
+        return days or set()
+
+    def search(self, query):
+        """
+        Return the set of the ids of the frames that contain all the words
+        of the query. Each word of the query matches the words of the
+        frames that start with it.
+        """
+        result = None
+        for words in self._prefix_groups(query):
+            if len(words) == 1:
+                ids = self._postings[words[0]]
+            else:
+                ids = set()
+                for word in words:
+                    ids.update(self._postings[word])
+            result = set(ids) if result is None else result & ids
+            if not result:
+                break
+        return result or set()
+
+    def search_days(self, query):
+        """
+        Return the sorted list of the ordinals of the local days on which
+        start the frames that match the query.
+        """
+        groups = self._prefix_groups(query)
+        if len(groups) == 1:
+            # The days are read from the day counts of the words without
+            # looking at the frames.
+            return sorted(self._candidate_days(groups))
+        days = self._days
+        return sorted({days[frame_id] for frame_id in self.search(query)})
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+"""
+A delta sync of the frames with a Watson sync server, which only pushes
+the frames that were updated since the last sync and pulls the changes of
+the server by pages, with gzip compressed batches sent over a single
+connection.
+"""
+
+# ---- Standard imports
+
+from collections import namedtuple
+import gzip
+import json
+import uuid
+
+# ---- Third parties imports
+
+import arrow
+import requests
+from watson.watson import ConfigurationError, WatsonError
+
+# ---- Local imports
+
+from qwatson.utils import instrumentation
+from qwatson.watson_ext.watsonextends import Frame
+
+# The number of frames pulled per request.
+PAGE_SIZE = 1000
+
+# The number of frames pushed per request.
+BATCH_SIZE = 1000
+
+# The frames pulled from the server, the number of frames pushed to it, and
+# the time of the pull that becomes the last sync watermark once the pulled
+# frames are merged.
+SyncResult = namedtuple('SyncResult', ['pulled', 'pushed', 'last_pull'])
+
+SyncReport = namedtuple('SyncReport', ['pushed', 'pulled', 'added', 'updated'])
+
+
+def encode_frame(frame):
+    """Return the dict of a frame that is sent to the server."""
+    return {'id': uuid.UUID(frame.id).urn,
+            'start_at': str(frame.start.to('utc')),
+            'end_at': str(frame.stop.to('utc')),
+            'project': frame.project,
+            'tags': frame.tags,
+            'message': frame.message,
+            'updated_at': str(frame.updated_at.to('utc'))}
+
+
+def decode_frame(data, updated_at):
+    """
+    Return the Frame of a dict received from the server. The frame is
+    updated at the specified time if the server does not tell when.
+    """
+    return Frame(arrow.get(data['start_at']), arrow.get(data['end_at']),
+                 data['project'], uuid.UUID(data['id']).hex,
+                 data.get('tags'), data.get('updated_at') or updated_at,
+                 data.get('message'))
+
+
+def frames_to_push(frames, last_sync, last_pull):
+    """
+    Return the frames that were updated after the last sync and before the
+    last pull. The frames updated after the last pull are pushed with the
+    next sync.
+    """
+    return [frame for frame in frames if
+            last_pull > frame.updated_at > last_sync]
+
+
+class SyncClient(object):
+    """
+    A client of the frames API of a Watson sync server that reuses the
+    same HTTP connection for all its requests.
+    """
+
+    def __init__(self, url, token, page_size=PAGE_SIZE,
+                 batch_size=BATCH_SIZE, timeout=30):
+        self.url = url.rstrip('/')
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': "Token {}".format(token),
+            'Accept-Encoding': 'gzip'})
+
+    @classmethod
+    def from_config(cls, client):
+        """
+        Return a SyncClient for the backend url and token of the config of
+        the watson_ext client.
+        """
+        url = client.config.get('backend', 'url')
+        token = client.config.get('backend', 'token')
+        if not url or not token:
+            raise ConfigurationError(
+                "You must specify a remote URL (backend.url) and a token "
+                "(backend.token) using the config command.")
+        return cls(url, token)
+
+    def close(self):
+        """Close the connection with the server."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _request(self, method, route, status, **kwargs):
+        """
+        Send a request to the route of the server and return the response.
+        A WatsonError is raised if the status of the response is not the
+        expected one.
+        """
+        try:
+            response = self.session.request(
+                method, "{}/{}/".format(self.url, route),
+                timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            raise WatsonError("Unable to reach the server.")
+        if response.status_code != status:
+            raise WatsonError(
+                "An error occurred with the remote server (status: {}). "
+                "Response was:\n{}".format(response.status_code,
+                                           response.text))
+        return response
+
+    @instrumentation.timed('sync.push')
+    def push(self, frames):
+        """
+        Push the frames to the server in gzip compressed batches and return
+        the number of frames that were pushed.
+        """
+        for i in range(0, len(frames), self.batch_size):
+            batch = [encode_frame(frame) for
+                     frame in frames[i:i + self.batch_size]]
+            self._request(
+                'POST', 'frames/bulk', 201,
+                data=gzip.compress(json.dumps(batch).encode('utf-8')),
+                headers={'Content-Type': 'application/json',
+                         'Content-Encoding': 'gzip'})
+        return len(frames)
+
+    @instrumentation.timed('sync.pull')
+    def pull(self, last_sync, pulled_at=None):
+        """
+        Pull by pages the frames that changed on the server since the last
+        sync and return them as a list of Frame. The frames are updated at
+        pulled_at, or else at the time of the pull, if the server does not
+        tell when.
+        """
+        pulled_at = pulled_at or arrow.utcnow()
+        frames = []
+        page = 1
+        while True:
+            response = self._request(
+                'GET', 'frames', 200,
+                params={'last_sync': str(last_sync), 'page': page,
+                        'page_size': self.page_size})
+            try:
+                items = response.json() or []
+                frames.extend(decode_frame(item, pulled_at) for
+                              item in items)
+            except (KeyError, TypeError, ValueError) as e:
+                raise WatsonError(
+                    "Invalid frames received from the server: {}".format(e))
+            if len(items) < self.page_size:
+                return frames
+            page += 1
+
+    def sync(self, frames, last_sync):
+        """
+        Pull the changes of the server since the last sync, then push the
+        frames that were updated since, and return the SyncResult. This can
+        be run in a background thread with a copy of the list of frames.
+
+        The pulled frames that the server does not tell when they were
+        updated are updated at the time of the pull, so that they are not
+        pushed back with the next sync. See frames_to_push.
+        """
+        last_pull = arrow.utcnow()
+        pulled = self.pull(last_sync, last_pull)
+        pushed = self.push(frames_to_push(frames, last_sync, last_pull))
+        return SyncResult(pulled, pushed, last_pull)
+
+
+def apply_sync_result(client, result, commit=None):
+    """
+    Merge the frames pulled from the server into the frames of the
+    watson_ext client, move its last sync watermark to the time of the
+    pull and return the SyncReport. The merged frames are passed to commit
+    as described in Watson.merge_imported.
+    """
+    report = client.merge_imported(result.pulled, commit)
+    client.last_sync = result.last_pull
+    return SyncReport(result.pushed, len(result.pulled),
+                      report.added, report.updated)
+
+
+def sync(client, sync_client=None):
+    """
+    Sync the frames of the watson_ext client with the server of its config,
+    or with the specified SyncClient, save them and return the SyncReport.
+    """
+    if sync_client is None:
+        with SyncClient.from_config(client) as sync_client:
+            result = sync_client.sync(list(client.frames), client.last_sync)
+    else:
+        result = sync_client.sync(list(client.frames), client.last_sync)
+    report = apply_sync_result(client, result)
+    client.save()
+    return report
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext.completions import (
+    HALF_LIFE, CompletionIndex, Completions)
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.watson_ext.watsonhelpers import edit_frame_at
+
+
+def test_completion_index_ranks():
+    """
+    Test that the names starting with a prefix are ranked by how often and
+    how recently they were used.
+    """
+    index = CompletionIndex(reference=0)
+    for name, timestamp in [('Ticket-12', 0), ('ticket-12', 0),
+                            ('ticket-2', 0), ('ticket-2', 0),
+                            ('ticket-3', HALF_LIFE * 2), ('other', 0)]:
+        index.add(name, timestamp)
+
+    # A use two half-lives more recent weights twice two older uses.
+    assert index.complete('TICK') == [
+        'ticket-3', 'ticket-2', 'Ticket-12', 'ticket-12']
+    assert index.complete('ticket-1') == ['Ticket-12', 'ticket-12']
+    assert index.complete('ticket', limit=2) == ['ticket-3', 'ticket-2']
+    assert index.complete('x') == []
+    assert len(index.complete('')) == 5
+
+    for i in range(4):
+        index.add('ticket-12', 0)
+    assert index.complete('ticket-') == [
+        'ticket-12', 'ticket-3', 'ticket-2', 'Ticket-12']
+
+    index.remove('ticket-3', HALF_LIFE * 2)
+    assert 'ticket-3' not in index
+    assert index.complete('ticket-3') == []
+    assert index.count('ticket-12') == 5
+
+
+def test_completions_updates(tmpdir):
+    """
+    Test that the completions of the client are kept up to date when the
+    frames are added, edited or removed.
+    """
+    client = Watson(config_dir=str(tmpdir))
+    completions = client.completions
+    day = local_arrow_from_tuple((2018, 6, 14, 0, 0, 0))
+    for i in range(3):
+        client.frames.add('qwatson', day.shift(days=i),
+                          day.shift(days=i, hours=1), tags=['dev', 'ci'])
+    client.frames.add('watson', day.shift(days=3), day.shift(days=3, hours=1),
+                      tags=['dev'])
+    assert completions.projects.complete('') == ['qwatson', 'watson']
+    assert completions.tags.complete('') == ['dev', 'ci']
+
+    edit_frame_at(client, 0, project='watson', tags=['docs'])
+    assert completions.projects.complete('') == ['watson', 'qwatson']
+    assert completions.tags.complete('d') == ['dev', 'docs']
+    assert client.tags == ['ci', 'dev', 'docs']
+
+    client.delete_project('watson')
+    assert completions.projects.complete('') == ['qwatson']
+    assert completions.tags.complete('d') == ['dev']
+    assert client.tags == ['ci', 'dev']
+
+    rebuilt = Completions(completions.projects.reference)
+    rebuilt.rebuild(client.frames)
+    assert rebuilt.projects._keys == completions.projects._keys
+    assert rebuilt.tags._keys == completions.tags._keys
+    assert (rebuilt.tags._stats['dev'][0] ==
+            completions.tags._stats['dev'][0] == 2)
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
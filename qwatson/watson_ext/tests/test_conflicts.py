@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+import random
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext.conflicts import (
+    GAP, OUT_OF_ORDER, OVERLAP, ConflictIndex, find_conflicts,
+    next_conflict_index)
+from qwatson.watson_ext.events import index_subscriber
+from qwatson.watson_ext.watsonextends import Frames, Watson
+from qwatson.watson_ext.watsonhelpers import edit_frame_at
+
+
+@pytest.fixture
+def day():
+    return local_arrow_from_tuple((2018, 6, 14, 0, 0, 0))
+
+
+def add_frame(frames, day, start, stop, name):
+    """Add a frame that starts and stops at the specified hours of day."""
+    return frames.add(name, day.shift(hours=start), day.shift(hours=stop),
+                      id=name)
+
+
+def test_find_conflicts(day):
+    """
+    Test that the overlaps, the gaps longer than the threshold and the
+    frames that are out of order are found.
+    """
+    frames = Frames()
+    add_frame(frames, day, 8, 12, 'a')
+    add_frame(frames, day, 9, 10, 'b')
+    add_frame(frames, day, 11, 13, 'c')
+    add_frame(frames, day, 15, 16, 'd')
+    add_frame(frames, day, 14, 14.5, 'e')
+    add_frame(frames, day, 30, 31, 'f')
+
+    conflicts = find_conflicts(frames, min_gap=3600)
+    assert [(c.kind, c.id, c.other_id) for c in conflicts] == [
+        (OVERLAP, 'b', 'a'), (OVERLAP, 'c', 'a'), (OUT_OF_ORDER, 'e', 'd')]
+    assert conflicts[1].start == day.shift(hours=11).timestamp
+    assert conflicts[1].stop == day.shift(hours=12).timestamp
+
+    # Gaps are only reported between the activities of a same day.
+    conflicts = find_conflicts(frames, min_gap=1200)
+    assert [(c.kind, c.id, c.other_id) for c in conflicts] == [
+        (OVERLAP, 'b', 'a'), (OVERLAP, 'c', 'a'), (GAP, 'e', 'c'),
+        (OUT_OF_ORDER, 'e', 'd'), (GAP, 'd', 'e')]
+    assert find_conflicts(Frames()) == []
+
+    # The next conflict is found by bisection in the sorted conflicts.
+    starts = [conflict.start for conflict in conflicts]
+    assert next_conflict_index(conflicts, starts[0] - 1) == 0
+    assert next_conflict_index(conflicts, starts[1]) == 2
+    assert next_conflict_index(conflicts, starts[-1]) == 0
+    assert next_conflict_index([], starts[0]) is None
+
+
+def test_conflicts_updates(tmpdir, day):
+    """
+    Test that the conflicts that are updated incrementally when frames are
+    added, edited and removed are the same as the rebuilt ones.
+    """
+    random.seed(0)
+    client = Watson(config_dir=str(tmpdir))
+    frames = client.frames
+    index = ConflictIndex(min_gap=1800)
+    index.rebuild(frames)
+    frames.feed.subscribe(index_subscriber(index))
+    for i in range(300):
+        start = random.randrange(0, 24 * 7 * 4) / 4
+        duration = random.randrange(1, 12) / 4
+        action = random.random()
+        if action < 0.6 or len(frames) < 10:
+            add_frame(frames, day, start, start + duration, str(i))
+        elif action < 0.8:
+            edit_frame_at(client, random.randrange(len(frames)),
+                          start=day.shift(hours=start),
+                          stop=day.shift(hours=start + duration))
+        else:
+            del frames[random.randrange(len(frames))]
+
+        expected = ConflictIndex(min_gap=1800)
+        expected.rebuild(frames)
+        assert index.conflicts(frames) == expected.conflicts(frames)
+
+    # The bulk changes are applied with a single pass over the intervals.
+    frames.remove_rows(range(0, len(frames), 2))
+    frames.insert_frames(0, [
+        frames.new_frame('p', day.shift(hours=i), day.shift(hours=i + 2))
+        for i in range(0, 100, 3)])
+    expected = ConflictIndex(min_gap=1800)
+    expected.rebuild(frames)
+    assert index.conflicts(frames) == expected.conflicts(frames)
+    assert index._intervals == expected._intervals
+    assert index._max_duration == expected._max_duration
+
+
+def test_conflicts_updates_no_duration(tmpdir, day):
+    """
+    Test that the conflicts of the frames that start at the end of the
+    changes are updated when frames with no duration or with the same
+    start as another frame are added or edited.
+    """
+    client = Watson(config_dir=str(tmpdir))
+    frames = client.frames
+    index = ConflictIndex(min_gap=1800)
+    index.rebuild(frames)
+    frames.feed.subscribe(index_subscriber(index))
+
+    def assert_rebuilt():
+        expected = ConflictIndex(min_gap=1800)
+        expected.rebuild(frames)
+        assert index.conflicts(frames) == expected.conflicts(frames)
+
+    add_frame(frames, day, 8, 9, 'a')
+    add_frame(frames, day, 10, 11, 'b')
+    assert [(c.kind, c.id, c.other_id) for c in index.conflicts()] == [
+        (GAP, 'b', 'a')]
+    add_frame(frames, day, 9.5, 9.5, 'c')
+    assert_rebuilt()
+    assert index.conflicts() == []
+    for start, stop in [(9.75, 9.75), (10, 10), (8, 8), (10, 10.5)]:
+        edit_frame_at(client, 2, start=day.shift(hours=start),
+                      stop=day.shift(hours=stop))
+        assert_rebuilt()
+
+    random.seed(1)
+    for i in range(200):
+        start = random.randrange(0, 48) / 2
+        stop = start + random.randrange(0, 3) / 2
+        if random.random() < 0.5 or len(frames) < 5:
+            add_frame(frames, day, start, stop, str(i))
+        else:
+            edit_frame_at(client, random.randrange(len(frames)),
+                          start=day.shift(hours=start),
+                          stop=day.shift(hours=stop))
+        assert_rebuilt()
+
+
+def test_free_span(tmpdir, day):
+    """
+    Test that the range in which a frame can be moved is found from the
+    frames sorted by time and not from the neighbouring rows.
+    """
+    client = Watson(config_dir=str(tmpdir))
+    add_frame(client.frames, day, 8, 9, 'a')
+    add_frame(client.frames, day, 12, 13, 'b')
+    add_frame(client.frames, day, 10, 11, 'c')
+    conflicts = client.conflicts
+    assert conflicts.free_span('c') == (
+        day.shift(hours=9).timestamp, day.shift(hours=12).timestamp)
+    assert conflicts.free_span('a') == (None, day.shift(hours=10).timestamp)
+    assert conflicts.free_span('b') == (day.shift(hours=11).timestamp, None)
+
+    # The conflicts of the client are kept up to date with the frames.
+    assert conflicts.conflicting_ids(client.frames) == {'b', 'c'}
+    edit_frame_at(client, 2, start=day.shift(hours=8, minutes=30))
+    assert conflicts.conflicting_ids(client.frames) == {'a', 'b', 'c'}
+    del client.frames['a']
+    del client.frames['b']
+    assert conflicts.conflicting_ids(client.frames) == set()
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+
+# ---- Third party imports
+
+import arrow
+import pytest
+
+# ---- Local imports
+
+from qwatson.watson_ext.events import (
+    FramesAdded, FramesEdited, FramesRemoved, FramesReset, ProjectAdded,
+    ProjectDeleted, ProjectMerged, ProjectRenamed)
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.watson_ext.watsonhelpers import edit_frame_at
+
+
+@pytest.fixture
+def client(tmpdir):
+    client = Watson(config_dir=str(tmpdir))
+    start = arrow.now().floor('day').shift(hours=8)
+    for hour, project in enumerate(['p1', 'p2', 'p1', 'p3']):
+        client.frames.add(project, start.shift(hours=hour),
+                          start.shift(hours=hour, minutes=30))
+    client.save()
+    return client
+
+
+def test_change_feed(client):
+    """
+    Test that the changes made to the frames and the projects are published
+    with their rows, old and new values and an increasing data version.
+    """
+    events = []
+    client.feed.subscribe(events.append)
+    assert client.projects == ['', 'p1', 'p2', 'p3']
+    version = client.data_version
+
+    frame = client.frames[1]
+    edit_frame_at(client, 1, message='edited')
+    client.frames.insert(0, 'p4', frame.start.shift(days=-1),
+                         frame.stop.shift(days=-1))
+    del client.frames[0]
+    assert [type(event) for event in events] == [
+        FramesEdited, FramesAdded, FramesRemoved]
+    assert events[0].rows == [1] and events[0].old == [frame]
+    assert events[0].new[0].message == 'edited'
+    assert events[1].rows == events[2].rows == [0]
+    assert events[1].frames == events[2].frames
+
+    # The projects of the client are kept sorted with the changes.
+    del events[:]
+    client.add_project('p0')
+    client.rename_project('p3', 'p5')
+    client.rename_project('p5', 'p1')
+    client.delete_project('p2')
+    assert [type(event) for event in events] == [
+        ProjectAdded, FramesEdited, ProjectRenamed, FramesEdited,
+        ProjectMerged, FramesRemoved, ProjectDeleted]
+    assert events[4][1:] == ('p5', 'p1', [3])
+    assert events[-1].project == 'p2' and events[-1].rows == [1]
+    assert client.projects == ['', 'p0', 'p1', 'p4']
+    assert [event.version for event in events] == list(
+        range(version + 4, version + 11))
+    assert client.data_version == version + 10
+
+    # The indexes are subscribed to the feed and rebuilt when the frames
+    # are replaced.
+    del events[:]
+    assert client.completions.project_count('p1') == 3
+    client.frames.replace_all(list(client.frames)[:1])
+    assert type(events[0]) is FramesReset
+    assert client.completions.project_count('p1') == 1
+    assert client.conflicts.free_span(client.frames[0].id) == (None, None)
+
+    # The negative indexes are published as the rows of the frames.
+    client.frames.add('p1', frame.start.shift(days=1),
+                      frame.stop.shift(days=1))
+    del events[:]
+    edit_frame_at(client, -1, message='last')
+    del client.frames[-1]
+    assert events[0].rows == events[1].rows == [1]
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext.framefilters import FrameFilter
+from qwatson.watson_ext.watsonextends import Frames
+
+
+@pytest.fixture
+def frames():
+    start = local_arrow_from_tuple((2018, 6, 14, 0, 0, 0))
+    frames = Frames()
+    for i, (project, tags) in enumerate([
+            ('p1', ['a', 'b']), ('p1', []), ('p2', ['a']), ('p2', ['c']),
+            ('', ['b'])]):
+        frames.add(project, start.shift(hours=i), start.shift(hours=i + 1),
+                   tags=tags)
+    return frames
+
+
+def test_frame_filter(frames):
+    """
+    Test that the compiled filter accepts the same frames as the check
+    state dicts of the filter menus.
+    """
+    frame_filter = FrameFilter()
+    assert frame_filter.accepts_all
+    assert frame_filter.accepted_rows(frames, 0, len(frames)) is None
+
+    # All the items are checked in the menus.
+    frame_filter = FrameFilter({'p1': True, 'p2': True, '': True},
+                               {'a': True, 'b': True, '': True})
+    assert frame_filter.accepts_all
+    assert frame_filter == FrameFilter()
+
+    frame_filter = FrameFilter({'p1': True, 'p2': False, '': True},
+                               {'a': False, 'b': True, '': True})
+    assert not frame_filter.accepts_all
+    assert frame_filter.hidden_projects == {'p2'}
+    assert frame_filter.hidden_tags == {'a'}
+    assert list(frame_filter.accepted_rows(frames, 0, 5)) == [1, 1, 0, 0, 1]
+    assert list(frame_filter.accepted_rows(frames, 1, 3)) == [1, 0]
+
+    # The tag 'c' is not in the filters, so it is shown.
+    frame_filter = FrameFilter(None, {'a': False, 'b': False, '': False})
+    assert list(frame_filter.accepted_rows(frames, 0, 5)) == [0, 0, 0, 1, 0]
+    assert not frame_filter.all_tags_shown
+
+    assert FrameFilter({'p1': False}) == FrameFilter({'p1': False, 'p2': True})
+    assert FrameFilter({'p1': False}) != FrameFilter({'p2': False})
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
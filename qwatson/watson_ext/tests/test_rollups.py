@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import datetime
+import json
+import os
+import os.path as osp
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext import rollups
+from qwatson.watson_ext.framefilters import FrameFilter
+from qwatson.watson_ext.rollups import RollupStore
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.watson_ext.watsonhelpers import edit_frame_at
+
+
+@pytest.fixture
+def day():
+    return local_arrow_from_tuple((2018, 6, 14, 0, 0, 0))
+
+
+def add_frames(client, day):
+    """Add four frames of one hour over two days to the client."""
+    client.frames.add('p1', day.shift(hours=1), day.shift(hours=2),
+                      tags=['a', 'b'])
+    client.frames.add('p1', day.shift(hours=3), day.shift(hours=4))
+    client.frames.add('p2', day.shift(hours=5), day.shift(hours=6),
+                      tags=['a'])
+    client.frames.add('p2', day.shift(days=1, hours=1),
+                      day.shift(days=1, hours=2), tags=['b'])
+
+
+def test_rollup_queries(tmpdir, day):
+    """Test the totals answered by the rollups."""
+    client = Watson(config_dir=str(tmpdir))
+    add_frames(client, day)
+    store = RollupStore()
+    store.rebuild(client.frames)
+
+    week = day.span('week')
+    assert len(store) == 2
+    assert store.total(day.span('day')) == 3 * 3600
+    assert store.total(week) == 4 * 3600
+    assert store.count(week) == 4
+    assert store.total(week, project='p1') == 2 * 3600
+    assert store.total(week, tag='a') == 2 * 3600
+    assert store.total(week, tag='') == 3600
+    assert store.total(week, project='p2', tag='b') == 3600
+    assert store.total(day.shift(days=2).span('year')) == 4 * 3600
+    assert store.total(day.shift(days=-1).span('day')) == 0
+
+    assert store.daily_totals(week) == {
+        datetime.date(2018, 6, 14): 3 * 3600,
+        datetime.date(2018, 6, 15): 3600}
+    assert store.project_totals(week) == {'p1': 2 * 3600, 'p2': 2 * 3600}
+    assert store.tag_totals(week) == {
+        'a': 2 * 3600, 'b': 2 * 3600, '': 3600}
+
+    assert store.filtered_total(week) == 4 * 3600
+    assert store.filtered_total(
+        week, FrameFilter({'p1': False, 'p2': True})) == 2 * 3600
+    assert store.filtered_total(
+        week, FrameFilter(None, {'a': True, 'b': True})) == 4 * 3600
+    assert store.filtered_total(
+        week, FrameFilter(None, {'a': False, 'b': True})) is None
+
+
+def test_rollups_incremental_updates(tmpdir, day):
+    """
+    Test that the rollups of the client are kept up to date when frames
+    are added, edited and deleted.
+    """
+    client = Watson(config_dir=str(tmpdir))
+    store = client.rollups
+    add_frames(client, day)
+    week = day.span('week')
+    assert store.total(week) == 4 * 3600
+
+    # Move the first frame to the project p2 and to the next day.
+    edit_frame_at(client, 0, start=day.shift(days=1, hours=3),
+                  stop=day.shift(days=1, hours=5), project='p2')
+    assert store.total(day.span('day')) == 2 * 3600
+    assert store.total(week, project='p2') == 4 * 3600
+    assert store.total(week, tag='a') == 3 * 3600
+
+    # Delete the frames of the project p2.
+    client.delete_project('p2')
+    assert store.total(week) == 3600
+    assert store.tag_totals(week) == {'': 3600}
+
+    # Check against rollups rebuilt from scratch.
+    client.frames.insert(0, 'p3', day.shift(hours=-3), day.shift(hours=-2))
+    client.frames.remove_range(1, 1)
+    rebuilt = RollupStore()
+    rebuilt.rebuild(client.frames)
+    assert store._days == rebuilt._days
+
+
+def test_rollups_persistence(tmpdir, day, mocker):
+    """
+    Test that the rollups are saved with the frames and are read back
+    only when they match the frames file.
+    """
+    client = Watson(config_dir=str(tmpdir))
+    client.rollups
+    add_frames(client, day)
+    client.save()
+    assert osp.exists(client.rollups_file)
+
+    # The rollups are read from the file when restarting.
+    rebuild = mocker.spy(RollupStore, 'rebuild')
+    client = Watson(config_dir=str(tmpdir))
+    assert client.rollups.total(day.span('week')) == 4 * 3600
+    assert rebuild.call_count == 0
+
+    # The rollups are rebuilt when the frames file was written by another
+    # process or when the format of the file changed.
+    with open(client.frames_file, 'w') as f:
+        json.dump(client.frames.dump()[:1], f)
+    client = Watson(config_dir=str(tmpdir))
+    assert client.rollups.total(day.span('week')) == 3600
+    assert rebuild.call_count == 1
+
+    mocker.patch.object(
+        rollups, 'ROLLUPS_VERSION', rollups.ROLLUPS_VERSION + 1)
+    client = Watson(config_dir=str(tmpdir))
+    assert client.rollups.total(day.span('week')) == 3600
+    assert rebuild.call_count == 2
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
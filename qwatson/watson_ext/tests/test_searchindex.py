@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import datetime
+import os
+
+# ---- Third party imports
+
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils.dates import local_arrow_from_tuple
+from qwatson.watson_ext.searchindex import SearchIndex, tokenize
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.watson_ext.watsonhelpers import edit_frame_at
+
+
+@pytest.fixture
+def client(tmpdir):
+    client = Watson(config_dir=str(tmpdir))
+    day = local_arrow_from_tuple((2018, 6, 14, 0, 0, 0))
+    for i, (project, tags, message) in enumerate([
+            ('QWatson', ['dev', 'issue#12'], 'Fix the search box'),
+            ('QWatson', ['Dev'], 'Review of the pull request'),
+            ('watson', [], None),
+            ('Admin', ['meeting'], 'Weekly search meeting')]):
+        client.frames.add(project, day.shift(days=i, hours=1),
+                          day.shift(days=i, hours=2), tags=tags,
+                          message=message)
+    return client
+
+
+def frame_ids(client, *indexes):
+    return {client.frames[i].id for i in indexes}
+
+
+def test_tokenize():
+    """Test that the text is split in lowercase words."""
+    assert tokenize("Fix the Search-box, issue#12!") == [
+        'fix', 'the', 'search', 'box', 'issue', '12']
+    assert tokenize(None) == []
+    assert tokenize('') == []
+
+
+def test_search_index_queries(client):
+    """Test the prefix queries answered by the index."""
+    index = client.search_index
+    assert len(index) == 4
+
+    assert index.search('search') == frame_ids(client, 0, 3)
+    assert index.search('SEA') == frame_ids(client, 0, 3)
+    assert index.search('qwatson') == frame_ids(client, 0, 1)
+    assert index.search('wat') == frame_ids(client, 2)
+    assert index.search('dev') == frame_ids(client, 0, 1)
+    assert index.search('12') == frame_ids(client, 0)
+
+    # All the words of the query must match.
+    assert index.search('search meet') == frame_ids(client, 3)
+    assert index.search('search review') == set()
+    assert index.search('xyz') == set()
+    assert index.search('') == set()
+
+    assert index.words('w') == ['watson', 'weekly']
+    assert index.search_days('search') == [
+        datetime.date(2018, 6, 14).toordinal(),
+        datetime.date(2018, 6, 17).toordinal()]
+
+
+def test_search_index_updates(client):
+    """
+    Test that the index is kept up to date when frames are added, edited
+    and deleted.
+    """
+    index = client.search_index
+
+    edit_frame_at(client, 1, message='Search for a bug')
+    assert index.search('search') == frame_ids(client, 0, 1, 3)
+    assert index.search('review') == set()
+
+    del client.frames[client.frames[0].id]
+    assert index.search('search') == frame_ids(client, 0, 2)
+    assert index.words('issue') == []
+
+    client.frames.remove_range(0, 1)
+    assert index.search('wat') == set()
+
+    rebuilt = SearchIndex()
+    rebuilt.rebuild(client.frames)
+    assert index._postings == rebuilt._postings
+    assert index._day_counts == rebuilt._day_counts
+    assert index._words == rebuilt._words
+    assert index._days == rebuilt._days
+
+
+def test_search_index_background_build(client):
+    """
+    Test that the changes made to the frames while the index is being
+    built in the background are applied once the build completes.
+    """
+    index = SearchIndex()
+    build_id = index.begin_build()
+    frames = list(client.frames)
+    client.set_search_index(index)
+    assert not index.is_ready
+
+    edit_frame_at(client, 0, message='Renamed')
+    client.frames.add('new', client.frames[-1].stop, client.frames[-1].stop)
+
+    assert index.finish_build(build_id, index.build_data(frames))
+    assert index.is_ready
+    assert index.search('fix') == set()
+    assert index.search('renamed') == frame_ids(client, 0)
+    assert index.search('new') == frame_ids(client, 4)
+
+    # The data of a build are discarded if the index was rebuilt since.
+    build_id = index.begin_build()
+    index.rebuild(client.frames)
+    assert not index.finish_build(build_id, index.build_data([]))
+    assert len(index) == 5
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -19,9 +19,12 @@ import arrow
 # ---- Local imports
 
 from qwatson.utils.dates import local_arrow_from_tuple
-from qwatson.watson_ext.watsonextends import Watson
+from qwatson.watson_ext.watsonextends import Frames, Watson
 from qwatson.watson_ext.watsonhelpers import (
-    round_frame_at, edit_frame_at)
+    round_frame_at, edit_frame_at, diff_frames, find_frames_in_span,
+    find_span_range, group_contiguous, merge_frames, merge_imported_frames,
+    get_frame_nbr_for_project)
+import qwatson.watson_ext.watsonhelpers as watsonhelpers
 from qwatson.utils.fileio import delete_file_safely
 
 WORKDIR = osp.dirname(__file__)
@@ -134,5 +137,227 @@ def test_round_frame_at():
     client.save()
 
 
+def test_diff_frames():
+    """Test that the difference between two lists of frames is right."""
+    client = Watson(config_dir=WORKDIR)
+    old_frames = list(client.frames)
+    assert len(old_frames) == 3
+
+    assert diff_frames(old_frames, old_frames) == ([], [], [])
+
+    # Remove the first frame, edit the second and add two new frames.
+    new_frames = old_frames[1:]
+    new_frames[0] = new_frames[0]._replace(
+        message='edited', updated_at=arrow.utcnow().shift(hours=1))
+    new_frames.insert(1, client.frames.new_frame('p1', arrow.now(),
+                                                 arrow.now()))
+    new_frames.append(client.frames.new_frame('p2', arrow.now(),
+                                              arrow.now()))
+
+    diff = diff_frames(old_frames, new_frames)
+    assert diff.removed == [0]
+    assert diff.inserted == [1, 3]
+    assert diff.changed == [0]
+
+    # Swapping two frames can't be expressed as insertions and removals.
+    assert diff_frames(old_frames, old_frames[::-1]) is None
+
+
+def test_group_contiguous():
+    """Test grouping indexes into contiguous ranges."""
+    assert group_contiguous([]) == []
+    assert group_contiguous([0, 1, 2, 5, 7, 8]) == [(0, 2), (5, 5), (7, 8)]
+
+
+def test_find_frames_in_span():
+    """Test finding the range of the frames that start within a span."""
+    client = Watson(config_dir=WORKDIR)
+    day = local_arrow_from_tuple((2018, 6, 14, 0, 0, 0))
+    for hour in (1, 5, 5, 8):
+        client.frames.add('p', day.shift(hours=hour),
+                          day.shift(hours=hour, minutes=30))
+    frames = list(client.frames)[-4:]
+
+    assert find_frames_in_span(frames, day.span('day')) == (0, 4)
+    assert find_frames_in_span(
+        frames, (day.shift(hours=5), day.shift(hours=8))) == (1, 4)
+    assert find_frames_in_span(
+        frames, (day.shift(hours=2), day.shift(hours=7))) == (1, 3)
+    assert find_frames_in_span(frames, day.shift(days=1).span('day')) == (4, 4)
+    assert find_frames_in_span([], day.span('day')) == (0, 0)
+
+
+def test_find_span_range():
+    """
+    Test that the range of the frames of a span is only bisected while the
+    frames are sorted by start time.
+    """
+    day = local_arrow_from_tuple((2018, 6, 14, 0, 0, 0))
+    frames = Frames()
+    for hour in (1, 5, 8):
+        frames.add('p', day.shift(hours=hour), day.shift(hours=hour + 1))
+    assert frames.is_sorted()
+    span = day.shift(hours=5).span('hour')
+    assert find_span_range(frames, span) == (1, 2)
+
+    # Moving a frame before the previous one breaks the order.
+    frames[2] = frames[2]._replace(start=day.shift(hours=3),
+                                   stop=day.shift(hours=4))
+    assert not frames.is_sorted()
+    assert find_span_range(frames, span) == (0, 3)
+    frames.insert(0, 'p', day, day.shift(minutes=30))
+    assert not frames.is_sorted()
+
+    # Removing the frame that was out of order restores it.
+    del frames[3]
+    assert frames.is_sorted()
+    assert find_span_range(frames, span) == (2, 3)
+
+
+def test_merge_frames():
+    """Test the three-way merge of frames modified by two processes."""
+    client = Watson(config_dir=WORKDIR)
+    base = list(client.frames)
+    later = arrow.utcnow().shift(hours=1)
+
+    # We edit the first frame, delete the second and add a new frame.
+    ours = [base[0]._replace(message='ours', updated_at=later), base[2],
+            client.frames.new_frame('p1', arrow.now(), arrow.now())]
+
+    # They edit the third frame and add a new frame.
+    new_frame = client.frames.new_frame('p2', base[0].start.shift(hours=1),
+                                        base[0].stop.shift(hours=1))
+    theirs = [base[0], base[1], new_frame,
+              base[2]._replace(message='theirs', updated_at=later)]
+
+    merged, report = merge_frames(base, ours, theirs)
+    assert [frame.id for frame in merged] == [
+        base[0].id, new_frame.id, base[2].id, ours[2].id]
+    assert merged[0].message == 'ours'
+    assert merged[2].message == 'theirs'
+    assert report == (1, 1, 0)
+
+
+def test_merge_imported_frames(tmpdir):
+    """
+    Test that the imported frames are deduplicated by id, that the most
+    recent ones are kept and that they are inserted in sorted position.
+    """
+    client = Watson(config_dir=str(tmpdir))
+    start = arrow.now().floor('day').shift(hours=8)
+    for hour in range(4):
+        client.frames.add('p1', start.shift(hours=hour),
+                          start.shift(hours=hour, minutes=30))
+    ours = list(client.frames)
+    later = ours[0].updated_at.shift(hours=1)
+
+    # The first frame was moved after the third one by watson, the second
+    # one is older than ours and a new frame was added twice.
+    new_frame = client.frames.new_frame('p2', start.shift(hours=-1),
+                                        start.shift(minutes=-30))
+    imported = [new_frame._replace(message='older'),
+                new_frame._replace(updated_at=later),
+                ours[1]._replace(message='older', updated_at=later.shift(
+                    hours=-2)),
+                ours[2],
+                ours[0]._replace(start=start.shift(hours=2, minutes=30),
+                                 stop=start.shift(hours=2, minutes=45),
+                                 updated_at=later)]
+
+    merged, report = merge_imported_frames(ours, imported)
+    assert [frame.id for frame in merged] == [
+        new_frame.id, ours[1].id, ours[2].id, ours[0].id, ours[3].id]
+    assert merged[0].updated_at == later
+    assert merged[1].message is None
+    assert merged[3].updated_at == later
+    assert report == (1, 1, 2)
+
+    # The import is repeatable.
+    merged, report = merge_imported_frames(merged, imported)
+    assert report == (0, 0, 4)
+
+    # The imported frames are merged into the frames of the client.
+    other = Watson(config_dir=str(tmpdir.mkdir('watson')))
+    other.frames.insert_frames(0, imported[1:])
+    other.save()
+    assert client.import_frames(other._dir) == (1, 1, 2)
+    assert [frame.id for frame in client.frames] == [
+        new_frame.id, ours[1].id, ours[2].id, ours[0].id, ours[3].id]
+    assert client.projects == ['', 'p1', 'p2']
+    assert client.import_frames(other.frames_file) == (0, 0, 4)
+
+
+def test_concurrent_saves(tmpdir):
+    """
+    Test that the frames added or deleted by two clients that save to the
+    same frames file are all kept.
+    """
+    client1 = Watson(config_dir=str(tmpdir))
+    client1.frames.add('p1', arrow.now().shift(hours=-3), arrow.now())
+    client1.frames.add('p1', arrow.now().shift(hours=-2), arrow.now())
+    client1.save()
+    first_id = client1.frames[0].id
+
+    client2 = Watson(config_dir=str(tmpdir))
+    assert len(client2.frames) == 2
+
+    client1.frames.add('p2', arrow.now().shift(hours=-1), arrow.now())
+    client1.save()
+
+    reports = []
+    client2.on_frames_merged = reports.append
+    del client2.frames[first_id]
+    client2.frames.add('p3', arrow.now(), arrow.now())
+    client2.save()
+    assert reports == [(1, 0, 0)]
+    assert [frame.project for frame in client2.frames] == ['p1', 'p2', 'p3']
+
+    client3 = Watson(config_dir=str(tmpdir))
+    assert ([frame.id for frame in client3.frames] ==
+            [frame.id for frame in client2.frames])
+
+
+def test_rename_and_delete_project(tmpdir, monkeypatch):
+    """
+    Test that projects are renamed, merged and deleted in a single pass
+    and that these operations can be cancelled with the progress callback.
+    """
+    monkeypatch.setattr(watsonhelpers, 'PROGRESS_STEP', 2)
+    client = Watson(config_dir=str(tmpdir))
+    start = arrow.now().floor('day')
+    for i, project in enumerate(['p1', 'p2', 'p1', '', 'p1', 'p2']):
+        client.frames.add(project, start.shift(hours=i),
+                          start.shift(hours=i + 1))
+    assert get_frame_nbr_for_project(client, 'p1') == 3
+    assert get_frame_nbr_for_project(client, '') == 1
+
+    # Cancel the rename at the first call of the progress callback.
+    calls = []
+
+    def cancel(done, total):
+        calls.append((done, total))
+        return True
+    assert client.rename_project('p1', 'p3', progress=cancel) is None
+    assert calls == [(2, 6)]
+    assert get_frame_nbr_for_project(client, 'p1') == 3
+
+    calls = []
+    assert client.rename_project(
+        'p1', 'p2', progress=lambda *args: calls.append(args)) == [0, 2, 4]
+    assert calls == [(2, 6), (4, 6), (6, 6)]
+    assert client.projects == ['', 'p2']
+    assert get_frame_nbr_for_project(client, 'p1') == 0
+    assert get_frame_nbr_for_project(client, 'p2') == 5
+
+    assert client.delete_project('', progress=cancel) is None
+    assert client.delete_project('') == [3]
+    assert client.delete_project('p2') == [0, 1, 2, 3, 4]
+    assert len(client.frames) == 0
+    assert get_frame_nbr_for_project(client, '') == 0
+
+    # The changes were saved.
+    assert len(Watson(config_dir=str(tmpdir)).frames) == 0
+
+
 if __name__ == "__main__":
     pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
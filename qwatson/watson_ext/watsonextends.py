@@ -6,12 +6,27 @@
 # This file is part of QWatson.
 # Licensed under the terms of the GNU General Public License.
 
+from bisect import bisect_left
 import os
 import watson
 from watson.watson import (WatsonError, make_json_writer, safe_save, arrow,
                            deduplicate)
 from watson.frames import uuid, namedtuple
 
+from qwatson.utils import instrumentation
+from qwatson.utils.fileio import FileLock, get_file_signature
+from qwatson.utils.timecodec import codec
+from qwatson.watson_ext.completions import Completions
+from qwatson.watson_ext.conflicts import ConflictIndex
+from qwatson.watson_ext.events import (
+    ChangeFeed, FramesAdded, FramesEdited, FramesRemoved, FramesReset,
+    ProjectAdded, ProjectDeleted, ProjectMerged, ProjectRenamed,
+    index_subscriber)
+from qwatson.watson_ext.rollups import RollupStore
+from qwatson.watson_ext.searchindex import SearchIndex
+from qwatson.watson_ext.watsonhelpers import (
+    find_project_rows, group_contiguous, merge_frames, merge_imported_frames)
+
 
 HEADERS = ('start', 'stop', 'project', 'id', 'tags', 'updated_at', 'message')
 watson.frames.HEADERS = HEADERS
@@ -25,18 +40,12 @@ class Frame(namedtuple('Frame', HEADERS)):
     def __new__(cls, start, stop, project, id, tags=None, updated_at=None,
                 message=None):
         try:
-            if not isinstance(start, arrow.Arrow):
-                start = arrow.get(start)
-
-            if not isinstance(stop, arrow.Arrow):
-                stop = arrow.get(stop)
+            start = codec.get_local(start)
+            stop = codec.get_local(stop)
         except RuntimeError as e:
             from .watson import WatsonError
             raise WatsonError("Error converting date: {}".format(e))
 
-        start = start.to('local')
-        stop = stop.to('local')
-
         if updated_at is None:
             updated_at = arrow.utcnow()
         elif not isinstance(updated_at, arrow.Arrow):
@@ -50,9 +59,9 @@ class Frame(namedtuple('Frame', HEADERS)):
         )
 
     def dump(self):
-        start = self.start.to('utc').timestamp
-        stop = self.stop.to('utc').timestamp
-        updated_at = self.updated_at.timestamp
+        start = codec.to_timestamp(self.start)
+        stop = codec.to_timestamp(self.stop)
+        updated_at = codec.to_timestamp(self.updated_at)
 
         return (start, stop, self.project, self.id, self.tags, updated_at,
                 self.message)
@@ -82,6 +91,103 @@ class Frames(watson.frames.Frames):
     This an extension of the Frames class to support adding comments to Frame.
     """
 
+    def __init__(self, frames=None, feed=None):
+        super(Frames, self).__init__(frames)
+        # The ChangeFeed to which the changes of the frames are published.
+        self.feed = ChangeFeed() if feed is None else feed
+        # Whether the frames are sorted by start time, or None if unknown.
+        self._sorted = None
+        # The frames as they were before remove_rows, while the removal of
+        # the rows is signalled and not yet published.
+        self._unpublished = None
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def _get_row(self, key):
+        """
+        Return the positive index of the frame with the specified key, which
+        is either an index, possibly negative, or an id.
+        """
+        if not isinstance(key, int):
+            return self._get_index_by_id(key)
+        return range(len(self._rows))[key]
+
+    def __setitem__(self, key, value):
+        try:
+            index = self._get_row(key)
+        except KeyError:
+            index = None
+        old_frame = None if index is None else self._rows[index]
+        super(Frames, self).__setitem__(key, value)
+        if index is None:
+            self._publish(
+                FramesAdded, [len(self._rows) - 1], [self._rows[-1]])
+        else:
+            self._publish(
+                FramesEdited, [index], [old_frame], [self._rows[index]])
+
+    def __delitem__(self, key):
+        index = self._get_row(key)
+        frame = self._rows[index]
+        super(Frames, self).__delitem__(index)
+        self._publish(FramesRemoved, [index], [frame])
+
+    def _publish(self, event_type, *args):
+        """
+        Update whether the frames are sorted by start time and publish the
+        change to the feed.
+
+        Only the neighbours of the frames that were added or edited need to
+        be checked when the frames were sorted, and removing frames keeps
+        them sorted. Otherwise, the order is checked again when needed.
+        """
+        if event_type is FramesReset or self._sorted is False:
+            self._sorted = None
+        elif self._sorted and event_type in (FramesAdded, FramesEdited):
+            self._sorted = all(self._is_sorted_at(row) for row in args[0])
+        self.feed.publish(event_type, *args)
+
+    def published(self):
+        """
+        Return the frames as they were when the last change was published
+        to the feed, from which the indexes attached to the feed must be
+        built to be consistent with the changes that follow.
+        """
+        return self._rows if self._unpublished is None else self._unpublished
+
+    def _is_sorted_at(self, row):
+        """
+        Return whether the frame at row starts between the frames before
+        and after it.
+        """
+        rows = self._rows
+        start = rows[row].start
+        return ((row == 0 or rows[row - 1].start <= start) and
+                (row == len(rows) - 1 or start <= rows[row + 1].start))
+
+    def is_sorted(self):
+        """Return whether the frames are sorted by start time."""
+        if self._sorted is None:
+            # The datetimes are compared, which is faster than comparing the
+            # arrow objects.
+            starts = [frame.start.datetime for frame in self._rows]
+            self._sorted = all(
+                start <= next_start for
+                start, next_start in zip(starts, starts[1:]))
+        return self._sorted
+
+    def _insert_row(self, index):
+        """Return the row of a frame inserted at index in the list."""
+        if index < 0:
+            index += len(self._rows)
+        return min(max(index, 0), len(self._rows))
+
+    def add(self, *args, **kwargs):
+        frame = super(Frames, self).add(*args, **kwargs)
+        self._publish(FramesAdded, [len(self._rows) - 1], [frame])
+        return frame
+
     def new_frame(self, project, start, stop, tags=None, id=None,
                   updated_at=None, message=None):
         if not id:
@@ -96,9 +202,79 @@ class Frames(watson.frames.Frames):
         """
         self.changed = True
         frame = self.new_frame(*args, **kwargs)
-        self._rows.insert(index, frame)
+        row = self._insert_row(index)
+        self._rows.insert(row, frame)
+        self._publish(FramesAdded, [row], [frame])
         return frame
 
+    def insert_frames(self, index, frames):
+        """Insert a sequence of existing frames at the specified index."""
+        self.changed = True
+        frames = list(frames)
+        row = self._insert_row(index)
+        self._rows[row:row] = frames
+        if frames:
+            self._publish(
+                FramesAdded, list(range(row, row + len(frames))), frames)
+
+    def replace_rows(self, rows, frames):
+        """Replace the frames stored at the specified rows."""
+        self.changed = True
+        rows = list(rows)
+        removed = [self._rows[row] for row in rows]
+        frames = list(frames)
+        for row, frame in zip(rows, frames):
+            self._rows[row] = frame
+        if rows:
+            self._publish(FramesEdited, rows, removed, frames)
+
+    def remove_rows(self, rows, begin=None, end=None):
+        """
+        Remove the frames stored at the specified rows in a single pass and
+        publish a single FramesRemoved event.
+
+        If provided, begin and end are called with the first and last rows
+        of each range of contiguous rows, from the last range to the first,
+        before and after the range is removed, such as to signal the removal
+        to a Qt model. The event is then published before end is called for
+        the first range, so that the indexes are up to date when the
+        removal of the rows is complete. See published.
+        """
+        self.changed = True
+        rows = sorted(set(rows))
+        if not rows:
+            return
+        removed = [self._rows[row] for row in rows]
+        if begin is None:
+            rows_set = set(rows)
+            self._rows = [frame for row, frame in enumerate(self._rows) if
+                          row not in rows_set]
+            self._publish(FramesRemoved, rows, removed)
+            return
+        self._unpublished = list(self._rows)
+        for first, last in reversed(group_contiguous(rows)):
+            begin(first, last)
+            del self._rows[first:last + 1]
+            if first == rows[0]:
+                self._unpublished = None
+                self._publish(FramesRemoved, rows, removed)
+            end(first, last)
+
+    def remove_range(self, first, last):
+        """Remove the frames stored between the first and last indexes."""
+        self.changed = True
+        removed = self._rows[first:last + 1]
+        del self._rows[first:last + 1]
+        if removed:
+            self._publish(FramesRemoved,
+                          list(range(first, first + len(removed))), removed)
+
+    def replace_all(self, frames):
+        """Replace all the frames with the provided sequence of frames."""
+        self.changed = True
+        self._rows = list(frames)
+        self._publish(FramesReset, self._rows)
+
 
 watson.watson.Frames = Frames
 watson.frames.Frames = Frames
@@ -110,53 +286,272 @@ class Watson(watson.watson.Watson):
     """
 
     def __init__(self, **kwargs):
-        super(Watson, self).__init__(**kwargs)
+        self._frames_signature = None
+        self._frames_base = []
+        self._rollups = None
+        self._search_index = None
+        self._completions = None
+        self._conflicts = None
         self._projects = None
+        # The ChangeFeed of the frames and projects, which is shared by all
+        # the frames loaded by the client, and the subscribers of the
+        # indexes to the feed stored by name.
+        self.feed = ChangeFeed()
+        self.feed.subscribe(self._update_projects)
+        self._index_subscribers = {}
+        super(Watson, self).__init__(**kwargs)
         self.projects_file = os.path.join(self._dir, 'projects')
+        self.lock_file = os.path.join(self._dir, 'frames.lock')
+        self.rollups_file = os.path.join(self._dir, 'rollups')
+
+        # A function that is called with a MergeReport when the in-memory
+        # frames are merged with changes written to the disk by another
+        # process while saving.
+        self.on_frames_merged = None
 
     # ---- Watson override
 
+    @property
+    def frames(self):
+        if self._frames is None:
+            self.load_frames()
+        return self._frames
+
+    @frames.setter
+    def frames(self, frames):
+        self._frames = Frames(frames, feed=self.feed)
+        self._frames_signature = None
+        self._frames_base = list(self._frames)
+        self.feed.publish(FramesReset, self._frames)
+
+    @property
+    def data_version(self):
+        """
+        Return the version of the frames and projects, which is incremented
+        whenever they change.
+        """
+        return self.feed.version
+
+    def _attach_index(self, name, index):
+        """
+        Subscribe the index to the changes of the frames, in place of the
+        index that was attached under the same name, if any.
+        """
+        self.feed.unsubscribe(self._index_subscribers.pop(name, None))
+        self._index_subscribers[name] = self.feed.subscribe(
+            index_subscriber(index))
+
+    @property
+    def rollups(self):
+        """
+        Return the RollupStore of the durations of the frames per day,
+        project and tag, which is kept up to date when the frames are
+        added, edited or removed.
+
+        The rollups are read from the rollups file if they were saved
+        from the current content of the frames file, or else are rebuilt
+        from the frames.
+        """
+        if self._rollups is None:
+            frames = self.frames.published()
+            self._rollups = RollupStore()
+            if not self._rollups.load(
+                    self.rollups_file, self._frames_signature):
+                self._rollups.rebuild(frames)
+                if self._frames_signature is not None:
+                    self._save_rollups()
+            self._attach_index('rollups', self._rollups)
+        return self._rollups
+
+    @property
+    def search_index(self):
+        """
+        Return the SearchIndex of the words of the comments, tags and
+        projects of the frames, which is kept up to date when the frames
+        are added, edited or removed.
+        """
+        if self._search_index is None:
+            index = SearchIndex()
+            index.rebuild(self.frames.published())
+            self.set_search_index(index)
+        return self._search_index
+
+    def set_search_index(self, index):
+        """
+        Set the SearchIndex that is kept up to date with the frames. This
+        is used to attach an index that is built in a background thread.
+        """
+        self._search_index = index
+        self._attach_index('search_index', index)
+
+    @property
+    def completions(self):
+        """
+        Return the Completions of the projects and tags of the frames,
+        which are kept up to date when the frames are added, edited or
+        removed.
+        """
+        if self._completions is None:
+            self._completions = Completions()
+            self._completions.rebuild(self.frames.published())
+            self._attach_index('completions', self._completions)
+        return self._completions
+
+    @property
+    def conflicts(self):
+        """
+        Return the ConflictIndex of the overlaps between the frames, which
+        is kept up to date when the frames are added, edited or removed.
+        """
+        if self._conflicts is None:
+            self._conflicts = ConflictIndex()
+            self._conflicts.rebuild(self.frames.published())
+            self._attach_index('conflicts', self._conflicts)
+        return self._conflicts
+
+    def _save_rollups(self):
+        """
+        Write the rollups along with the signature of the frames file and
+        whether its frames are sorted by start time.
+        """
+        try:
+            self._rollups.save(self.rollups_file, self._frames_signature,
+                               self.frames.is_sorted())
+        except OSError:
+            # The rollups are only a cache that is rebuilt from the frames
+            # when the file can't be read.
+            pass
+
+    @property
+    def frames_signature(self):
+        """
+        Return the signature of the frames file as it was when the frames
+        were last loaded or saved, or None if the frames were not loaded
+        from the file.
+
+        The signature is used as a generation stamp to detect when the file
+        is written by another process, such as the watson CLI.
+        """
+        return self._frames_signature
+
+    @instrumentation.timed('watson.load_frames')
+    def load_frames(self):
+        """Load the frames from the frames file."""
+        signature = get_file_signature(self.frames_file)
+        self.frames = self._load_json_file(self.frames_file, type=list)
+        self._frames_signature = signature
+
+    def set_frames_synced(self, signature):
+        """
+        Mark the in-memory frames as matching the content of the frames
+        file with the specified signature.
+        """
+        self._frames_signature = signature
+        self._frames_base = list(self.frames)
+        if self._rollups is not None:
+            self._save_rollups()
+
+    @instrumentation.timed('watson.save')
     def save(self):
         """
         Override of Watson save method to support adding comment to frame.
+
+        The files are written while holding an advisory lock on the config
+        dir. If the frames file was written by another process since the
+        frames were loaded, the changes of both processes are merged before
+        writing the file, instead of silently overwriting the changes of
+        the other process.
         """
         try:
             if not os.path.isdir(self._dir):
                 os.makedirs(self._dir)
-
-            if self._current is not None and self._old_state != self._current:
-                if self.is_started:
-                    current = {
-                        'project': self.current['project'],
-                        'start': self._format_date(self.current['start']),
-                        'tags': self.current['tags'],
-                        'message': self.current.get('message'),
-                    }
-                else:
-                    current = {}
-
-                safe_save(self.state_file, make_json_writer(lambda: current))
-                self._old_state = current
-
-            if self._frames is not None and self._frames.changed:
-                safe_save(self.frames_file,
-                          make_json_writer(self.frames.dump))
-
-            if self._config_changed:
-                safe_save(self.config_file, self.config.write)
-
-            if self._last_sync is not None:
-                safe_save(self.last_sync_file,
-                          make_json_writer(self._format_date, self.last_sync))
-
-            if self._projects is not None:
-                safe_save(self.projects_file,
-                          make_json_writer(lambda: self.projects))
+            with FileLock(self.lock_file):
+                self._save()
         except OSError as e:
             raise WatsonError(
                 "Impossible to write {}: {}".format(e.filename, e)
             )
 
+    def _save(self):
+        """Write the files that changed since the last save."""
+        if self._current is not None and self._old_state != self._current:
+            if self.is_started:
+                current = {
+                    'project': self.current['project'],
+                    'start': self._format_date(self.current['start']),
+                    'tags': self.current['tags'],
+                    'message': self.current.get('message'),
+                }
+            else:
+                current = {}
+
+            safe_save(self.state_file, make_json_writer(lambda: current))
+            self._old_state = current
+
+        if self._frames is not None and self._frames.changed:
+            self._merge_concurrent_frames()
+            safe_save(self.frames_file,
+                      make_json_writer(self.frames.dump))
+            self._frames_signature = get_file_signature(self.frames_file)
+            self._frames_base = list(self._frames)
+            self._frames.changed = False
+            if self._rollups is not None:
+                self._save_rollups()
+
+        if self._config_changed:
+            safe_save(self.config_file, self.config.write)
+
+        if self._last_sync is not None:
+            safe_save(self.last_sync_file,
+                      make_json_writer(self._format_date, self.last_sync))
+
+        if self._projects is not None:
+            safe_save(self.projects_file,
+                      make_json_writer(lambda: self.projects))
+
+    def _merge_concurrent_frames(self):
+        """
+        Merge the in-memory frames with the frames written to the disk by
+        another process since the frames were last loaded or saved.
+        """
+        signature = get_file_signature(self.frames_file)
+        if (self._frames_signature is None or signature is None or
+                signature == self._frames_signature):
+            return None
+
+        theirs = Frames(self._load_json_file(self.frames_file, type=list))
+        merged, report = merge_frames(self._frames_base, self._frames, theirs)
+        self._frames.replace_all(merged)
+        if self.on_frames_merged is not None:
+            self.on_frames_merged(report)
+        return report
+
+    def import_frames(self, path):
+        """
+        Merge the frames of a watson data dir, or of a frames file, into
+        the frames with merge_imported_frames and return the ImportReport.
+        The merged frames are committed at once and are not saved.
+        """
+        if os.path.isdir(path):
+            path = os.path.join(path, 'frames')
+        return self.merge_imported(
+            Frames(self._load_json_file(path, type=list)))
+
+    def merge_imported(self, imported, commit=None):
+        """
+        Merge the imported frames into the frames with merge_imported_frames
+        and return the ImportReport.
+
+        The merged list of frames is passed to commit, if any, which must
+        replace the frames with it, such as WatsonTableModel.reload_frames.
+        Otherwise, the frames are replaced at once with replace_all.
+        """
+        merged, report = merge_imported_frames(self.frames, imported)
+        if report.added or report.updated:
+            (commit or self.frames.replace_all)(merged)
+            self.frames.changed = True
+        return report
+
     @property
     def current(self):
         if self._current is None:
@@ -240,6 +635,17 @@ class Watson(watson.watson.Watson):
                                    updated_at, message)
         return frame
 
+    # ---- Watson tags extension
+
+    @property
+    def tags(self):
+        """
+        Return the sorted list of all the tags of the frames. The tags are
+        taken from the completions, which are kept up to date with the
+        frames, instead of going through all the frames.
+        """
+        return self.completions.tags.names()
+
     # ---- Watson project extension
 
     @property
@@ -247,43 +653,106 @@ class Watson(watson.watson.Watson):
         """
         Get or set the list of all the existing projects. The project list
         are returned sorted by name.
+
+        The list is kept sorted and up to date with the changes published
+        to the feed once it is loaded.
         """
         if self._projects is None:
             self._projects = sorted(set(
                 [''] + list(self.frames['project']) +
                 self._load_json_file(self.projects_file, type=list)
                 ))
-        else:
-            self._projects = sorted(set([''] + self._projects))
-
         return self._projects
 
     @projects.setter
     def projects(self, projects):
-        self._projects = sorted(set(projects))
+        self._projects = sorted(set([''] + list(projects)))
+
+    def _update_projects(self, event):
+        """Update the list of projects from an event of the feed."""
+        if self._projects is None:
+            return
+        if isinstance(event, (FramesAdded, FramesReset)):
+            added = {frame.project for frame in event.frames}
+        elif isinstance(event, FramesEdited):
+            added = {frame.project for frame in event.new}
+        elif isinstance(event, ProjectAdded):
+            added = {event.project}
+        elif isinstance(event, (ProjectRenamed, ProjectMerged)):
+            self._remove_project(event.old_name)
+            added = {event.new_name}
+        elif isinstance(event, ProjectDeleted):
+            self._remove_project(event.project)
+            return
+        else:
+            return
+        for project in added:
+            row = bisect_left(self._projects, project)
+            if row == len(self._projects) or self._projects[row] != project:
+                self._projects.insert(row, project)
+
+    def _remove_project(self, project):
+        """Remove the project from the list, except the unnamed project."""
+        row = bisect_left(self._projects, project)
+        if (project and row < len(self._projects) and
+                self._projects[row] == project):
+            del self._projects[row]
 
     def add_project(self, project):
         """Add project to the database."""
         if project in self.projects:
             raise ValueError('Project "%s" already exist' % project)
-        self._projects.append(str(project))
+        self.feed.publish(ProjectAdded, str(project))
         self.save()
 
-    def rename_project(self, old_name, new_name):
-        """Extend Watson method."""
-        super(Watson, self).rename_project(old_name, new_name)
-        self._projects.remove(old_name)
-        self._projects.append(new_name)
+    def rename_project(self, old_name, new_name, progress=None):
+        """
+        Rename the project in all its frames in a single pass over the
+        frames and return the rows of the renamed frames. The project is
+        merged with the project new_name if it already exists.
+
+        The rename is cancelled and None is returned if the progress
+        callback returns True, which is only called while the frames are
+        scanned. See find_project_rows.
+        """
+        if old_name not in self.projects:
+            raise ValueError('Project "%s" does not exist' % old_name)
+        merged = new_name in self.projects
+
+        rows = find_project_rows(self.frames, old_name, progress)
+        if rows is None:
+            return None
+        updated_at = arrow.utcnow()
+        self.frames.replace_rows(rows, [
+            self.frames[row]._replace(project=new_name, updated_at=updated_at)
+            for row in rows])
+
+        self.feed.publish(ProjectMerged if merged else ProjectRenamed,
+                          old_name, new_name, rows)
         self.save()
+        return rows
+
+    def delete_project(self, project, progress=None, remove=None):
+        """
+        Delete the project and all related frames and return the rows of
+        the deleted frames.
+
+        The rows of the frames of the project are found in a single pass
+        over the frames. The deletion is cancelled and None is returned if
+        the progress callback returns True. See find_project_rows.
 
-    def delete_project(self, project):
-        """Delete the project and all related frames."""
+        The rows are passed to remove, if any, which must remove the frames
+        stored at these rows, such as WatsonTableModel.remove_rows.
+        Otherwise, the frames are removed at once with Frames.remove_rows.
+        """
         if project not in self.projects:
             raise ValueError('Project "%s" does not exist' % project)
 
-        for frame in reversed(self.frames):
-            if frame.project == project:
-                del self.frames[frame.id]
+        rows = find_project_rows(self.frames, project, progress)
+        if rows is None:
+            return None
+        (remove or self.frames.remove_rows)(rows)
 
-        self._projects.remove(project)
+        self.feed.publish(ProjectDeleted, project, rows)
         self.save()
+        return rows
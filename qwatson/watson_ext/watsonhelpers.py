@@ -7,6 +7,11 @@
 # This file is part of QWatson.
 # Licensed under the terms of the GNU General Public License.
 
+# ---- Standard imports
+
+from collections import namedtuple
+import heapq
+
 # ---- Third party imports
 
 import arrow
@@ -15,6 +20,10 @@ import arrow
 
 from qwatson.utils.dates import round_arrow_to, local_arrow_from_str
 
+# The number of frames that are processed between the calls to the progress
+# callbacks of the operations on large histories.
+PROGRESS_STEP = 10000
+
 
 def edit_frame_at(client, index, start=None, stop=None, project=None,
                   message=None, tags=None):
@@ -27,26 +36,62 @@ def edit_frame_at(client, index, start=None, stop=None, project=None,
         start = local_arrow_from_str(start, 'YYYY-MM-DD HH:mm:ss')
     elif start is None:
         start = frame.start
-    start = start.to('utc')
 
     if isinstance(stop, str):
         stop = local_arrow_from_str(stop, 'YYYY-MM-DD HH:mm:ss')
     elif stop is None:
         stop = frame.stop
-    stop = stop.to('utc')
 
     project = frame.project if project is None else project
     message = frame.message if message is None else message
     tags = frame.tags if tags is None else tags
     updated_at = arrow.utcnow()
 
-    client.frames[frame.id] = [
+    # The frame is replaced by its index rather than by its id, since
+    # finding a frame by id requires iterating over all the frames.
+    client.frames[index] = [
         project, start, stop, tags, frame.id, updated_at, message]
 
 
+def frame_to_dict(frame):
+    """
+    Return a JSON serializable dict with the data of the frame. Dates are
+    returned as UTC timestamps.
+    """
+    return {'id': frame.id,
+            'project': frame.project,
+            'start': frame.start.timestamp,
+            'stop': frame.stop.timestamp,
+            'tags': list(frame.tags),
+            'message': frame.message,
+            'updated_at': frame.updated_at.timestamp}
+
+
 def get_frame_nbr_for_project(client, project):
     """Return the number of activities associated with a given project."""
-    return len(list(client.frames.filter(projects=[project])))
+    return client.completions.project_count(project)
+
+
+def find_project_rows(frames, project, progress=None):
+    """
+    Return the sorted list of the rows of the frames of the project, found
+    in a single pass over the frames.
+
+    If provided, progress is called with the number of frames scanned and
+    the total number of frames every PROGRESS_STEP frames, and the scan is
+    cancelled and None is returned if it returns True.
+    """
+    rows = []
+    total = len(frames)
+    for row, frame in enumerate(frames):
+        if frame.project == project:
+            rows.append(row)
+        if progress is not None and row % PROGRESS_STEP == 0 and row > 0:
+            if progress(row, total):
+                return None
+    if progress is not None and progress(total, total):
+        return None
+    return rows
 
 
 def round_frame_at(client, index, base):
@@ -73,6 +118,49 @@ def find_where_to_insert_new_frame(client, new_start, where='above'):
         return len(client.frames)
 
 
+def find_frames_in_span(frames, span):
+    """
+    Return the range (first, last) of the indexes of the frames whose start
+    time is within the specified span, with last excluded.
+
+    The frames are expected to be sorted by start time, so that the range
+    is found by bisection instead of checking every frame.
+    """
+    bounds = []
+    for bound, inclusive in ((span[0], False), (span[1], True)):
+        lo, hi = 0, len(frames)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = frames[mid].start
+            if start < bound or (inclusive and start == bound):
+                lo = mid + 1
+            else:
+                hi = mid
+        bounds.append(lo)
+    return tuple(bounds)
+
+
+def find_span_range(frames, span):
+    """
+    Return a range (first, last) of the indexes of the Frames that holds
+    all the frames whose start time is within the specified span, with
+    last excluded.
+
+    The range is found by bisection with find_frames_in_span when the
+    frames are sorted by start time, and is the range of all the frames
+    otherwise. The frames in the range must still be checked with
+    is_in_span, since the order of the frames is not enforced.
+    """
+    if span is None or not frames.is_sorted():
+        return 0, len(frames)
+    return find_frames_in_span(frames, span)
+
+
+def is_in_span(frame, span):
+    """Return whether the start time of the frame is within the span."""
+    return span is None or span[0] <= frame.start <= span[1]
+
+
 def reset_watson(client):
     """
     Reset the internal variables of the client to None to force a reloading
@@ -85,3 +173,155 @@ def reset_watson(client):
     client._last_sync = None
     client._config = None
     client._config_changed = False
+
+
+FramesDiff = namedtuple('FramesDiff', ['removed', 'inserted', 'changed'])
+
+
+def diff_frames(old_frames, new_frames):
+    """
+    Compare two sequences of frames by id and updated_at and return
+    a FramesDiff with :
+
+    - removed: the ascending indexes in old_frames of the frames that
+      are not in new_frames;
+    - inserted: the ascending indexes in new_frames of the frames that
+      are not in old_frames;
+    - changed: the ascending indexes in new_frames of the frames that
+      are in both sequences, but whose updated_at value changed.
+
+    Applying the removals, then the insertions, then the changes to
+    old_frames yields new_frames. None is returned if the frames that are
+    in both sequences are not in the same order, in which case the
+    difference can't be expressed with row insertions and removals only.
+    """
+    old_ids = {frame.id: i for i, frame in enumerate(old_frames)}
+    new_ids = {frame.id: i for i, frame in enumerate(new_frames)}
+
+    common_old = [frame.id for frame in old_frames if frame.id in new_ids]
+    common_new = [frame.id for frame in new_frames if frame.id in old_ids]
+    if common_old != common_new:
+        return None
+
+    removed = [i for i, frame in enumerate(old_frames)
+               if frame.id not in new_ids]
+    inserted = [i for i, frame in enumerate(new_frames)
+                if frame.id not in old_ids]
+    changed = [i for i, frame in enumerate(new_frames)
+               if frame.id in old_ids and
+               frame.updated_at != old_frames[old_ids[frame.id]].updated_at]
+    return FramesDiff(removed, inserted, changed)
+
+
+def group_contiguous(indexes):
+    """
+    Group a sorted list of indexes into a list of (first, last) tuples of
+    contiguous indexes.
+    """
+    groups = []
+    for index in indexes:
+        if groups and groups[-1][1] == index - 1:
+            groups[-1] = (groups[-1][0], index)
+        else:
+            groups.append((index, index))
+    return groups
+
+
+MergeReport = namedtuple('MergeReport', ['added', 'updated', 'removed'])
+ImportReport = namedtuple('ImportReport', ['added', 'updated', 'unchanged'])
+
+
+def merge_sorted_frames(frames, other_frames):
+    """
+    Merge two lists of frames sorted by start time into a new list sorted
+    by start time. Frames from the first list come first when the start
+    times are equal.
+    """
+    return list(heapq.merge(frames, other_frames,
+                            key=lambda frame: frame.start.datetime))
+
+
+def merge_frames(base, ours, theirs):
+    """
+    Do a three-way merge by id and updated_at of the frames that were
+    modified concurrently by two processes.
+
+    The base frames are those that were common to both processes, ours
+    are the frames that were modified in memory and theirs are the frames
+    that were written to the disk by the other process. Frames modified on
+    both sides are resolved by keeping the one with the most recent
+    updated_at value, and a frame deleted on one side is kept only if it
+    was edited on the other side after its deletion.
+
+    Return the merged list of frames and a MergeReport with the number of
+    frames that were added, updated or removed from ours.
+    """
+    base_ids = {frame.id: frame for frame in base}
+    ours_ids = {frame.id: frame for frame in ours}
+    theirs_ids = {frame.id: frame for frame in theirs}
+
+    merged = []
+    updated = removed = 0
+    for frame in ours:
+        if frame.id in theirs_ids:
+            their_frame = theirs_ids[frame.id]
+            if their_frame.updated_at > frame.updated_at:
+                merged.append(their_frame)
+                updated += 1
+            else:
+                merged.append(frame)
+        elif (frame.id not in base_ids or
+              frame.updated_at > base_ids[frame.id].updated_at):
+            # The frame was either added by us or deleted by them before
+            # we edited it.
+            merged.append(frame)
+        else:
+            removed += 1
+
+    added = [frame for frame in theirs if frame.id not in ours_ids and (
+             frame.id not in base_ids or
+             frame.updated_at > base_ids[frame.id].updated_at)]
+    added.sort(key=lambda frame: frame.start.datetime)
+
+    return (merge_sorted_frames(merged, added),
+            MergeReport(len(added), updated, removed))
+
+
+def merge_imported_frames(frames, imported):
+    """
+    Merge the frames imported from another data dir, such as that of the
+    watson CLI, into the frames in a single sort-merge pass.
+
+    The frames are deduplicated by id, keeping the one with the most
+    recent updated_at value. Both lists are expected to be sorted by start
+    time, so that the frames that are added or updated are inserted in
+    sorted position in O(n + m).
+
+    Return the merged list of frames and an ImportReport with the number of
+    the imported frames that were added, that updated a frame, or that were
+    unchanged because the frame was not older.
+    """
+    newest = {}
+    for frame in imported:
+        other = newest.get(frame.id)
+        if other is None or frame.updated_at > other.updated_at:
+            newest[frame.id] = frame
+
+    kept = []
+    updated = unchanged = 0
+    for frame in frames:
+        other = newest.get(frame.id)
+        if other is not None:
+            if other.updated_at > frame.updated_at:
+                updated += 1
+                continue
+            unchanged += 1
+            del newest[frame.id]
+        kept.append(frame)
+
+    # The frames are sorted in linear time when they are already sorted.
+    incoming = sorted((frame for frame in imported if
+                       newest.get(frame.id) is frame),
+                      key=lambda frame: frame.start.datetime)
+    return (merge_sorted_frames(kept, incoming),
+            ImportReport(len(incoming) - updated, updated, unchanged))
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import sys
+
+# ---- Third party imports
+
+from PyQt5.QtCore import pyqtSignal as QSignal
+from PyQt5.QtWidgets import (QCheckBox, QComboBox, QGridLayout, QLineEdit,
+                             QMenu, QPushButton, QWidget, QWidgetAction)
+
+# ---- Local imports
+
+from qwatson.widgets.tags import TagLineEdit
+from qwatson.widgets.toolbar import QToolButtonBase
+
+
+class BulkEditButton(QToolButtonBase):
+    """
+    A tool button that contains a menu with a form to set the project, the
+    tags or the comment of all the selected activities at once.
+    """
+    sig_edit_requested = QSignal(dict)
+
+    def __init__(self, client=None):
+        super().__init__('edit', 'small', None)
+        self.setPopupMode(self.InstantPopup)
+        self.client = client
+        self.setup_menu()
+
+    def setup_menu(self):
+        """Setup the menu of the button with the edit form."""
+        self.project_chbox = QCheckBox('Project')
+        self.project_cbox = QComboBox()
+
+        self.tags_chbox = QCheckBox('Tags')
+        self.tags_edit = TagLineEdit()
+        if self.client is not None:
+            self.tags_edit.setup_completer(self.client)
+
+        self.comment_chbox = QCheckBox('Comment')
+        self.comment_edit = QLineEdit()
+
+        # The editors are enabled only when their field is checked.
+        for chbox, editor in self.fields():
+            editor.setEnabled(False)
+            chbox.toggled.connect(editor.setEnabled)
+
+        self.apply_btn = QPushButton('Apply')
+        self.apply_btn.clicked.connect(self.apply)
+
+        widget = QWidget()
+        layout = QGridLayout(widget)
+        layout.setContentsMargins(5, 5, 5, 5)
+        for row, (chbox, editor) in enumerate(self.fields()):
+            layout.addWidget(chbox, row, 0)
+            layout.addWidget(editor, row, 1)
+        layout.addWidget(self.apply_btn, 3, 1)
+        layout.setColumnMinimumWidth(1, 200)
+
+        menu = QMenu(self)
+        action = QWidgetAction(menu)
+        action.setDefaultWidget(widget)
+        menu.addAction(action)
+        menu.aboutToShow.connect(self.setup_projects)
+        self.setMenu(menu)
+
+    def fields(self):
+        """Return the list of the checkboxes and editors of the form."""
+        return [(self.project_chbox, self.project_cbox),
+                (self.tags_chbox, self.tags_edit),
+                (self.comment_chbox, self.comment_edit)]
+
+    def setup_projects(self):
+        """Update the list of projects that can be selected."""
+        if self.client is None:
+            return
+        project = self.project_cbox.currentText()
+        self.project_cbox.clear()
+        self.project_cbox.addItems(self.client.projects)
+        self.project_cbox.setCurrentIndex(
+            max(self.project_cbox.findText(project), 0))
+
+    def values(self):
+        """
+        Return a dict with the project, tags and message that need to be
+        set for the fields that are checked in the form.
+        """
+        values = {}
+        if self.project_chbox.isChecked():
+            values['project'] = self.project_cbox.currentText()
+        if self.tags_chbox.isChecked():
+            values['tags'] = self.tags_edit.tags
+        if self.comment_chbox.isChecked():
+            values['message'] = self.comment_edit.text()
+        return values
+
+    def apply(self):
+        """Emit the values of the form and close the menu."""
+        self.menu().hide()
+        values = self.values()
+        if values:
+            self.sig_edit_requested.emit(values)
+
+
+if __name__ == '__main__':
+    from PyQt5.QtWidgets import QApplication
+    from qwatson.watson_ext.watsonextends import Watson
+
+    app = QApplication(sys.argv)
+
+    window = QWidget()
+    layout = QGridLayout(window)
+    layout.addWidget(BulkEditButton(Watson()), 0, 0)
+    window.show()
+
+    sys.exit(app.exec_())
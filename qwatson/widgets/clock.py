@@ -21,7 +21,7 @@ from PyQt5.QtWidgets import (QLCDNumber, QApplication, QGridLayout, QStyle,
 
 # ---- Local imports
 
-from qwatson.utils import icons
+from qwatson.utils import icons, instrumentation
 from qwatson.widgets.layout import ColoredFrame
 from qwatson.widgets.toolbar import QToolButtonBase
 
@@ -215,6 +215,7 @@ class ElapsedTimeLCDNumber(QLCDNumber):
         self.is_started = False
         self.reset_elapsed_time()
 
+    @instrumentation.timed('clock.update_elapsed_time')
     def update_elapsed_time(self):
         """Update elapsed time in the widget."""
         self._elapsed_time = time.time() - self._start_time
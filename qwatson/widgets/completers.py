@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Third party imports
+
+from PyQt5.QtCore import QStringListModel
+from PyQt5.QtWidgets import QCompleter
+
+
+class RankedCompleter(QCompleter):
+    """
+    A completer that lists the names of a CompletionIndex that start with
+    the text of a line edit, ranked by how often and how recently they
+    were used.
+
+    The index is queried each time the text is edited by the user, instead
+    of filtering a model of all the names as QCompleter does.
+    """
+    MAX_ITEMS = 10
+
+    def __init__(self, get_index, parent=None):
+        super(RankedCompleter, self).__init__(parent)
+        # A function that returns the CompletionIndex, since the indexes
+        # are rebuilt when the frames are reloaded.
+        self.get_index = get_index
+        self.setModel(QStringListModel(self))
+        self.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.setMaxVisibleItems(self.MAX_ITEMS)
+        self.activated[str].connect(self.insert_completion)
+
+    def set_line_edit(self, line_edit):
+        """Set the line edit whose text is completed."""
+        self.setWidget(line_edit)
+        line_edit.textEdited.connect(self.update_completions)
+
+    def completion_prefix(self, text):
+        """Return the part of the text that needs to be completed."""
+        return text.strip()
+
+    def completions(self, text):
+        """Return the ranked names that complete the text."""
+        prefix = self.completion_prefix(text)
+        if not prefix:
+            return []
+        return self.get_index().complete(prefix, self.MAX_ITEMS)
+
+    def update_completions(self, text):
+        """Show the names that complete the text in the popup."""
+        names = self.completions(text)
+        self.model().setStringList(names)
+        if names:
+            self.complete()
+        else:
+            self.popup().hide()
+
+    def pathFromIndex(self, index):
+        """Qt method override to return the completed text."""
+        return index.data()
+
+    def insert_completion(self, text):
+        """Set the text of the line edit to the completed text."""
+        self.widget().setText(text)
+
+
+class TagCompleter(RankedCompleter):
+    """
+    A RankedCompleter that completes the last tag of a comma separated list
+    of tags, without suggesting the tags that are already in the list.
+    """
+
+    def completion_prefix(self, text):
+        """Return the last tag of the text."""
+        return text.split(',')[-1].strip()
+
+    def completions(self, text):
+        """Return the ranked tags that complete the last tag of the text."""
+        prefix = self.completion_prefix(text)
+        if not prefix:
+            return []
+        tags = set(tag.strip() for tag in text.split(',')[:-1])
+        return [tag for tag in self.get_index().complete(
+                prefix, self.MAX_ITEMS + len(tags)) if
+                tag not in tags][:self.MAX_ITEMS]
+
+    def pathFromIndex(self, index):
+        """Qt method override to replace the last tag of the text."""
+        tags = self.widget().text().split(',')[:-1]
+        return ', '.join([tag.strip() for tag in tags] + [index.data()])
@@ -14,7 +14,7 @@ import sys
 
 import arrow
 from PyQt5.QtCore import pyqtSignal as QSignal
-from PyQt5.QtWidgets import QApplication, QLabel
+from PyQt5.QtWidgets import QApplication, QComboBox, QLabel
 
 # ---- Local imports
 
@@ -24,13 +24,15 @@ from qwatson.widgets.toolbar import QToolButtonBase, ToolBarWidget
 
 
 class DateRangeNavigator(ToolBarWidget):
-    """A widget to navigate date spans."""
+    """A widget to navigate date spans of a week, month, quarter or year."""
 
     sig_date_span_changed = QSignal(tuple)
+    SPANS = ['week', 'month', 'quarter', 'year']
 
     def __init__(self, icon_size='small', parent=None):
         super(DateRangeNavigator, self).__init__(parent)
 
+        self.span = 'week'
         self.home = arrow.now().floor('week').span('week')
         self.current = self.home
 
@@ -39,6 +41,15 @@ class DateRangeNavigator(ToolBarWidget):
 
     def setup(self, icon_size):
         """Setup the widget with the provided arguments."""
+        self.span_cbox = QComboBox()
+        self.span_cbox.addItems([span.title() for span in self.SPANS])
+        self.span_cbox.setToolTip(
+            "<b>Date Range</b><br><br>"
+            "Set the length of the date range of the activities shown "
+            "in the overview.")
+        self.span_cbox.currentIndexChanged.connect(
+            lambda index: self.set_span(self.SPANS[index]))
+
         self.date_range_labl = QLabel()
         self.btn_home = QToolButtonBase('home')
         self.btn_home.clicked.connect(self.go_home)
@@ -50,6 +61,7 @@ class DateRangeNavigator(ToolBarWidget):
 
         # setup the layout
 
+        self.addWidget(self.span_cbox)
         self.addWidget(self.btn_prev)
         self.addWidget(self.btn_next)
         self.addWidget(self.btn_home)
@@ -63,18 +75,35 @@ class DateRangeNavigator(ToolBarWidget):
         self.btn_prev.setIconSize(icons.get_iconsize(icon_size))
         self.btn_next.setIconSize(icons.get_iconsize(icon_size))
 
-    def go_next_range(self):
-        """Go forward one date range step."""
-        self.current = (self.current[0].shift(weeks=1),
-                        self.current[1].shift(weeks=1))
+    def set_span(self, span):
+        """
+        Set the length of the date ranges to one of the SPANS. The current
+        date range is set to the one that contains its first day.
+        """
+        if span == self.span:
+            return
+        self.span = span
+        self.span_cbox.setCurrentIndex(self.SPANS.index(span))
+        self.home = arrow.now().floor(span).span(span)
+        self.current = self.current[0].span(span)
         self.setup_date_range_label()
         self.btn_next.setEnabled(self.current != self.home)
         self.sig_date_span_changed.emit(self.current)
 
+    def go_next_range(self):
+        """Go forward one date range step."""
+        self.shift_range(1)
+
     def go_previous_range(self):
         """Go back one date range step."""
-        self.current = (self.current[0].shift(weeks=-1),
-                        self.current[1].shift(weeks=-1))
+        self.shift_range(-1)
+
+    def shift_range(self, steps):
+        """Shift the current date range by the specified number of steps."""
+        # We compute the span from the shifted start date, since months
+        # and quarters do not all have the same number of days.
+        self.current = self.current[0].shift(
+            **{self.span + 's': steps}).span(self.span)
         self.setup_date_range_label()
         self.btn_next.setEnabled(self.current != self.home)
         self.sig_date_span_changed.emit(self.current)
@@ -86,6 +115,13 @@ class DateRangeNavigator(ToolBarWidget):
         self.setup_date_range_label()
         self.sig_date_span_changed.emit(self.current)
 
+    def go_to(self, date):
+        """Go to the date range that contains the specified arrow date."""
+        self.current = date.span(self.span)
+        self.setup_date_range_label()
+        self.btn_next.setEnabled(self.current != self.home)
+        self.sig_date_span_changed.emit(self.current)
+
     def setup_date_range_label(self):
         """Setup the text in the label widget."""
         self.date_range_labl.setText(arrowspan_to_str(self.current))
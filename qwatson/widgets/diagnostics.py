@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import sys
+
+# ---- Third party imports
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import (
+    QApplication, QCheckBox, QFileDialog, QGridLayout, QHeaderView,
+    QPlainTextEdit, QPushButton, QTableWidget, QTableWidgetItem, QTabWidget,
+    QWidget)
+
+# ---- Local imports
+
+from qwatson.utils import icons, instrumentation
+from qwatson.utils.memory import TracemallocSession, memory_report
+from qwatson.models.delegates import BaseDelegate
+from qwatson.models.tablemodels import WatsonSortFilterProxyModel
+from qwatson.widgets.tableviews import WatsonTableWidget
+from qwatson.widgets.toolbar import ToolBarWidget
+
+
+class DiagnosticsWidget(QWidget):
+    """
+    A hidden window that shows the diagnostic data that are collected
+    while QWatson is running. The window is shown from the mainwindow with
+    the Ctrl+Shift+D shortcut.
+    """
+
+    def __init__(self, client=None, parent=None):
+        super(DiagnosticsWidget, self).__init__(parent)
+        self.setWindowFlags(Qt.Window)
+        self.setWindowIcon(icons.get_icon('master'))
+        self.setWindowTitle("Diagnostics")
+
+        self.tab_widget = QTabWidget()
+        self.timings_tab = TimingsTab()
+        self.tab_widget.addTab(self.timings_tab, 'Timings')
+        self.memory_tab = MemoryTab(client)
+        self.tab_widget.addTab(self.memory_tab, 'Memory')
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+
+        layout = QGridLayout(self)
+        layout.addWidget(self.tab_widget)
+        self.resize(600, 400)
+
+    def refresh(self):
+        """
+        Refresh the timings if shown. The memory report is only updated on
+        demand, since it takes a while to compute on large histories.
+        """
+        if self.tab_widget.currentWidget() is self.timings_tab:
+            self.timings_tab.refresh()
+
+    def register_cache(self, name, cache):
+        """Add a cache to the ones listed in the memory report."""
+        self.memory_tab.caches[name] = cache
+
+    def show(self):
+        """Qt method override to refresh the data periodically."""
+        self.refresh()
+        self.timer.start()
+        super(DiagnosticsWidget, self).show()
+        self.raise_()
+
+    def closeEvent(self, event):
+        """Qt method override."""
+        self.timer.stop()
+        self.memory_tab.close_session()
+        super(DiagnosticsWidget, self).closeEvent(event)
+
+
+class TimingsTab(QWidget):
+    """
+    A widget to enable the instrumentation of the hot paths of QWatson
+    and to show the histograms and counters that were collected.
+    """
+    COLUMNS = ['Name', 'Count', 'Total (ms)', 'Mean (ms)', 'Min (ms)',
+               'Max (ms)']
+
+    def __init__(self, parent=None):
+        super(TimingsTab, self).__init__(parent)
+
+        self.enable_chbox = QCheckBox('Enable instrumentation')
+        self.enable_chbox.setChecked(instrumentation.is_enabled())
+        self.enable_chbox.toggled.connect(self.set_enabled)
+
+        self.trace_btn = QPushButton('Start Trace...')
+        self.trace_btn.clicked.connect(self.toggle_trace)
+        self._tracing = False
+
+        self.reset_btn = QPushButton('Reset')
+        self.reset_btn.clicked.connect(self.reset)
+
+        toolbar = ToolBarWidget()
+        toolbar.addWidget(self.enable_chbox)
+        toolbar.addStretch(100)
+        toolbar.addWidget(self.trace_btn)
+        toolbar.addWidget(self.reset_btn)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.Stretch)
+
+        layout = QGridLayout(self)
+        layout.addWidget(toolbar, 0, 0)
+        layout.addWidget(self.table, 1, 0)
+
+    def set_enabled(self, value):
+        """Enable or disable the instrumentation."""
+        if value and not instrumentation.is_enabled():
+            instrumentation.enable()
+        elif not value:
+            instrumentation.disable()
+            self._tracing = False
+            self.trace_btn.setText('Start Trace...')
+
+    def toggle_trace(self):
+        """Start or stop writing the instrumented calls to a trace file."""
+        if self._tracing:
+            instrumentation.disable()
+            instrumentation.enable()
+            self._tracing = False
+            self.trace_btn.setText('Start Trace...')
+        else:
+            filename, _ = QFileDialog.getSaveFileName(
+                self, 'Save Trace', 'qwatson_trace.json',
+                'Chrome trace (*.json)')
+            if filename:
+                instrumentation.enable(filename)
+                self.enable_chbox.setChecked(True)
+                self._tracing = True
+                self.trace_btn.setText('Stop Trace')
+
+    def reset(self):
+        """Clear the collected data."""
+        instrumentation.reset()
+        self.refresh()
+
+    def refresh(self):
+        """Update the table with the collected data."""
+        stats = instrumentation.get_stats()
+        rows = [[name, hist['count'], hist['total'], hist['mean'],
+                 hist['min'], hist['max']] for
+                name, hist in stats['timings'].items()]
+        rows += [[name, value, None, None, None, None] for
+                 name, value in stats['counters'].items()]
+
+        self.table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                if value is None:
+                    text = ''
+                elif isinstance(value, float):
+                    text = '%0.2f' % value
+                else:
+                    text = str(value)
+                item = QTableWidgetItem(text)
+                if j > 0:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(i, j, item)
+
+
+class MemoryTab(QWidget):
+    """
+    A widget to show a report of the memory held by the data and the Qt
+    objects of QWatson, and to compare tracemalloc snapshots taken at
+    different points of the session to locate leaks.
+    """
+    CLASSES = (WatsonTableWidget, WatsonSortFilterProxyModel, BaseDelegate)
+
+    def __init__(self, client=None, parent=None):
+        super(MemoryTab, self).__init__(parent)
+        self.client = client
+        self.caches = {}
+        self.tracemalloc = TracemallocSession()
+
+        self.report_btn = QPushButton('Update Report')
+        self.report_btn.clicked.connect(self.update_report)
+        self.snapshot_btn = QPushButton('Take Snapshot')
+        self.snapshot_btn.clicked.connect(self.take_snapshot)
+        self.compare_btn = QPushButton('Compare Snapshots')
+        self.compare_btn.clicked.connect(self.compare_snapshots)
+        self.compare_btn.setEnabled(False)
+
+        toolbar = ToolBarWidget()
+        toolbar.addWidget(self.report_btn)
+        toolbar.addStretch(100)
+        toolbar.addWidget(self.snapshot_btn)
+        toolbar.addWidget(self.compare_btn)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setLineWrapMode(QPlainTextEdit.NoWrap)
+
+        layout = QGridLayout(self)
+        layout.addWidget(toolbar, 0, 0)
+        layout.addWidget(self.text, 1, 0)
+
+    def update_report(self):
+        """Compute and show the memory report."""
+        report = memory_report(self.client, self.CLASSES, self.caches)
+        lines = ['Frames: %d frames, %0.0f bytes per frame, %0.1f MB' % (
+                 report['frames']['count'], report['frames']['per_frame'],
+                 report['frames']['total'] / 1024**2)]
+        for name in ('projects', 'tags'):
+            lines.append('%s: %d items, %0.1f kB' % (
+                name.capitalize(), report[name]['count'],
+                report[name]['total'] / 1024))
+        for name, size in sorted(report['caches'].items()):
+            lines.append('Cache %s: %0.1f kB' % (name, size / 1024))
+        lines.append('')
+        for name, counts in sorted(report['instances'].items()):
+            lines.append('%s: %d alive, %d deleted but referenced' % (
+                name, counts['alive'], counts['deleted']))
+        self.text.setPlainText('\n'.join(lines))
+
+    def take_snapshot(self):
+        """Take a tracemalloc snapshot."""
+        index = self.tracemalloc.take_snapshot()
+        self.compare_btn.setEnabled(index > 0)
+        self.text.setPlainText(
+            'Took %s. Tracemalloc is tracing the allocations until '
+            'the diagnostics window is closed.' %
+            self.tracemalloc.snapshots[index][0])
+
+    def compare_snapshots(self):
+        """Show the differences between the first and last snapshots."""
+        first = self.tracemalloc.snapshots[0][0]
+        last = self.tracemalloc.snapshots[-1][0]
+        lines = ['Top allocations between %s and %s:' % (first, last), '']
+        lines += [str(stat) for stat in self.tracemalloc.compare()]
+        self.text.setPlainText('\n'.join(lines))
+
+    def close_session(self):
+        """Stop tracing the allocations if needed."""
+        if self.tracemalloc.is_tracing():
+            self.tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    diagnostics = DiagnosticsWidget()
+    diagnostics.show()
+    sys.exit(app.exec_())
@@ -8,13 +8,16 @@
 
 # ---- Standard imports
 
+from bisect import bisect_left
 import sys
 
 # ---- Third party imports
 
 from PyQt5.QtCore import pyqtSignal as QSignal
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QMenu, QWidgetAction, QCheckBox
+from PyQt5.QtCore import (QAbstractListModel, QModelIndex,
+                          QSortFilterProxyModel, Qt)
+from PyQt5.QtWidgets import (QCheckBox, QGridLayout, QLineEdit, QListView,
+                             QMenu, QWidget, QWidgetAction)
 
 # ---- Local imports
 
@@ -53,20 +56,165 @@ class FilterButton(QToolButtonBase):
         self.setMenu(menu)
 
 
+class FilterItemsModel(QAbstractListModel):
+    """
+    A list model of checkable items sorted by name. Items are checked by
+    default and the check state is stored as the set of the unchecked
+    items, so that no widget nor object is created per item.
+    """
+    sig_checkstate_changed = QSignal()
+
+    def __init__(self, parent=None):
+        super(FilterItemsModel, self).__init__(parent)
+        self._items = []
+        self._unchecked = set()
+
+    def rowCount(self, parent=QModelIndex()):
+        """Qt method override."""
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        """Qt method override."""
+        if not index.isValid():
+            return None
+        item = self._items[index.row()]
+        if role == Qt.DisplayRole:
+            return item
+        elif role == Qt.CheckStateRole:
+            return Qt.Unchecked if item in self._unchecked else Qt.Checked
+        return None
+
+    def setData(self, index, value, role=Qt.CheckStateRole):
+        """Qt method override."""
+        if not index.isValid() or role != Qt.CheckStateRole:
+            return False
+        self.set_checked([self._items[index.row()]], value == Qt.Checked)
+        return True
+
+    def flags(self, index):
+        """Qt method override."""
+        return Qt.ItemIsEnabled | Qt.ItemIsUserCheckable
+
+    def items(self):
+        """Return the sorted list of the items of the model."""
+        return self._items
+
+    def set_items(self, items):
+        """
+        Set the items of the model. Only the rows of the items that were
+        added or removed since the last call are inserted or removed.
+        """
+        items = sorted(set(items))
+        if items == self._items:
+            return
+        new_items = set(items)
+        for row in reversed(range(len(self._items))):
+            if self._items[row] not in new_items:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._items[row]
+                self.endRemoveRows()
+        old_items = set(self._items)
+        for item in items:
+            if item not in old_items:
+                row = bisect_left(self._items, item)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self._items.insert(row, item)
+                self.endInsertRows()
+
+    def is_checked(self, item):
+        """Return whether the item is checked."""
+        return item not in self._unchecked
+
+    def set_checked(self, items, value):
+        """Set the check state of the provided items."""
+        if value:
+            self._unchecked.difference_update(items)
+        else:
+            self._unchecked.update(items)
+        if len(items) == 1:
+            first = last = bisect_left(self._items, items[0])
+        else:
+            first, last = 0, len(self._items) - 1
+        if 0 <= first <= last < len(self._items):
+            self.dataChanged.emit(self.index(first), self.index(last),
+                                  [Qt.CheckStateRole])
+        self.sig_checkstate_changed.emit()
+
+    def unchecked_count(self, items=None):
+        """
+        Return the number of unchecked items among the provided items or
+        among all the items of the model.
+        """
+        if items is None:
+            return sum(item in self._unchecked for item in self._items)
+        return sum(item in self._unchecked for item in items)
+
+    def checkstate(self):
+        """
+        Return a dict with the checkstate values of all the items of the
+        model.
+        """
+        unchecked = self._unchecked
+        return {item: item not in unchecked for item in self._items}
+
+
 class FilterBaseMenu(QMenu):
     """
-    A base class menu that contains a list of checkable items and a
-    (Select All) item that allow checking or un-checking all the menu items
-    at once.
+    A base class menu that contains a searchable list of checkable items and
+    a (Select All) item that allow checking or un-checking all the items
+    matching the search at once.
+
+    The items are shown in a list view, so that only the visible items are
+    painted, and are updated incrementally each time the menu is shown.
     """
     sig_items_checkstate_changed = QSignal(dict)
 
     def __init__(self, name, client=None, parent=None):
         super().__init__(name, parent)
-        self._actions = {}
         self.client = client
+
+        self.model = FilterItemsModel(self)
+        self.model.sig_checkstate_changed.connect(
+            self.handle_item_was_clicked)
+        self.proxy_model = QSortFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.model)
+        self.proxy_model.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+        self.setup_widget()
         self.aboutToShow.connect(self.setup_menu_items)
 
+    def setup_widget(self):
+        """Setup the search box, the (Select All) item and the list view."""
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText('Search')
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(self.search_text_changed)
+
+        self.select_all_chbox = QCheckBox('(Select All)')
+        self.select_all_chbox.setChecked(True)
+        self.select_all_chbox.stateChanged.connect(
+            self.handle_select_was_clicked)
+
+        self.list_view = QListView()
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setModel(self.proxy_model)
+
+        widget = QWidget()
+        layout = QGridLayout(widget)
+        layout.setContentsMargins(5, 5, 5, 5)
+        layout.addWidget(self.search_box, 0, 0)
+        layout.addWidget(self.select_all_chbox, 1, 0)
+        layout.addWidget(self.list_view, 2, 0)
+
+        action = QWidgetAction(self)
+        action.setDefaultWidget(widget)
+        self.addAction(action)
+
+    def showEvent(self, event):
+        """Qt method override to give the focus to the search box."""
+        super().showEvent(event)
+        self.search_box.setFocus()
+
     def items(self):
         """
         Return a list of strings corresponding to the name of all the items
@@ -79,60 +227,50 @@ class FilterBaseMenu(QMenu):
         Return a list of strings with the name of the items that are
         checked in the menu.
         """
-        return [item for item in self.items() if
-                self._actions[item].defaultWidget().isChecked()]
+        return [item for item in self.model.items() if
+                self.model.is_checked(item)]
 
     def items_checkstate(self):
         """
         Return a dict with the checkstate values of all the items that are
         listed in the menu.
         """
-        return {item: self._actions[item].defaultWidget().isChecked() for
-                item in self.items()}
+        return self.model.checkstate()
+
+    def set_item_checked(self, item, value):
+        """Set the check state of the item listed in the menu."""
+        self.model.set_checked([item], value)
+
+    def visible_items(self):
+        """Return the list of the items that match the search text."""
+        if not self.search_box.text():
+            return self.model.items()
+        return [self.proxy_model.index(row, 0).data() for
+                row in range(self.proxy_model.rowCount())]
 
     def setup_menu_items(self):
         """
-        Setup the items listed in the menu, including a (select all) item
-        to check or uncheck all items at once.
-        """
-        self.clear()
-        if '__select_all__' not in self._actions:
-            checkbox = QCheckBox('(Select All)', self.parent())
-            checkbox.setChecked(True)
-            checkbox.stateChanged.connect(self.handle_select_was_clicked)
-            action = QWidgetAction(self.parent())
-            action.setDefaultWidget(checkbox)
-            self._actions['__select_all__'] = action
-        self.addAction(self._actions['__select_all__'])
+        Update the items listed in the menu and the check state of the
+        (select all) item.
+        """
         if self.client is not None:
-            self.addSeparator()
-            for item in self.items():
-                if item in self._actions:
-                    self.addAction(self._actions[item])
-                else:
-                    checkbox = QCheckBox(item, self.parent())
-                    checkbox.setChecked(True)
-                    checkbox.stateChanged.connect(self.handle_item_was_clicked)
-                    action = QWidgetAction(self.parent())
-                    action.setDefaultWidget(checkbox)
-                    self.addAction(action)
-                    self._actions[item] = action
-            self.setup_select_all_item()
+            self.model.set_items(self.items())
+        self.setup_select_all_item()
 
     def setup_select_all_item(self):
         """
         Setup the check state of the (Select All) item depending on the
-        check state of the menu items.
+        check state of the items that match the search text.
         """
-        values = [self._actions[item].defaultWidget().isChecked() for
-                  item in self.items()]
+        items = self.visible_items()
+        unchecked_count = self.model.unchecked_count(items)
 
-        checkbox = self._actions['__select_all__'].defaultWidget()
+        checkbox = self.select_all_chbox
         checkbox.blockSignals(True)
-        if all(values):
+        if unchecked_count == 0:
             checkbox.setTristate(False)
             checkbox.setCheckState(Qt.Checked)
-        elif any(values):
+        elif unchecked_count < len(items):
             checkbox.setTristate(True)
             checkbox.setCheckState(Qt.PartiallyChecked)
         else:
@@ -140,26 +278,25 @@ class FilterBaseMenu(QMenu):
             checkbox.setChecked(False)
         checkbox.blockSignals(False)
 
+    def search_text_changed(self, text):
+        """Show only the items that contain the search text."""
+        self.proxy_model.setFilterFixedString(text)
+        self.setup_select_all_item()
+
     def handle_item_was_clicked(self):
         """
-        Handle when one of the item checkboxes listed in the menu is clicked.
+        Handle when the check state of items listed in the menu changed.
         """
         self.setup_select_all_item()
         self.sig_items_checkstate_changed.emit(self.items_checkstate())
 
     def handle_select_was_clicked(self):
         """
-        Check or un-check all menu items depending on the check state of the
-        (Select All) item.
+        Check or un-check all the items that match the search text depending
+        on the check state of the (Select All) item.
         """
-        checkbox = self._actions['__select_all__'].defaultWidget()
-        is_all_project_checked = checkbox.isChecked()
-        for item in self.items():
-            checkbox = self._actions[item].defaultWidget()
-            checkbox.blockSignals(True)
-            checkbox.setChecked(is_all_project_checked)
-            checkbox.blockSignals(False)
-        self.sig_items_checkstate_changed.emit(self.items_checkstate())
+        self.model.set_checked(
+            self.visible_items(), self.select_all_chbox.isChecked())
 
 
 class FilterProjectsMenu(FilterBaseMenu):
@@ -185,7 +322,7 @@ class FilterTagsMenu(FilterBaseMenu):
 
 
 if __name__ == '__main__':
-    from PyQt5.QtWidgets import QApplication, QWidget, QGridLayout
+    from PyQt5.QtWidgets import QApplication
     from qwatson.watson_ext.watsonextends import Watson
 
     app = QApplication(sys.argv)
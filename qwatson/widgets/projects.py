@@ -19,6 +19,7 @@ from PyQt5.QtWidgets import (QApplication, QGridLayout, QMessageBox, QWidget,
 
 # ---- Local imports
 
+from qwatson.widgets.completers import RankedCompleter
 from qwatson.widgets.toolbar import ToolBarWidget, QToolButtonSmall
 from qwatson.utils import icons
 from qwatson.models.projectmodel import WatsonProjectModel
@@ -143,6 +144,10 @@ class ProjectView(QWidget):
     """
     A QComboxBox underlain with a QLineEdit to display the existing projects
     in the frame database and to add or rename projects to the database.
+
+    The combobox is editable, so that a project can be selected by typing
+    the start of its name and choosing one of the completions, which are
+    ranked by how often and how recently the projects were used.
     """
     currentIndexChanged = QSignal(int)
     sig_rename_project = QSignal(str, str)
@@ -154,6 +159,11 @@ class ProjectView(QWidget):
         self.setup()
         self.combobox.setModel(model)
 
+        self.completer = RankedCompleter(
+            lambda: model.client.completions.projects, parent=self)
+        self.completer.set_line_edit(self.combobox.lineEdit())
+        self.completer.activated[str].connect(self.setCurentTextFromUser)
+
         # We need to call showPopup on the combobox here to prevent a lag
         # when clicking on the combobox for the first time.
         self.combobox.showPopup()
@@ -165,7 +175,11 @@ class ProjectView(QWidget):
         self.linedit.installEventFilter(self)
 
         self.combobox = QComboBox()
-        self.combobox.setEditable(False)
+        self.combobox.setEditable(True)
+        self.combobox.setInsertPolicy(QComboBox.NoInsert)
+        self.combobox.setCompleter(None)
+        self.combobox.lineEdit().editingFinished.connect(
+            self._restore_current_text)
         self.combobox.currentIndexChanged.connect(
             self.currentIndexChanged.emit)
 
@@ -181,8 +195,11 @@ class ProjectView(QWidget):
         super(ProjectView, self).setFixedHeight(height)
 
     def currentText(self):
-        """Return the current text of the combobox."""
-        return self.combobox.currentText()
+        """
+        Return the text of the current item of the combobox, which may
+        differ from the text that is being typed.
+        """
+        return self.combobox.itemText(self.combobox.currentIndex())
 
     def currentIndex(self):
         """Return the current index of the combobox."""
@@ -192,6 +209,24 @@ class ProjectView(QWidget):
         """Set the combobox to the index matching the provided name."""
         self.setCurentIndex(self.combobox.findText(name))
 
+    def setCurentTextFromUser(self, name):
+        """
+        Set the combobox to the index matching the name that was chosen by
+        the user in the completions.
+        """
+        index = self.combobox.findText(name)
+        if index != -1:
+            self.combobox.setCurrentIndex(index)
+        self._restore_current_text()
+
+    def _restore_current_text(self):
+        """
+        Set the text of the combobox back to its current item when the text
+        typed by the user does not match a project.
+        """
+        if self.combobox.lineEdit().text() != self.currentText():
+            self.combobox.lineEdit().setText(self.currentText())
+
     def setCurentIndex(self, index):
         """Set the combobox current index the the specified index."""
         self.combobox.blockSignals(True)
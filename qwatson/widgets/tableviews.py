@@ -8,6 +8,8 @@
 
 # ---- Standard imports
 
+from bisect import bisect_right
+import datetime
 import sys
 from math import ceil
 
@@ -15,22 +17,30 @@ from math import ceil
 
 import arrow
 from PyQt5.QtCore import pyqtSignal as QSignal
-from PyQt5.QtCore import Qt, QPoint
+from PyQt5.QtCore import Qt, QItemSelectionModel, QPoint, QRect, QTimer
 from PyQt5.QtGui import QCursor
 from PyQt5.QtWidgets import (
-    QApplication, QGridLayout, QHeaderView, QLabel, QMessageBox, QScrollArea,
-    QTableView, QHBoxLayout, QVBoxLayout, QWidget, QFrame)
+    QApplication, QComboBox, QGridLayout, QHeaderView, QLabel, QLineEdit,
+    QMessageBox, QScrollArea, QStackedWidget, QTableView, QHBoxLayout,
+    QVBoxLayout, QWidget, QFrame)
 
 # ---- Local imports
 
-from qwatson.utils import icons
-from qwatson.utils.dates import arrowspan_to_str, total_seconds_to_hour_min
+from qwatson.utils import icons, instrumentation
+from qwatson.utils.dates import (
+    arrowspan_to_str, local_arrow_from_tuple, total_seconds_to_hour_min)
+from qwatson.utils.timecodec import codec
+from qwatson.watson_ext.conflicts import next_conflict_index
 from qwatson.watson_ext.watsonhelpers import find_where_to_insert_new_frame
 from qwatson.widgets.layout import ColoredFrame
-from qwatson.widgets.toolbar import QToolButtonBase, ToolBarWidget
+from qwatson.widgets.toolbar import (
+    OnOffToolButton, QToolButtonBase, ToolBarWidget)
 from qwatson.widgets.dates import DateRangeNavigator
+from qwatson.widgets.bulkedit import BulkEditButton
 from qwatson.widgets.filters import FilterButton
-from qwatson.models.tablemodels import WatsonSortFilterProxyModel
+from qwatson.models.searchbuilder import SearchIndexBuilder
+from qwatson.models.tablemodels import (
+    SpanRowFilter, WatsonSortFilterProxyModel, WatsonSpanTableModel)
 from qwatson.models.delegates import (
     BaseDelegate, ToolButtonDelegate, ComboBoxDelegate, LineEditDelegate,
     DateTimeDelegate, TagEditDelegate)
@@ -40,6 +50,7 @@ class ActivityOverviewWidget(QWidget):
     """A widget to show and edit activities logged with Watson."""
     sig_add_activity = QSignal(int, arrow.Arrow, arrow.Arrow)
     sig_del_activity = QSignal(int)
+    sig_del_activities = QSignal(list)
     sig_load_settings = QSignal(object)
 
     def __init__(self, model, parent=None):
@@ -55,16 +66,30 @@ class ActivityOverviewWidget(QWidget):
         self.filter_btn.projects_menu.setup_menu_items()
         self.date_span_changed()
 
+        # The search index is built in the background, since it takes a
+        # while on large histories.
+        self._search_query = None
+        self.search_builder = SearchIndexBuilder(model.client, parent=self)
+        self.search_builder.sig_index_ready.connect(self.search_index_ready)
+        self.search_builder.start()
+
     def setup(self, model):
         """Setup the widget with the provided arguments."""
+        # The activities are shown in a stack of daily tables for week
+        # spans and in a single table for longer spans.
         self.table_widg = WatsonMultiTableWidget(model, parent=self)
+        self.span_table_widg = WatsonSpanTableWidget(model, parent=self)
+        self.table_stack = QStackedWidget()
+        self.table_stack.addWidget(self.table_widg)
+        self.table_stack.addWidget(self.span_table_widg)
+
         self.toolbar = self.setup_toolbar()
 
         # ---- Setup the layout
 
         layout = QGridLayout(self)
         layout.addWidget(self.toolbar)
-        layout.addWidget(self.table_widg)
+        layout.addWidget(self.table_stack)
 
     def setup_toolbar(self):
         """Setup the toolbar of the widget."""
@@ -77,7 +102,7 @@ class ActivityOverviewWidget(QWidget):
             "<b>Add Activity Above</b><br><br>"
             "Add a new activity directly above the currently selected"
             " activity. If no activity is selected, the new activity will"
-            " be added on the first day of the week.")
+            " be added on the first day of the date range.")
         self.add_act_above_btn.clicked.connect(
             lambda: self.add_new_activity('above'))
 
@@ -86,7 +111,7 @@ class ActivityOverviewWidget(QWidget):
             "<b>Add Activity Below</b><br><br>"
             "Add a new activity directly below the currently selected"
             " activity. If no activity is selected, the new activity will"
-            " be added on the last day of the week.")
+            " be added on the last day of the date range.")
         self.add_act_below_btn.clicked.connect(
             lambda: self.add_new_activity('below'))
 
@@ -97,17 +122,72 @@ class ActivityOverviewWidget(QWidget):
             " to the values of the currently selected activity.")
         self.btn_load_row_settings.clicked.connect(
             lambda: self.sig_load_settings.emit(
-                self.table_widg.selectedFrame()))
+                self.table_stack.currentWidget().selectedFrame()))
 
         self.filter_btn = FilterButton(self.model.client)
         self.filter_btn.setToolTip(
             "<b>Setup Activity Filters</b><br><br>"
             "Set filters to show activities only for selected "
             "tags and projects in the overview table.")
-        self.filter_btn.sig_projects_checkstate_changed.connect(
-            self.table_widg.set_project_filters)
-        self.filter_btn.sig_tags_checkstate_changed.connect(
-            self.table_widg.set_tag_filters)
+        for table_widg in (self.table_widg, self.span_table_widg):
+            self.filter_btn.sig_projects_checkstate_changed.connect(
+                table_widg.set_project_filters)
+            self.filter_btn.sig_tags_checkstate_changed.connect(
+                table_widg.set_tag_filters)
+
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText('Indexing...')
+        self.search_box.setEnabled(False)
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setToolTip(
+            "<b>Search Activities</b><br><br>"
+            "Go to the date range of the most recent activities whose "
+            "comment, tags or project contain words starting with the "
+            "words of the search. Press Enter again to go to the next "
+            "older date range with matching activities.")
+        self.search_box.returnPressed.connect(self.search_next)
+        self.search_labl = QLabel()
+
+        self.conflict_btn = QToolButtonBase('conflicts', 'small')
+        self.conflict_btn.setToolTip(
+            "<b>Go to Next Conflict</b><br><br>"
+            "Go to the next date range with activities that overlap other "
+            "activities or that are not sorted by start time. These "
+            "activities are highlighted in the overview table.")
+        self.conflict_btn.clicked.connect(self.go_to_next_conflict)
+        self.conflict_labl = QLabel()
+
+        self.bulk_edit_btn = BulkEditButton(self.model.client)
+        self.bulk_edit_btn.setToolTip(
+            "<b>Edit Selected Activities</b><br><br>"
+            "Set the project, tags or comment of all the selected "
+            "activities at once. Hold Ctrl or Shift to select activities "
+            "of several days.")
+        self.bulk_edit_btn.sig_edit_requested.connect(
+            self.edit_selected_activities)
+
+        self.del_selected_btn = QToolButtonBase('erase-right', 'small')
+        self.del_selected_btn.setToolTip(
+            "<b>Delete Selected Activities</b><br><br>"
+            "Delete all the selected activities at once.")
+        self.del_selected_btn.clicked.connect(self.del_selected_activities)
+
+        self.sort_cbox = QComboBox()
+        self.sort_cbox.addItem('Time', -1)
+        for column in ('duration', 'project', 'tags', 'comment'):
+            self.sort_cbox.addItem(column.title(), self.model.COLUMNS[column])
+        self.sort_cbox.setToolTip(
+            "<b>Sort Activities</b><br><br>"
+            "Set the column by which the activities of each day are sorted "
+            "in the overview table. The activities are sorted in the order "
+            "in which they were logged by default.")
+        self.sort_cbox.currentIndexChanged.connect(self.sort_changed)
+
+        self.sort_order_btn = OnOffToolButton('sort_descending', size='small')
+        self.sort_order_btn.setToolTip(
+            "<b>Sort in Descending Order</b><br><br>"
+            "Sort the activities of each day in descending order.")
+        self.sort_order_btn.sig_value_changed.connect(self.sort_changed)
 
         # Setup the layout.
 
@@ -116,16 +196,108 @@ class ActivityOverviewWidget(QWidget):
 
         toolbar.addWidget(self.date_range_nav)
         toolbar.addStretch(100)
+        toolbar.addWidget(self.search_labl)
+        toolbar.addWidget(self.search_box)
+        toolbar.addWidget(self.conflict_labl)
+        toolbar.addWidget(self.conflict_btn)
         toolbar.addWidget(self.btn_load_row_settings)
         toolbar.addWidget(self.add_act_above_btn)
         toolbar.addWidget(self.add_act_below_btn)
+        toolbar.addWidget(self.bulk_edit_btn)
+        toolbar.addWidget(self.del_selected_btn)
+        toolbar.addWidget(self.sort_cbox)
+        toolbar.addWidget(self.sort_order_btn)
         toolbar.addWidget(self.filter_btn)
 
         return toolbar
 
     def date_span_changed(self):
         """Handle when the range of the date range navigator widget change."""
-        self.table_widg.set_date_span(self.date_range_nav.current)
+        date_span = self.date_range_nav.current
+        if self.date_range_nav.span == 'week':
+            # We empty the single table, so that it does not need to be
+            # updated when the frames change.
+            self.span_table_widg.set_date_span(None)
+            self.table_widg.set_date_span(date_span)
+            self.table_stack.setCurrentWidget(self.table_widg)
+        else:
+            self.table_widg.clear_focused_table()
+            self.span_table_widg.set_date_span(date_span)
+            self.table_stack.setCurrentWidget(self.span_table_widg)
+
+        # The activities are only sorted in the tables of the days.
+        is_week = self.date_range_nav.span == 'week'
+        self.sort_cbox.setEnabled(is_week)
+        self.sort_order_btn.setEnabled(is_week)
+
+    def sort_changed(self):
+        """Sort the activities of the days by the selected column."""
+        self.table_widg.set_sort(
+            self.sort_cbox.currentData(),
+            Qt.DescendingOrder if self.sort_order_btn.value() else
+            Qt.AscendingOrder)
+
+    def search_index_ready(self):
+        """Enable the search box once the search index is built."""
+        self.search_box.setPlaceholderText('Search')
+        self.search_box.setEnabled(True)
+
+    def find_matching_spans(self, query):
+        """
+        Return the list of the date ranges of the navigator that contain
+        activities matching the query, from the most recent to the oldest.
+        """
+        span = self.date_range_nav.span
+        spans = []
+        for ordinal in reversed(
+                self.model.client.search_index.search_days(query)):
+            date = datetime.date.fromordinal(ordinal)
+            if spans and spans[-1][0].date() <= date:
+                continue
+            spans.append(local_arrow_from_tuple(
+                (date.year, date.month, date.day)).span(span))
+        return spans
+
+    def search_next(self):
+        """
+        Go to the most recent date range with activities matching the
+        search if the search changed, or else to the next older one.
+        """
+        query = self.search_box.text()
+        spans = self.find_matching_spans(query)
+        if not spans:
+            self.search_labl.setText('No match')
+            self._search_query = query
+            return
+        current = self.date_range_nav.current
+        index = 0
+        if query == self._search_query:
+            older = [i for i, span in enumerate(spans) if
+                     span[0] < current[0]]
+            index = older[0] if older else 0
+        self._search_query = query
+        self.search_labl.setText('%d of %d' % (index + 1, len(spans)))
+        if spans[index] != current:
+            self.date_range_nav.go_to(spans[index][0])
+
+    def go_to_next_conflict(self):
+        """
+        Go to the date range of the first conflict between the activities
+        that starts after the current date range, or of the first conflict
+        if there is none.
+        """
+        client = self.model.client
+        conflicts = client.conflicts.conflicts(client.frames)
+        current = self.date_range_nav.current
+        index = next_conflict_index(conflicts, current[1].timestamp)
+        if index is None:
+            self.conflict_labl.setText('No conflict')
+            return
+        conflict = conflicts[index]
+        self.conflict_labl.setText('%d of %d' % (index + 1, len(conflicts)))
+        date = codec.to_local(conflict.start)
+        if not current[0] <= date <= current[1]:
+            self.date_range_nav.go_to(date)
 
     def show(self):
         """Qt method override to restore the window when minimized."""
@@ -157,9 +329,40 @@ class ActivityOverviewWidget(QWidget):
         to Watson's frames. The argument 'where' indicates wether the new
         activity is to be added above or below the selected row.
         """
-        index, time = self.table_widg.get_new_activity_index_and_time(where)
+        index, time = (self.table_stack.currentWidget()
+                       .get_new_activity_index_and_time(where))
         self.sig_add_activity.emit(index, time, time)
 
+    def selected_frames(self):
+        """
+        Return the sorted list of the indexes of the frames corresponding to
+        the selected activities of the overview.
+        """
+        return self.table_stack.currentWidget().selectedFrames()
+
+    def edit_selected_activities(self, values):
+        """
+        Set the project, tags or message of the dict of values to all the
+        selected activities at once.
+        """
+        self.model.edit_frames(self.selected_frames(), **values)
+
+    def del_selected_activities(self):
+        """
+        Ask for confirmation to delete the selected activities and send a
+        signal with their frame indexes if confirmed.
+        """
+        frame_indexes = self.selected_frames()
+        if not frame_indexes:
+            return
+        ans = QMessageBox.question(
+            self, 'Delete frames',
+            "Do you want to delete the %d selected activities?" %
+            len(frame_indexes),
+            defaultButton=QMessageBox.No)
+        if ans == QMessageBox.Yes:
+            self.sig_del_activities.emit(frame_indexes)
+
     def del_activity(self, index):
         """
         Ask for confirmation to delete a row and delete or not the row from
@@ -199,6 +402,22 @@ class WatsonMultiTableWidget(QFrame):
         self.model.sig_total_seconds_changed.connect(self.setup_time_total)
         self.tables = []
         self.last_focused_table = None
+        self.sort_column = -1
+        self.sort_order = Qt.AscendingOrder
+
+        # The rows accepted by the filters are evaluated once for the
+        # whole date span and shared by the tables of the days.
+        self.row_filter = SpanRowFilter(model, date_span)
+
+        # The update of the mouse hovered row is throttled to the refresh
+        # rate of the screen when scrolling.
+        refresh_rate = QApplication.primaryScreen().refreshRate() or 60
+        self._hover_timer = QTimer(self)
+        self._hover_timer.setSingleShot(True)
+        self._hover_timer.setInterval(int(1000 / refresh_rate))
+        self._hover_timer.timeout.connect(
+            lambda: self.srollbar_value_changed(
+                self.scrollarea.verticalScrollBar().value()))
 
         self.setup()
         self.set_date_span(date_span)
@@ -219,7 +438,7 @@ class WatsonMultiTableWidget(QFrame):
         """Setup the scrollarea that holds all the table widgets."""
         scrollarea = QScrollArea()
         scrollarea.verticalScrollBar().valueChanged.connect(
-            self.srollbar_value_changed)
+            self.schedule_hovered_row_update)
 
         widget = ColoredFrame(color='light')
 
@@ -260,6 +479,19 @@ class WatsonMultiTableWidget(QFrame):
             table.set_tag_filters(tag_filters)
         self.scrollarea.widget().show()
 
+    def set_sort(self, column, order=Qt.AscendingOrder):
+        """
+        Sort the activities of each day by the specified column of the
+        model, or in the order of the frames if column is -1.
+        """
+        self.sort_column = column
+        self.sort_order = order
+        self.scrollarea.widget().hide()
+        for table in self.tables:
+            table.view.sort_by(column, order)
+        self.scrollarea.widget().show()
+
+    @instrumentation.timed('overview.set_date_span')
     def set_date_span(self, date_span):
         """
         Set the range over which activities are displayed in the widget
@@ -267,6 +499,7 @@ class WatsonMultiTableWidget(QFrame):
         """
         self.clear_focused_table()
         self.date_span = date_span
+        self.row_filter.set_date_span(date_span)
         total_seconds = round((date_span[1] - date_span[0]).total_seconds())
         ndays = ceil(total_seconds / (60*60*24))
         while True:
@@ -274,13 +507,16 @@ class WatsonMultiTableWidget(QFrame):
                 break
             elif len(self.tables) < ndays:
                 self.tables.append(WatsonTableWidget(self.model, parent=self))
+                self.tables[-1].view.proxy_model.set_row_filter(
+                    self.row_filter)
+                self.tables[-1].view.sort_by(self.sort_column, self.sort_order)
                 self.tables[-1].sig_tableview_focused_in.connect(
                     self.tableview_focused_in)
                 self.scene.insertWidget(self.scene.count()-1, self.tables[-1])
             else:
-                self.tables.remove(self.tables[-1])
-                self.scene.removeWidget(self.tables[-1])
-                self.tables[-1].deleteLater()
+                table = self.tables.pop(-1)
+                self.scene.removeWidget(table)
+                table.deleteLater()
 
         # We hide the scrollbar widget while the tables are updated
         # to avoid flickering.
@@ -308,17 +544,22 @@ class WatsonMultiTableWidget(QFrame):
 
     def tableview_focused_in(self, table):
         """
-        Save the last focused table and unselect the previous focused table.
+        Save the last focused table and unselect the other tables, unless
+        the Ctrl or Shift key is pressed to extend the selection of rows
+        to the focused table.
         """
         if self.last_focused_table != table:
-            self.clear_focused_table()
+            modifiers = QApplication.keyboardModifiers()
+            if not modifiers & (Qt.ControlModifier | Qt.ShiftModifier):
+                self.clear_focused_table()
             table.view.set_selected(True)
             self.last_focused_table = table
 
     def clear_focused_table(self):
-        """Clear the last focused table."""
-        if self.last_focused_table is not None:
-            self.last_focused_table.view.set_selected(False)
+        """Clear the last focused table and the selection of the tables."""
+        for table in self.tables:
+            if table.view.is_selected:
+                table.view.set_selected(False)
         self.last_focused_table = None
 
     def selectedFrame(self):
@@ -331,6 +572,36 @@ class WatsonMultiTableWidget(QFrame):
         else:
             return None
 
+    def selectedFrames(self):
+        """
+        Return the sorted list of the indexes of the frames corresponding to
+        the selected rows of all the tables.
+        """
+        indexes = []
+        for table in self.tables:
+            indexes.extend(table.view.get_selected_frame_indexes())
+        return sorted(indexes)
+
+    def schedule_hovered_row_update(self, value):
+        """
+        Schedule an update of the mouse hovered row when the value of the
+        vertical scrollbar changes, at most once per screen refresh.
+        """
+        if not self._hover_timer.isActive():
+            self._hover_timer.start()
+
+    def table_at(self, y):
+        """
+        Return the table located at the specified vertical position in the
+        widget of the scrollarea, or None if there is no table there.
+        """
+        # The tables are stacked vertically in order, so we can bisect
+        # their vertical positions.
+        index = bisect_right([table.y() for table in self.tables], y) - 1
+        if index >= 0 and y < self.tables[index].geometry().bottom():
+            return self.tables[index]
+        return None
+
     def srollbar_value_changed(self, value):
         """
         Handle when the value of the vertical scrollbar changes, so that
@@ -341,16 +612,21 @@ class WatsonMultiTableWidget(QFrame):
         # We add the scrollbar value so that we get the mouse cursor
         # vertical position relative to the widget of the scrollarea
         # instead of the viewport.
+        hovered_table = self.table_at(mouse_pos.y())
         for table in self.tables:
-            # Get the mouse position relative to the table view of the
-            # corresponding widget.
-            view_mouse_pos = mouse_pos - table.pos() - table.view.pos()
-
-            if not table.view.rect().contains(view_mouse_pos):
+            if (table is not hovered_table and
+                    table.view._hovered_row is not None):
+                table.view.set_hovered_row(None)
+        if hovered_table is not None:
+            # Get the mouse position relative to the table view.
+            view = hovered_table.view
+            view_mouse_pos = mouse_pos - hovered_table.pos() - view.pos()
+            if not view.rect().contains(view_mouse_pos):
                 row_at = None
             else:
-                row_at = table.view.rowAt(view_mouse_pos.y())
-            table.view.set_hovered_row(row_at)
+                row_at = view.rowAt(view_mouse_pos.y())
+                row_at = None if row_at == -1 else row_at
+            view.set_hovered_row(row_at)
 
     def get_new_activity_index_and_time(self, where='above'):
         """
@@ -377,6 +653,121 @@ class WatsonMultiTableWidget(QFrame):
         return frame_index, insert_time
 
 
+class WatsonSpanTableWidget(QFrame):
+    """
+    A widget that displays the Watson activities of a long timespan, such
+    as a month or a year, in a single scrollable table with a header row
+    for each day.
+    """
+
+    def __init__(self, model, parent=None):
+        super(WatsonSpanTableWidget, self).__init__(parent)
+        self.model = model
+
+        self.view = WatsonSpanTableView(model)
+        self.view.sig_focused_in.connect(self.tableview_focused_in)
+        self.view.proxy_model.sig_total_seconds_changed.connect(
+            self.setup_time_total)
+        self.view.setMinimumWidth(900)
+        self.view.setMinimumHeight(500)
+
+        self.total_time_labl = QLabel()
+        self.total_time_labl.setAlignment(Qt.AlignRight)
+        font = self.total_time_labl.font()
+        font.setBold(True)
+        self.total_time_labl.setFont(font)
+
+        layout = QGridLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(3)
+        layout.addWidget(self.view, 0, 0)
+        layout.addWidget(self.total_time_labl, 1, 0)
+
+        self.setup_time_total(0)
+
+    @property
+    def date_span(self):
+        """Return the date span of the activities shown in the table."""
+        return self.view.proxy_model.date_span
+
+    def set_date_span(self, date_span):
+        """
+        Set the range over which activities are displayed in the table.
+        The table is emptied when the date span is None.
+        """
+        self.clear_focused_table()
+        self.view.set_date_span(date_span)
+        self.view.scrollToTop()
+
+    def set_project_filters(self, project_filters):
+        """Set the project filters of the table."""
+        self.view.set_project_filters(project_filters)
+
+    def set_tag_filters(self, tag_filters):
+        """Set the tag filters of the table."""
+        self.view.set_tag_filters(tag_filters)
+
+    def setup_time_total(self, total_seconds):
+        """
+        Setup the total amount of time for all the activities listed
+        for the date span.
+        """
+        self.total_time_labl.setText(
+            "Total : %s" % total_seconds_to_hour_min(total_seconds))
+
+    def get_row_count(self):
+        """Return the number of activities shown in the table."""
+        return self.view.proxy_model.get_accepted_row_count()
+
+    # ---- Table focus handlers
+
+    def tableview_focused_in(self, view):
+        """Allow the selection of a row when the table is focused."""
+        view.set_selected(True)
+
+    def clear_focused_table(self):
+        """Clear the selection of the table."""
+        self.view.set_selected(False)
+
+    def selectedFrame(self):
+        """
+        Return the index of the frame corresponding to the selected row
+        in the table if any or else return None.
+        """
+        return self.view.get_selected_frame_index()
+
+    def selectedFrames(self):
+        """
+        Return the sorted list of the indexes of the frames corresponding to
+        the selected rows of the table.
+        """
+        return self.view.get_selected_frame_indexes()
+
+    def get_new_activity_index_and_time(self, where='above'):
+        """
+        Get the index and datetime of the activity that is to be added to
+        Watson's frames.
+        The new activity is added next to the selected activity if any.
+        Otherwise, the activity is added at the beginning of the first day
+        of the span if where is 'above' and to the beginning of the last
+        day of the span if where is 'below'.
+        """
+        frame_index = self.selectedFrame()
+        if frame_index is not None:
+            if where == 'above':
+                insert_time = self.model.client.frames[frame_index].start
+            elif where == 'below':
+                insert_time = self.model.client.frames[frame_index].stop
+                frame_index += 1
+        else:
+            insert_time = (self.date_span[0] if where == 'above' else
+                           self.date_span[1].floor('day'))
+            frame_index = find_where_to_insert_new_frame(
+                self.model.client, insert_time, 'above')
+
+        return frame_index, insert_time
+
+
 class WatsonTableWidget(QWidget):
     """
     A widget that contains a formatted table view and a custom title bar
@@ -477,7 +868,7 @@ class BasicWatsonTableView(QTableView):
         super(BasicWatsonTableView, self).__init__(parent)
         self.setSortingEnabled(False)
 
-        self.proxy_model = WatsonSortFilterProxyModel(source_model)
+        self.proxy_model = self.create_proxy_model(source_model)
         self.setModel(self.proxy_model)
 
         # ---- Setup the delegates
@@ -505,6 +896,10 @@ class BasicWatsonTableView(QTableView):
         self.horizontalHeader().setSectionResizeMode(
             columns['comment'], QHeaderView.Stretch)
 
+    def create_proxy_model(self, source_model):
+        """Return the proxy model of the view."""
+        return WatsonSortFilterProxyModel(source_model, parent=self)
+
     def set_date_span(self, date_span):
         """Set the date span in the proxy model."""
         self.proxy_model.set_date_span(date_span)
@@ -517,6 +912,13 @@ class BasicWatsonTableView(QTableView):
         """Set the tag filters of the proxy model."""
         self.proxy_model.set_tag_filters(tag_filters)
 
+    def sort_by(self, column, order=Qt.AscendingOrder):
+        """
+        Sort the rows by the specified column of the source model, or in
+        the order of the source model if column is -1.
+        """
+        self.proxy_model.sort(column, order)
+
     def focusInEvent(self, event):
         """Qt method override."""
         self.sig_focused_in.emit(self)
@@ -546,7 +948,7 @@ class FormatedWatsonTableView(BasicWatsonTableView):
 
         self.setMouseTracking(True)
         self.setSelectionBehavior(self.SelectRows)
-        self.setSelectionMode(self.SingleSelection)
+        self.setSelectionMode(self.ExtendedSelection)
         self.set_selected(False)
 
         self.horizontalHeader().hide()
@@ -557,6 +959,7 @@ class FormatedWatsonTableView(BasicWatsonTableView):
 
         self.proxy_model.sig_sourcemodel_changed.connect(
             self.update_table_height)
+        self.proxy_model.rowsRemoved.connect(self.select_current_row)
 
     def update_table_height(self):
         """
@@ -597,7 +1000,13 @@ class FormatedWatsonTableView(BasicWatsonTableView):
     # ---- Row selection
 
     def set_selected(self, value):
+        """
+        Set whether the rows of the table can be selected. The selection
+        is cleared when the table is unselected.
+        """
         self.is_selected = bool(value)
+        if not self.is_selected:
+            self.clearSelection()
         self.viewport().update()
 
     def get_selected_row(self):
@@ -622,12 +1031,62 @@ class FormatedWatsonTableView(BasicWatsonTableView):
                 return self.proxy_model.mapToSource(selected_row[0]).row()
         return None
 
+    def select_current_row(self):
+        """
+        Select the current row when the selected rows were removed, so that
+        a row stays selected after deleting an activity.
+        """
+        if (self.is_selected and self.currentIndex().isValid() and
+                not self.selectionModel().hasSelection()):
+            self.selectRow(self.currentIndex().row())
+
+    def mouseReleaseEvent(self, event):
+        """
+        Qt method override to keep the selection when the row that was
+        clicked was removed before the mouse button was released, since the
+        selection of an already selected row is deferred to the release.
+        """
+        selection = self.selectionModel().selection()
+        super(FormatedWatsonTableView, self).mouseReleaseEvent(event)
+        if not self.indexAt(event.pos()).isValid():
+            self.selectionModel().select(
+                selection, QItemSelectionModel.ClearAndSelect)
+
+    def get_selected_frame_indexes(self):
+        """
+        Return the sorted list of the indexes of the frames corresponding
+        to the selected rows.
+        """
+        if not self.is_selected:
+            return []
+        indexes = (self.proxy_model.mapToSource(index) for index in
+                   self.selectionModel().selectedRows())
+        return sorted(index.row() for index in indexes if index.isValid())
+
     # ---- Mouse hovered
 
     def set_hovered_row(self, row):
+        """
+        Set the mouse hovered row and repaint only the rows whose
+        highlighting changed.
+        """
         if self._hovered_row != row:
+            old_row = self._hovered_row
             self._hovered_row = row
-            self.viewport().update()
+            for row in (old_row, row):
+                rect = self.row_rect(row)
+                if rect is not None:
+                    self.viewport().update(rect)
+
+    def row_rect(self, row):
+        """
+        Return the rectangle of the row in the viewport, or None if the
+        row is None or not in the table.
+        """
+        if row is None or not 0 <= row < self.model().rowCount():
+            return None
+        return QRect(0, self.rowViewportPosition(row),
+                     self.viewport().width(), self.rowHeight(row))
 
     def itemEnterEvent(self, index):
         self.set_hovered_row(index.row())
@@ -641,6 +1100,46 @@ class FormatedWatsonTableView(BasicWatsonTableView):
         self.set_hovered_row(None)
 
 
+class WatsonSpanTableView(FormatedWatsonTableView):
+    """
+    A FormatedWatsonTableView that shows the activities of a long date
+    span in a single scrollable table, with a header row spanning all the
+    columns for each day.
+
+    Contrary to a vertical stack of tables, only the visible rows are laid
+    out and painted, and the delegates are shared by all the days.
+    """
+
+    def create_proxy_model(self, source_model):
+        """Method override to show the activities of all the days."""
+        return WatsonSpanTableModel(source_model, parent=self)
+
+    def setup(self):
+        """Method override to make the table scrollable."""
+        super(WatsonSpanTableView, self).setup()
+        self.setFrameShape(QFrame.StyledPanel)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.proxy_model.modelReset.connect(self.update_day_header_spans)
+        self.proxy_model.rowsInserted.connect(self.update_day_header_spans)
+        self.proxy_model.rowsRemoved.connect(self.update_day_header_spans)
+        self.update_day_header_spans()
+
+    def update_table_height(self):
+        """
+        Method override, since the height of the table does not depend on
+        its content.
+        """
+        pass
+
+    def update_day_header_spans(self):
+        """Make the header row of each day span all the columns."""
+        self.clearSpans()
+        column_count = self.proxy_model.columnCount()
+        for row in self.proxy_model.header_rows():
+            self.setSpan(row, 0, 1, column_count)
+
+
 if __name__ == '__main__':
     from qwatson.watson_ext.watsonextends import Watson
     from qwatson.models.tablemodels import WatsonTableModel
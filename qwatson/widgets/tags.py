@@ -11,11 +11,22 @@
 
 from PyQt5.QtWidgets import QLineEdit
 
+# ---- Local imports
+
+from qwatson.widgets.completers import TagCompleter
+
 
 class TagLineEdit(QLineEdit):
     """A lineedit to show and edit tags."""
     def __init__(self, parent=None):
         super(TagLineEdit, self).__init__(parent)
+        self.tag_completer = None
+
+    def setup_completer(self, client):
+        """Complete the tags from the completion index of the client."""
+        self.tag_completer = TagCompleter(
+            lambda: client.completions.tags, parent=self)
+        self.tag_completer.set_line_edit(self)
 
     @property
     def tags(self):
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+
+# ---- Third party imports
+
+import arrow
+import pytest
+from PyQt5.QtCore import Qt
+
+# ---- Local imports
+
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.widgets.bulkedit import BulkEditButton
+
+
+@pytest.fixture
+def bulk_edit_btn(qtbot, tmpdir):
+    client = Watson(config_dir=str(tmpdir))
+    start = arrow.now().floor('day')
+    for i, project in enumerate(['qwatson', 'admin']):
+        client.frames.add(project, start.shift(hours=i),
+                          start.shift(hours=i + 1))
+    bulk_edit_btn = BulkEditButton(client)
+    qtbot.addWidget(bulk_edit_btn)
+    return bulk_edit_btn
+
+
+def test_bulk_edit_values(bulk_edit_btn, qtbot):
+    """
+    Test that only the values of the checked fields are emitted and that
+    the editors are enabled only when their field is checked.
+    """
+    bulk_edit_btn.setup_projects()
+    assert [bulk_edit_btn.project_cbox.itemText(i) for i in
+            range(bulk_edit_btn.project_cbox.count())] == [
+        '', 'admin', 'qwatson']
+    for chbox, editor in bulk_edit_btn.fields():
+        assert not editor.isEnabled()
+
+    # Nothing is emitted when no field is checked.
+    with qtbot.assertNotEmitted(bulk_edit_btn.sig_edit_requested):
+        qtbot.mouseClick(bulk_edit_btn.apply_btn, Qt.LeftButton)
+
+    bulk_edit_btn.tags_chbox.setChecked(True)
+    assert bulk_edit_btn.tags_edit.isEnabled()
+    bulk_edit_btn.tags_edit.setText('review, dev, review')
+    bulk_edit_btn.project_cbox.setCurrentIndex(1)
+    with qtbot.waitSignal(bulk_edit_btn.sig_edit_requested) as blocker:
+        qtbot.mouseClick(bulk_edit_btn.apply_btn, Qt.LeftButton)
+    assert blocker.args == [{'tags': ['dev', 'review']}]
+
+    # An empty comment can be set to clear the comments.
+    bulk_edit_btn.project_chbox.setChecked(True)
+    bulk_edit_btn.comment_chbox.setChecked(True)
+    with qtbot.waitSignal(bulk_edit_btn.sig_edit_requested) as blocker:
+        qtbot.mouseClick(bulk_edit_btn.apply_btn, Qt.LeftButton)
+    assert blocker.args == [
+        {'project': 'admin', 'tags': ['dev', 'review'], 'message': ''}]
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
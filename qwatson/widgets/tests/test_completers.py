@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+
+# ---- Third party imports
+
+import arrow
+import pytest
+from PyQt5.QtCore import Qt
+
+# ---- Local imports
+
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.widgets.projects import ProjectManager
+from qwatson.widgets.tags import TagLineEdit
+
+
+@pytest.fixture
+def client(tmpdir):
+    client = Watson(config_dir=str(tmpdir))
+    start = arrow.now().floor('day')
+    for i, (project, tags) in enumerate([
+            ('qwatson', ['dev', 'ticket-12']), ('qwatson', ['ticket-3']),
+            ('admin', ['ticket-12']), ('quality', ['docs'])]):
+        client.frames.add(project, start.shift(days=i - 3),
+                          start.shift(days=i - 3, hours=1), tags=tags)
+    return client
+
+
+def select_completion(qtbot, completer, row):
+    """Select the completion at row in the popup of the completer."""
+    popup = completer.popup()
+    assert popup.isVisible()
+    popup.setCurrentIndex(completer.completionModel().index(row, 0))
+    qtbot.keyPress(popup, Qt.Key_Enter)
+
+
+def test_tag_completion(qtbot, client):
+    """Test that the last tag of the line edit is completed."""
+    tag_edit = TagLineEdit()
+    tag_edit.setup_completer(client)
+    qtbot.addWidget(tag_edit)
+    tag_edit.show()
+
+    qtbot.keyClicks(tag_edit, 'TI')
+    completer = tag_edit.tag_completer
+    assert completer.model().stringList() == ['ticket-12', 'ticket-3']
+    select_completion(qtbot, completer, 0)
+    assert tag_edit.text() == 'ticket-12'
+
+    # The tags that are already in the list are not suggested.
+    qtbot.keyClicks(tag_edit, ', d')
+    assert completer.model().stringList() == ['docs', 'dev']
+    qtbot.keyClicks(tag_edit, 'o')
+    assert completer.model().stringList() == ['docs']
+    select_completion(qtbot, completer, 0)
+    assert tag_edit.text() == 'ticket-12, docs'
+    qtbot.keyClicks(tag_edit, ', ti')
+    assert completer.model().stringList() == ['ticket-3']
+    select_completion(qtbot, completer, 0)
+    assert tag_edit.tags == ['docs', 'ticket-12', 'ticket-3']
+
+
+def test_project_completion(qtbot, client):
+    """
+    Test that a project can be selected by choosing one of the completions
+    of the text typed in the combobox.
+    """
+    manager = ProjectManager(client)
+    qtbot.addWidget(manager)
+    manager.show()
+    project_cbox = manager.project_cbox
+    project_cbox.setCurentText('admin')
+
+    line_edit = project_cbox.combobox.lineEdit()
+    line_edit.clear()
+    qtbot.keyClicks(line_edit, 'q')
+    assert project_cbox.completer.model().stringList() == [
+        'qwatson', 'quality']
+    # The current project does not change while typing.
+    assert manager.currentProject() == 'admin'
+
+    with qtbot.waitSignal(manager.sig_project_changed):
+        select_completion(qtbot, project_cbox.completer, 1)
+    assert manager.currentProject() == 'quality'
+    assert line_edit.text() == 'quality'
+
+    # The text is set back to the current project if it does not match.
+    line_edit.clear()
+    qtbot.keyClicks(line_edit, 'unknown')
+    qtbot.keyPress(line_edit, Qt.Key_Enter)
+    assert manager.currentProject() == 'quality'
+    assert line_edit.text() == 'quality'
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
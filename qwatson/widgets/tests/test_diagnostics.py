@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+
+# ---- Third party imports
+
+import arrow
+import pytest
+
+# ---- Local imports
+
+from qwatson.utils import instrumentation
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.widgets.diagnostics import DiagnosticsWidget
+
+
+@pytest.fixture
+def diagnostics(qtbot):
+    instrumentation.reset()
+    diagnostics = DiagnosticsWidget()
+    qtbot.addWidget(diagnostics)
+    diagnostics.show()
+    yield diagnostics
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_timings_tab(diagnostics):
+    """Test that the timings tab shows the collected data."""
+    tab = diagnostics.timings_tab
+    assert not tab.enable_chbox.isChecked()
+    assert tab.table.rowCount() == 0
+
+    tab.enable_chbox.setChecked(True)
+    assert instrumentation.is_enabled()
+
+    @instrumentation.timed('test.func')
+    def func():
+        pass
+
+    func()
+    func()
+    diagnostics.refresh()
+    assert tab.table.rowCount() == 1
+    assert tab.table.item(0, 0).text() == 'test.func'
+    assert tab.table.item(0, 1).text() == '2'
+
+    tab.reset_btn.click()
+    assert tab.table.rowCount() == 0
+
+    tab.enable_chbox.setChecked(False)
+    assert not instrumentation.is_enabled()
+
+
+def test_memory_tab(qtbot, diagnostics, tmpdir):
+    """Test that the memory tab shows the report and snapshot diffs."""
+    tab = diagnostics.memory_tab
+    tab.client = Watson(config_dir=str(tmpdir))
+    tab.client.frames.add('p1', arrow.now(), arrow.now(), tags=['t1'])
+    diagnostics.register_cache('test', list(range(10)))
+
+    tab.report_btn.click()
+    text = tab.text.toPlainText()
+    assert 'Frames: 1 frames' in text
+    assert 'Cache test' in text
+    assert 'WatsonTableWidget' in text
+
+    assert not tab.compare_btn.isEnabled()
+    tab.snapshot_btn.click()
+    tab.snapshot_btn.click()
+    assert tab.compare_btn.isEnabled()
+    tab.compare_btn.click()
+    assert tab.text.toPlainText().startswith('Top allocations')
+
+    diagnostics.close()
+    assert not tab.tracemalloc.is_tracing()
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2018 Jean-Sébastien Gosselin
+# https://github.com/jnsebgosselin/qwatson
+#
+# This file is part of QWatson.
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+
+import os
+
+# ---- Third party imports
+
+import arrow
+import pytest
+from PyQt5.QtCore import Qt
+
+# ---- Local imports
+
+from qwatson.watson_ext.watsonextends import Watson
+from qwatson.widgets.filters import FilterButton
+
+
+@pytest.fixture
+def client(tmpdir):
+    client = Watson(config_dir=str(tmpdir))
+    start = arrow.now().floor('day')
+    for i in range(20):
+        client.frames.add('p%d' % (i % 4), start.shift(hours=i),
+                          start.shift(hours=i + 1), tags=['#%d' % i])
+    return client
+
+
+@pytest.fixture
+def filter_btn(qtbot, client):
+    filter_btn = FilterButton(client)
+    qtbot.addWidget(filter_btn)
+    filter_btn.tags_menu.setup_menu_items()
+    return filter_btn
+
+
+def test_filter_items_model(filter_btn, client, qtbot):
+    """
+    Test that the items are listed in the model of the menu and that
+    their check state is stored in the model.
+    """
+    tags_menu = filter_btn.tags_menu
+    model = tags_menu.model
+    assert model.rowCount() == 21
+    assert model.items()[:3] == ['', '#0', '#1']
+    assert tags_menu.checked_items() == model.items()
+
+    # Uncheck an item from the list view.
+    with qtbot.waitSignal(tags_menu.sig_items_checkstate_changed) as blocker:
+        model.setData(model.index(1), Qt.Unchecked, Qt.CheckStateRole)
+    assert blocker.args[0]['#0'] is False
+    assert model.index(1).data(Qt.CheckStateRole) == Qt.Unchecked
+    assert tags_menu.select_all_chbox.checkState() == Qt.PartiallyChecked
+
+    # Add and remove tags from the activities. Only the rows of the tags
+    # that changed are inserted or removed.
+    client.frames.add('p0', arrow.now(), arrow.now(), tags=['#0a', 'new'])
+    del client.frames[client.frames[-2].id]
+    with qtbot.assertNotEmitted(model.modelReset):
+        tags_menu.setup_menu_items()
+    assert '#19' not in model.items()
+    assert model.items()[1:3] == ['#0', '#0a']
+    assert model.items()[-1] == 'new'
+    assert tags_menu.checked_items() == [
+        item for item in model.items() if item != '#0']
+
+
+def test_search_filter_items(filter_btn):
+    """
+    Test that the items are filtered with the search box and that the
+    (Select All) item only applies to the items matching the search.
+    """
+    tags_menu = filter_btn.tags_menu
+    tags_menu.search_box.setText('#1')
+    assert tags_menu.list_view.model().rowCount() == 11
+    assert tags_menu.visible_items()[:2] == ['#1', '#10']
+
+    tags_menu.select_all_chbox.setChecked(False)
+    assert len(tags_menu.checked_items()) == 10
+    assert not any(tags_menu.items_checkstate()[tag] for
+                   tag in tags_menu.visible_items())
+
+    # The (Select All) item reflects the items matching the search.
+    tags_menu.search_box.setText('')
+    assert tags_menu.select_all_chbox.checkState() == Qt.PartiallyChecked
+    tags_menu.search_box.setText('#2')
+    assert tags_menu.select_all_chbox.checkState() == Qt.Checked
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])